@@ -2,6 +2,8 @@
 import os
 import smtplib
 from email.message import EmailMessage
+from html import escape
+from string import Template
 
 # Variáveis do .env (já carregadas pelo main.py)
 SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
@@ -13,10 +15,7 @@ SMTP_FROM_EMAIL = os.getenv("SMTP_FROM_EMAIL", SMTP_USER)
 FRONTEND_RESET_URL = os.getenv("FRONTEND_RESET_URL", "http://localhost:5173/reset-password")
 
 
-def send_email(to_email: str, subject: str, html_body: str, text_body: str | None = None):
-    if not SMTP_USER or not SMTP_PASSWORD:
-        raise RuntimeError("SMTP_USER ou SMTP_PASSWORD não configurados. Verifique o arquivo .env")
-
+def build_message(to_email: str, subject: str, html_body: str, text_body: str | None = None) -> EmailMessage:
     if not text_body:
         text_body = "Seu cliente não suporta HTML. Abra o e-mail em outro aplicativo."
 
@@ -27,11 +26,72 @@ def send_email(to_email: str, subject: str, html_body: str, text_body: str | Non
 
     msg.set_content(text_body)
     msg.add_alternative(html_body, subtype="html")
+    return msg
+
+
+class SMTPConnection:
+    """
+    Conexão SMTP autenticada reaproveitada entre envios (evita TCP + STARTTLS + login
+    por mensagem). Reconecta sozinha se o servidor derrubar a sessão.
+    """
+
+    def __init__(
+        self,
+        host: str | None = None,
+        port: int | None = None,
+        user: str | None = None,
+        password: str | None = None,
+        starttls: bool = True,
+        timeout: float = 30,
+    ):
+        self.host = host or SMTP_HOST
+        self.port = port or SMTP_PORT
+        self.user = user if user is not None else SMTP_USER
+        self.password = password if password is not None else SMTP_PASSWORD
+        self.starttls = starttls
+        self.timeout = timeout
+        self._server: smtplib.SMTP | None = None
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
+            server.starttls()
+        if self.user and self.password:
+            server.login(self.user, self.password)
+        return server
+
+    def send(self, msg: EmailMessage) -> None:
+        if self._server is None:
+            self._server = self._connect()
+        try:
+            self._server.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            # sessão ociosa derrubada pelo servidor: uma nova tentativa com conexão nova
+            self._server = self._connect()
+            self._server.send_message(msg)
+
+    def close(self) -> None:
+        server, self._server = self._server, None
+        if server is None:
+            return
+        try:
+            server.quit()
+        except smtplib.SMTPException:
+            server.close()
+        except OSError:
+            pass
 
-    with smtplib.SMTP(SMTP_HOST, SMTP_PORT) as server:
-        server.starttls()
-        server.login(SMTP_USER, SMTP_PASSWORD)
-        server.send_message(msg)
+
+def send_email(to_email: str, subject: str, html_body: str, text_body: str | None = None):
+    if not SMTP_USER or not SMTP_PASSWORD:
+        raise RuntimeError("SMTP_USER ou SMTP_PASSWORD não configurados. Verifique o arquivo .env")
+
+    msg = build_message(to_email, subject, html_body, text_body)
+    conn = SMTPConnection()
+    try:
+        conn.send(msg)
+    finally:
+        conn.close()
 
 
 def _build_reset_email_html(reset_link: str) -> str:
@@ -73,7 +133,8 @@ def _default_reset_link(token: str) -> str:
     return f"{base}/{token}"
 
 
-def send_password_reset_email(user_email: str, reset_link: str | None = None, token: str | None = None):
+def build_password_reset_email(reset_link: str | None = None, token: str | None = None) -> tuple[str, str, str]:
+    """(assunto, html, texto) do e-mail de recuperação."""
     subject = "Recuperação de senha"
     final_link = reset_link or (token and _default_reset_link(token))
     if not final_link:
@@ -85,5 +146,76 @@ def send_password_reset_email(user_email: str, reset_link: str | None = None, to
         f"{final_link}\n\n"
         "Se você não solicitou, ignore este e-mail."
     )
-    html_body = _build_reset_email_html(final_link)
+    return subject, _build_reset_email_html(final_link), text_body
+
+
+def send_password_reset_email(user_email: str, reset_link: str | None = None, token: str | None = None):
+    subject, html_body, text_body = build_password_reset_email(reset_link, token)
     send_email(user_email, subject, html_body, text_body)
+
+
+# --- Resumo semanal de estudos ---
+# Templates compilados uma vez no import; o job renderiza dezenas de milhares de e-mails por execução.
+_DIGEST_HTML = Template(
+    """
+<table role="presentation" cellspacing="0" cellpadding="0" border="0" align="center" width="100%" style="max-width: 520px; background: #ffffff; border: 1px solid #e5e7eb; border-radius: 12px; font-family: Arial, sans-serif; color: #0f172a;">
+  <tr>
+    <td style="padding: 24px 24px 8px 24px; text-align: center;">
+      <div style="display: inline-block; width: 56px; height: 56px; border-radius: 28px; background: linear-gradient(135deg,#3b82f6,#10b981); color: #ffffff; font-size: 28px; line-height: 56px; font-weight: 700;">📚</div>
+      <h1 style="margin: 16px 0 8px 0; font-size: 22px; color: #0f172a; font-weight: 700;">Seu resumo da semana</h1>
+      <p style="margin: 0; font-size: 14px; color: #475569;">Olá, $name! Você tem $pending_total tarefa(s) pendente(s)$reviews_sentence.</p>
+    </td>
+  </tr>
+  <tr>
+    <td style="padding: 16px 24px 8px 24px;">
+      <table role="presentation" width="100%" cellspacing="0" cellpadding="0" border="0" style="font-size: 14px; color: #0f172a;">
+$week_rows
+      </table>
+    </td>
+  </tr>
+  <tr>
+    <td style="padding: 16px 24px 24px 24px; text-align: center;">
+      <a href="$link" style="display: inline-block; padding: 12px 18px; background: linear-gradient(135deg,#3b82f6,#10b981); color: #ffffff; text-decoration: none; border-radius: 8px; font-size: 15px; font-weight: 600;">Continuar estudando</a>
+    </td>
+  </tr>
+</table>
+"""
+)
+_DIGEST_WEEK_ROW = Template(
+    """        <tr>
+          <td style="padding: 6px 0; border-bottom: 1px solid #f1f5f9;">Semana $week</td>
+          <td style="padding: 6px 0; border-bottom: 1px solid #f1f5f9; text-align: right; color: #475569;">$pending pendente(s)$reviews</td>
+        </tr>"""
+)
+_DIGEST_TEXT = Template("Olá, $name!\n\nVocê tem $pending_total tarefa(s) pendente(s)$reviews_sentence.\n\n$week_lines\n\nContinue em: $link\n")
+
+
+def _reviews_suffix(count: int, template: str) -> str:
+    return template.format(count) if count else ""
+
+
+def build_digest_email(name: str, weeks: list[tuple[int | None, int, int]], link: str) -> tuple[str, str, str]:
+    """(assunto, html, texto) do resumo semanal. weeks = [(semana, pendentes, revisões vencidas)]."""
+    pending_total = sum(w[1] for w in weeks)
+    reviews_total = sum(w[2] for w in weeks)
+    values = {
+        "name": escape(name),
+        "pending_total": pending_total,
+        "reviews_sentence": _reviews_suffix(reviews_total, " e {} revisão(ões) para fazer"),
+        "link": escape(link, quote=True),
+    }
+    week_rows = "\n".join(
+        _DIGEST_WEEK_ROW.substitute(
+            week=week if week is not None else "-",
+            pending=pending,
+            reviews=_reviews_suffix(reviews, " · {} revisão(ões)"),
+        )
+        for week, pending, reviews in weeks
+    )
+    week_lines = "\n".join(
+        f"- Semana {week if week is not None else '-'}: {pending} pendente(s){_reviews_suffix(reviews, ', {} revisão(ões)')}"
+        for week, pending, reviews in weeks
+    )
+    html_body = _DIGEST_HTML.substitute(values, week_rows=week_rows)
+    text_body = _DIGEST_TEXT.substitute(values, name=name, link=link, week_lines=week_lines)
+    return "Seu resumo semanal de estudos", html_body, text_body
@@ -1,8 +1,7 @@
 # main.py
 import os
 import secrets
-from datetime import datetime, timedelta
-from typing import Dict
+from contextlib import asynccontextmanager
 
 from dotenv import load_dotenv
 load_dotenv()  # Carrega .env ANTES de importar email_service
@@ -12,9 +11,23 @@ from fastapi.responses import HTMLResponse, PlainTextResponse
 from fastapi.templating import Jinja2Templates
 
 from email_service import send_password_reset_email
+from token_store import create_token_store, start_sweeper
+
+# Tokens de reset: TTL, tamanho máximo e backend configurável (memory | sqlite)
+reset_tokens = create_token_store()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    stop_sweeper = start_sweeper(reset_tokens)
+    try:
+        yield
+    finally:
+        stop_sweeper.set()
+
 
 # Inicializa o FastAPI
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Templates (HTML)
 templates = Jinja2Templates(directory="templates")
@@ -25,9 +38,6 @@ FRONTEND_RESET_URL = os.getenv(
     "http://127.0.0.1:8080/reset-password"
 )
 
-# Banco fake na memória (apenas para testes)
-reset_tokens: Dict[str, Dict] = {}
-
 
 # -------------------------------------
 # ROTA: Tela inicial (login)
@@ -47,11 +57,7 @@ async def forgot_password(email: str = Form(...)):
 
     token = secrets.token_urlsafe(32)
 
-    reset_tokens[token] = {
-        "email": email,
-        "expires_at": datetime.utcnow() + timedelta(hours=1),
-        "used": False,
-    }
+    reset_tokens.put(token, email)
 
     reset_link = f"{FRONTEND_RESET_URL}?token={token}"
     send_password_reset_email(email, reset_link)
@@ -64,13 +70,8 @@ async def forgot_password(email: str = Form(...)):
 # -------------------------------------
 @app.get("/reset-senha", response_class=HTMLResponse)
 async def reset_senha_get(request: Request, token: str | None = None):
-    if not token or token not in reset_tokens:
-        raise HTTPException(status_code=400, detail="Token inválido")
-
-    data = reset_tokens[token]
-
-    if data["used"] or data["expires_at"] < datetime.utcnow():
-        raise HTTPException(status_code=400, detail="Token expirado ou já utilizado")
+    if not token or reset_tokens.get(token) is None:
+        raise HTTPException(status_code=400, detail="Token inválido, expirado ou já utilizado")
 
     html = f"""
         <h1>Definir nova senha</h1>
@@ -90,18 +91,14 @@ async def reset_senha_get(request: Request, token: str | None = None):
 # -------------------------------------
 @app.post("/reset-senha", response_class=PlainTextResponse)
 async def reset_senha_post(token: str = Form(...), password: str = Form(...)):
-    if token not in reset_tokens:
-        raise HTTPException(status_code=400, detail="Token inválido")
-
-    data = reset_tokens[token]
-
-    if data["used"] or data["expires_at"] < datetime.utcnow():
-        raise HTTPException(status_code=400, detail="Token expirado ou já utilizado")
+    # consume() valida e marca como usado de uma vez (sem corrida entre dois POSTs)
+    data = reset_tokens.consume(token)
+    if data is None:
+        raise HTTPException(status_code=400, detail="Token inválido, expirado ou já utilizado")
 
     # Aqui você faria o hash da senha para salvar no banco
     print(f"[DEBUG] Trocar senha do usuário {data['email']} para: {password}")
 
-    data["used"] = True
     return "Senha alterada com sucesso (mock)."
 
 
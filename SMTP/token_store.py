@@ -0,0 +1,197 @@
+# token_store.py
+"""
+Armazenamento dos tokens de reset de senha do serviço SMTP.
+
+Todos os backends têm TTL, limite de tamanho e lookup O(1) pelo token:
+- MemoryTokenStore: dict ordenado por inserção (= ordem de expiração, já que o
+  TTL é fixo), para dev/um worker;
+- SqliteTokenStore: arquivo local compartilhado entre workers (modo WAL).
+Um sweeper em segundo plano remove expirados periodicamente (no SQLite também
+aplica o limite de tamanho, para o put não precisar contar a tabela).
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Optional
+
+_logger = logging.getLogger(__name__)
+
+RESET_TOKEN_TTL_SECONDS = int(os.getenv("RESET_TOKEN_TTL_SECONDS", "3600"))
+RESET_TOKEN_MAX_ENTRIES = int(os.getenv("RESET_TOKEN_MAX_ENTRIES", "100000"))
+RESET_TOKEN_SWEEP_SECONDS = float(os.getenv("RESET_TOKEN_SWEEP_SECONDS", "60"))
+
+
+class TokenStore(ABC):
+    """Interface comum. Entradas: {"email", "expires_at" (epoch), "used"}."""
+
+    @abstractmethod
+    def put(self, token: str, email: str) -> None:
+        ...
+
+    @abstractmethod
+    def get(self, token: str) -> Optional[Dict]:
+        """Entrada válida (não expirada e não usada) ou None."""
+
+    @abstractmethod
+    def consume(self, token: str) -> Optional[Dict]:
+        """Marca como usado de forma atômica; devolve a entrada se ainda era válida."""
+
+    @abstractmethod
+    def sweep(self) -> int:
+        """Remove entradas expiradas; devolve quantas saíram."""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+
+class MemoryTokenStore(TokenStore):
+    def __init__(self, ttl: int = RESET_TOKEN_TTL_SECONDS, max_entries: int = RESET_TOKEN_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, token: str, email: str) -> None:
+        with self._lock:
+            self._entries[token] = {"email": email, "expires_at": time.time() + self.ttl, "used": False}
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)  # a mais antiga é a próxima a expirar
+
+    def _valid_entry(self, token: str) -> Optional[Dict]:
+        # chamar com self._lock
+        entry = self._entries.get(token)
+        if entry is None or entry["used"] or entry["expires_at"] < time.time():
+            return None
+        return dict(entry)
+
+    def get(self, token: str) -> Optional[Dict]:
+        with self._lock:
+            return self._valid_entry(token)
+
+    def consume(self, token: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._valid_entry(token)
+            if entry is None:
+                return None
+            self._entries[token]["used"] = True
+            return entry
+
+    def sweep(self) -> int:
+        now = time.time()
+        removed = 0
+        with self._lock:
+            # ordem de inserção = ordem de expiração: para no primeiro ainda válido
+            while self._entries:
+                token, entry = next(iter(self._entries.items()))
+                if entry["expires_at"] >= now:
+                    break
+                del self._entries[token]
+                removed += 1
+        return removed
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class SqliteTokenStore(TokenStore):
+    def __init__(self, path: str, ttl: int = RESET_TOKEN_TTL_SECONDS, max_entries: int = RESET_TOKEN_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS reset_tokens ("
+            " token TEXT PRIMARY KEY, email TEXT NOT NULL, expires_at REAL NOT NULL, used INTEGER NOT NULL DEFAULT 0)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_reset_tokens_expires ON reset_tokens (expires_at)")
+
+    def _conn(self) -> sqlite3.Connection:
+        # uma conexão por thread; autocommit (isolation_level=None) com transações explícitas
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def put(self, token: str, email: str) -> None:
+        # o limite de tamanho é aplicado pelo sweep(), não a cada inserção
+        self._conn().execute(
+            "INSERT OR REPLACE INTO reset_tokens (token, email, expires_at, used) VALUES (?, ?, ?, 0)",
+            (token, email, time.time() + self.ttl),
+        )
+
+    def get(self, token: str) -> Optional[Dict]:
+        row = self._conn().execute(
+            "SELECT email, expires_at FROM reset_tokens WHERE token = ? AND used = 0 AND expires_at >= ?",
+            (token, time.time()),
+        ).fetchone()
+        if row is None:
+            return None
+        return {"email": row[0], "expires_at": row[1], "used": False}
+
+    def consume(self, token: str) -> Optional[Dict]:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            entry = self.get(token)
+            if entry is not None:
+                conn.execute("UPDATE reset_tokens SET used = 1 WHERE token = ?", (token,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return entry
+
+    def sweep(self) -> int:
+        """Remove expirados e, acima de max_entries, os que expiram primeiro."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            removed = conn.execute("DELETE FROM reset_tokens WHERE expires_at < ?", (time.time(),)).rowcount
+            (count,) = conn.execute("SELECT COUNT(*) FROM reset_tokens").fetchone()
+            if count > self.max_entries:
+                removed += conn.execute(
+                    "DELETE FROM reset_tokens WHERE token IN ("
+                    " SELECT token FROM reset_tokens ORDER BY expires_at LIMIT ?)",
+                    (count - self.max_entries,),
+                ).rowcount
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return removed
+
+    def __len__(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM reset_tokens").fetchone()[0]
+
+
+def create_token_store() -> TokenStore:
+    """RESET_TOKEN_STORE=memory (padrão) | sqlite (RESET_TOKEN_DB=caminho do arquivo)."""
+    backend = os.getenv("RESET_TOKEN_STORE", "memory").lower()
+    if backend == "sqlite":
+        return SqliteTokenStore(os.getenv("RESET_TOKEN_DB", "reset_tokens.sqlite3"))
+    return MemoryTokenStore()
+
+
+def start_sweeper(store: TokenStore, interval: float = RESET_TOKEN_SWEEP_SECONDS) -> threading.Event:
+    """Thread daemon que chama store.sweep() a cada intervalo; setar o Event encerra."""
+    stop_event = threading.Event()
+
+    def _loop():
+        while not stop_event.wait(interval):
+            try:
+                store.sweep()
+            except Exception:
+                _logger.exception("Falha ao limpar tokens de reset expirados")
+
+    threading.Thread(target=_loop, name="reset-token-sweeper", daemon=True).start()
+    return stop_event
@@ -41,6 +41,8 @@ export interface StudyCard {
   depends_on: string[];
   raw: Record<string, any>;
   notes?: string;
+  // URLs do áudio pré-sintetizado (404 até ficar pronto; aí usar o POST /tts)
+  audio?: Partial<Record<'title' | 'description' | 'instructions', string>> | null;
 }
 
 export interface StudyPlanMeta {
@@ -79,6 +81,12 @@ export interface PlanSummary {
   semanas?: number | null;
   version?: number;
   created_at?: string | null;
+  updated_at?: string | null;
+  stats?: {
+    cards_total: number;
+    cards_by_column: Record<string, number>;
+    effort_minutes_total: number;
+  };
 }
 
 export interface PlanDetail extends PlanSummary {
@@ -219,7 +227,7 @@ export async function predictPlan(payload: PredictPlanRequest, signal?: AbortSig
 }
 
 export async function listPlans(): Promise<PlanSummary[]> {
-  const res = await fetch(`${API_BASE}/api/v1/plans`, {
+  const res = await fetch(`${API_BASE}/api/v1/plans?fields=summary`, {
     method: 'GET',
     headers: authHeaders(),
   });
@@ -294,6 +302,33 @@ export async function updateCardStatus(
   return res.json();
 }
 
+export interface CardChange {
+  card_id: string;
+  // ids da IA ("task-1") se repetem entre semanas; sem semana, um id repetido rejeita o lote
+  semana?: number;
+  status?: string;
+  notes?: string;
+  order?: number;
+}
+
+export async function updateCardsBulk(planId: number, changes: CardChange[]) {
+  const res = await fetch(`${API_BASE}/api/v1/plans/${planId}/cards`, {
+    method: 'PATCH',
+    headers: authHeaders(),
+    body: JSON.stringify({ changes }),
+  });
+  if (!res.ok) {
+    const text = await res.text();
+    throw new Error(`Erro ao atualizar cards (${res.status}): ${text}`);
+  }
+  return res.json() as Promise<{
+    ok: boolean;
+    plan_id: number;
+    updated: { card_id: string; updated_at: string }[];
+    not_found: string[];
+  }>;
+}
+
 export async function deletePlan(planId: number) {
   const res = await fetch(`${API_BASE}/api/v1/plans/${planId}`, {
     method: 'DELETE',
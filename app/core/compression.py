@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import gzip
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli  # type: ignore
+except ImportError:  # pragma: no cover - brotli é opcional, cai para gzip
+    brotli = None
+
+_COMPRESSIBLE_PREFIXES = ("application/json", "text/", "application/javascript", "image/svg+xml")
+
+
+def _accepted(accept_encoding: str, coding: str) -> bool:
+    for item in accept_encoding.split(","):
+        name, _, params = item.partition(";")
+        if name.strip() != coding:
+            continue
+        params = params.replace(" ", "")
+        if params.startswith("q="):
+            try:
+                return float(params[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+class CompressionMiddleware:
+    """
+    Comprime respostas grandes de JSON/texto com brotli (se instalado) ou gzip.
+    Só atua em respostas de corpo único; streams (ex.: áudio) passam intactos.
+    O ETag recebe o sufixo da codificação para continuar forte por representação.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def _choose_encoding(self, scope: Scope) -> Optional[str]:
+        accept = Headers(scope=scope).get("accept-encoding", "").lower()
+        if not accept:
+            return None
+        if brotli is not None and _accepted(accept, "br"):
+            return "br"
+        if _accepted(accept, "gzip"):
+            return "gzip"
+        return None
+
+    def _compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = self._choose_encoding(scope)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Message] = None
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or start_message is None:
+                # ex.: http.response.zerocopysend — o start retido precisa sair antes
+                if start_message is not None:
+                    pending, start_message = start_message, None
+                    await send(pending)
+                await send(message)
+                return
+
+            pending, start_message = start_message, None
+            headers = MutableHeaders(scope=pending)
+            content_type = headers.get("content-type", "")
+            compressible = content_type.startswith(_COMPRESSIBLE_PREFIXES)
+            if compressible:
+                headers.add_vary_header("Accept-Encoding")
+
+            body = message.get("body", b"")
+            if (
+                not compressible
+                or message.get("more_body", False)
+                or "content-encoding" in headers
+                or len(body) < self.minimum_size
+            ):
+                await send(pending)
+                await send(message)
+                return
+
+            compressed = self._compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            etag = headers.get("etag")
+            if etag and etag.endswith('"'):
+                headers["ETag"] = f'{etag[:-1]}-{encoding}"'
+            await send(pending)
+            await send({"type": "http.response.body", "body": compressed, "more_body": False})
+
+        await self.app(scope, receive, send_wrapper)
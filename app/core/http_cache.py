@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import hashlib
+from typing import Any, Optional
+
+# Sufixos adicionados ao ETag pelo CompressionMiddleware (ETag forte por representação).
+ENCODING_SUFFIXES = ("-br", "-gzip")
+
+
+def make_etag(*parts: Any) -> str:
+    """ETag forte a partir de valores que mudam junto com o recurso (ids, updated_at, contagens)."""
+    digest = hashlib.blake2b("|".join(str(p) for p in parts).encode("utf-8"), digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+
+def _strip_encoding(tag: str) -> str:
+    tag = tag.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    for suffix in ENCODING_SUFFIXES:
+        if tag.endswith(f'{suffix}"'):
+            return tag[: -len(suffix) - 1] + '"'
+    return tag
+
+
+def match_etag(if_none_match: Optional[str], etag: str) -> Optional[str]:
+    """
+    Compara If-None-Match com o ETag atual (comparação fraca, como pede a RFC 9110).
+    Retorna a tag enviada pelo cliente que casou, para ecoar no 304, ou None.
+    """
+    if not if_none_match:
+        return None
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return etag
+        if _strip_encoding(candidate) == etag:
+            return candidate
+    return None
@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+import os
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.timing import count_request
+
+# Com vários workers do uvicorn, defina PROMETHEUS_MULTIPROC_DIR (diretório vazio a cada deploy):
+# o prometheus_client passa a gravar os valores em arquivos mmap e o /metrics agrega todos os processos.
+MULTIPROC_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Latência das requisições HTTP por rota.",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "Requisições HTTP em andamento.",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+
+OPENAI_REQUESTS = Counter(
+    "openai_requests_total",
+    "Chamadas HTTP à OpenAI por status.",
+    ["model", "status"],
+)
+OPENAI_REQUEST_DURATION = Histogram(
+    "openai_request_duration_seconds",
+    "Latência de cada chamada HTTP à OpenAI.",
+    ["model"],
+    buckets=(0.5, 1, 2.5, 5, 10, 20, 30, 60, 90, 120, 180),
+)
+OPENAI_RETRIES = Counter(
+    "openai_retries_total",
+    "Retries da OpenAI: 'token_cap' (novo teto/chave de tokens) e 'transport' (urllib3 em 429/5xx).",
+    ["model", "kind"],
+)
+OPENAI_FINISH_REASONS = Counter(
+    "openai_finish_reason_total",
+    "Distribuição de finish_reason das respostas da OpenAI.",
+    ["model", "finish_reason"],
+)
+OPENAI_TOKENS = Counter(
+    "openai_tokens_total",
+    "Tokens consumidos na OpenAI (prompt/completion).",
+    ["model", "kind"],
+)
+
+TTS_SYNTHESIS_DURATION = Histogram(
+    "tts_synthesis_duration_seconds",
+    "Tempo de síntese de áudio por provedor.",
+    ["provider"],
+    buckets=(0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30),
+)
+
+ELEVENLABS_REQUESTS = Counter(
+    "elevenlabs_requests_total",
+    "Chamadas à ElevenLabs: ok, error, cancelled, busy (limite de concorrência) e circuit_open.",
+    ["result"],
+)
+
+PIPER_POOL_WAIT = Histogram(
+    "piper_pool_wait_seconds",
+    "Espera por um worker Piper livre.",
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+PIPER_WORKER_RESTARTS = Counter(
+    "piper_worker_restarts_total",
+    "Workers Piper reiniciados (crash/timeout ou health check).",
+    ["reason"],
+)
+
+TTS_CACHE_LOOKUPS = Counter(
+    "tts_cache_lookups_total",
+    "Consultas ao cache de áudio TTS (hit/miss).",
+    ["result"],
+)
+
+TTS_PRESYNTH_JOBS = Counter(
+    "tts_presynthesis_jobs_total",
+    "Pré-síntese do áudio dos cards: synthesized, fallback (Piper após falha da ElevenLabs), "
+    "cached (já no cache), dropped (fila cheia) e failed.",
+    ["result"],
+)
+
+MODEL_INFERENCE_DURATION = Histogram(
+    "model_inference_duration_seconds",
+    "Latência de predict_with_explanation.",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+
+PASSWORD_HASH_QUEUE = Gauge(
+    "password_hash_queue_depth",
+    "Chamadas aguardando vaga no pool de hashing de senha.",
+    multiprocess_mode="livesum",
+)
+PASSWORD_HASH_WAIT = Histogram(
+    "password_hash_queue_wait_seconds",
+    "Espera por vaga no pool de hashing de senha.",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+PASSWORD_HASH_DURATION = Histogram(
+    "password_hash_duration_seconds",
+    "Tempo de hash/verificação de senha (op=hash|verify).",
+    ["op"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+
+EMAIL_OUTBOX_DELIVERIES = Counter(
+    "email_outbox_deliveries_total",
+    "Tentativas de entrega da outbox de e-mail (sent/retry/failed; deferred = não tentadas após falha de conexão).",
+    ["result"],
+)
+
+RATE_LIMIT_REJECTIONS = Counter(
+    "rate_limit_rejections_total",
+    "Requisições recusadas com 429 por regra (rota:dimensão).",
+    ["rule"],
+)
+
+USER_CACHE_LOOKUPS = Counter(
+    "auth_user_cache_lookups_total",
+    "Resolução do usuário autenticado (hit/miss do cache, claims do JWT).",
+    ["result"],
+)
+
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out_connections",
+    "Conexões do pool SQLAlchemy em uso.",
+    multiprocess_mode="livesum",
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow_connections",
+    "Conexões abertas além do pool_size (overflow).",
+    multiprocess_mode="livesum",
+)
+DB_POOL_WAIT = Histogram(
+    "db_pool_wait_seconds",
+    "Espera por uma conexão livre no checkout do pool.",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10),
+)
+DB_POOL_CHECKOUTS = Counter(
+    "db_pool_checkouts_total",
+    "Checkouts de conexão do pool (overflow=true quando acima do pool_size).",
+    ["overflow"],
+)
+DB_POOL_TIMEOUTS = Counter(
+    "db_pool_timeouts_total",
+    "Checkouts que estouraram o pool_timeout.",
+)
+DB_CHECKOUTS_PER_REQUEST = Histogram(
+    "http_request_db_checkouts",
+    "Checkouts de conexão do pool por requisição, por rota (0 = não tocou o banco).",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 10),
+)
+
+# Contador da requisição atual; a lista é compartilhada com o threadpool (contexto copiado).
+_request_checkouts: ContextVar[Optional[List[int]]] = ContextVar("request_db_checkouts", default=None)
+
+
+def instrument_pool(engine: Engine) -> None:
+    """Atualiza os gauges do pool nos eventos de checkout/checkin (sem polling)."""
+    from app.db import add_pool_wait_observer
+
+    def _update(*_args: Any) -> None:
+        # engine.pool (não uma referência fixa): o pool é recriado em engine.dispose()
+        pool = engine.pool
+        checkedout = getattr(pool, "checkedout", None)
+        overflow = getattr(pool, "overflow", None)
+        if checkedout is not None:
+            DB_POOL_CHECKED_OUT.set(checkedout())
+        if overflow is not None:
+            DB_POOL_OVERFLOW.set(max(0, overflow()))
+
+    def _checkout(*args: Any) -> None:
+        _update()
+        count_request("db_checkouts")
+        checkouts = _request_checkouts.get()
+        if checkouts is not None:
+            checkouts[0] += 1
+        overflow = getattr(engine.pool, "overflow", None)
+        DB_POOL_CHECKOUTS.labels("true" if overflow is not None and overflow() > 0 else "false").inc()
+
+    def _wait(seconds: float, timed_out: bool) -> None:
+        DB_POOL_WAIT.observe(seconds)
+        if timed_out:
+            DB_POOL_TIMEOUTS.inc()
+
+    event.listen(engine, "checkout", _checkout)
+    event.listen(engine, "checkin", _update)
+    add_pool_wait_observer(_wait)
+
+
+def observe_openai_attempts(model: str, attempts: Sequence[Dict[str, Any]]) -> None:
+    """Registra as tentativas coletadas por get_plan_from_gpt(attempts=...)."""
+    for idx, attempt in enumerate(attempts):
+        status = attempt.get("status")
+        OPENAI_REQUESTS.labels(model, str(status) if status is not None else "error").inc()
+        if attempt.get("duration_ms") is not None:
+            OPENAI_REQUEST_DURATION.labels(model).observe(attempt["duration_ms"] / 1000)
+        if idx > 0:
+            OPENAI_RETRIES.labels(model, "token_cap").inc()
+        if attempt.get("transport_retries"):
+            OPENAI_RETRIES.labels(model, "transport").inc(attempt["transport_retries"])
+        if attempt.get("finish_reason"):
+            OPENAI_FINISH_REASONS.labels(model, attempt["finish_reason"]).inc()
+        usage = attempt.get("usage") or {}
+        for kind in ("prompt_tokens", "completion_tokens"):
+            if usage.get(kind):
+                OPENAI_TOKENS.labels(model, kind.split("_", 1)[0]).inc(usage[kind])
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Texto no formato Prometheus; agrega os workers quando o modo multiprocess está ativo."""
+    if os.getenv(MULTIPROC_DIR_ENV):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead() -> None:
+    """Remove os gauges 'live' deste worker do diretório multiprocess ao encerrar."""
+    if os.getenv(MULTIPROC_DIR_ENV):
+        multiprocess.mark_process_dead(os.getpid())
+
+
+class PrometheusMiddleware:
+    """Latência por rota (template, não o path cru) e gauge de requisições em andamento."""
+
+    def __init__(self, app: ASGIApp, skip_paths: List[str] | None = None) -> None:
+        self.app = app
+        self.skip_paths = set(skip_paths or ["/metrics"])
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope.get("path") in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope.get("method", "GET")
+        status_code = 500
+        in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        checkouts = [0]
+        checkouts_token = _request_checkouts.set(checkouts)
+        start = perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_progress.dec()
+            _request_checkouts.reset(checkouts_token)
+            # o roteador do FastAPI grava a rota encontrada no scope; evita cardinalidade por id
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUEST_DURATION.labels(method, route_path, str(status_code)).observe(perf_counter() - start)
+            DB_CHECKOUTS_PER_REQUEST.labels(method, route_path).observe(checkouts[0])
@@ -0,0 +1,172 @@
+"""
+Hash/verificação de senha fora do threadpool do servidor.
+
+PBKDF2 é lento de propósito; rodando inline, um pico de logins ocupa as
+threads que atendem todas as rotas. Aqui o trabalho vai para um pool de
+processos dedicado e limitado: no máximo workers + fila em andamento, e quem
+esperar mais que PASSWORD_HASH_QUEUE_TIMEOUT recebe PasswordHasherBusy (503).
+As rotas de login/cadastro usam as versões *_async, que esperam no event loop
+em vez de prender uma thread do threadpool durante o hash.
+Com PASSWORD_HASH_WORKERS=0 tudo roda inline (CLI, scripts).
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Optional, Tuple, TypeVar
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.metrics import PASSWORD_HASH_DURATION, PASSWORD_HASH_QUEUE, PASSWORD_HASH_WAIT
+
+_logger = logging.getLogger(__name__)
+
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(2, os.cpu_count() or 1))))
+PASSWORD_HASH_QUEUE_SIZE = int(os.getenv("PASSWORD_HASH_QUEUE_SIZE", "32"))
+PASSWORD_HASH_QUEUE_TIMEOUT = float(os.getenv("PASSWORD_HASH_QUEUE_TIMEOUT", "5"))
+_SLOT_POLL_SECONDS = 0.02
+
+T = TypeVar("T")
+
+
+class PasswordHasherBusy(RuntimeError):
+    """Fila de hashing cheia por mais tempo que o limite configurado."""
+
+
+# --- executados no processo filho (funções de módulo para serem picklable) ---
+def _hash(password: str) -> str:
+    from app.security import pwd_context
+
+    return pwd_context.hash(password)
+
+
+def _verify_and_update(password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    from app.security import pwd_context
+
+    # verify_and_update devolve um novo hash quando needs_update() (esquema/rounds mudaram)
+    return pwd_context.verify_and_update(password, hashed)
+
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(max(1, PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE_SIZE))
+
+
+def _start_method() -> str:
+    # forkserver: o servidor já tem threads e conexões abertas; fork direto herdaria locks.
+    # Não existe no Windows (run_project.bat), onde só há spawn.
+    return "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+def _get_executor(broken: Optional[ProcessPoolExecutor] = None) -> ProcessPoolExecutor:
+    """Pool atual, criando-o se preciso; com broken, troca esse pool (processo filho morreu)."""
+    global _executor
+    with _executor_lock:
+        if broken is not None and _executor is broken:
+            _logger.warning("Pool de hashing de senha quebrado; recriando os processos")
+            broken.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=PASSWORD_HASH_WORKERS,
+                mp_context=multiprocessing.get_context(_start_method()),
+            )
+        return _executor
+
+
+def start_password_hasher() -> None:
+    """Sobe o pool (chamado no startup, antes de outras threads existirem)."""
+    if PASSWORD_HASH_WORKERS > 0:
+        _get_executor()
+
+
+def shutdown_password_hasher() -> None:
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _submit(op: str, fn: Callable[..., T], *args) -> "Future[T]":
+    """
+    Envia ao pool; a vaga (_slots) só é devolvida quando o processo termina o trabalho,
+    ou aqui mesmo se o envio falhar. Um pool quebrado é recriado e o envio repetido uma vez.
+    """
+    try:
+        executor = _get_executor()
+        try:
+            future = executor.submit(fn, *args)
+        except BrokenProcessPool:
+            future = _get_executor(broken=executor).submit(fn, *args)
+    except BaseException:
+        _slots.release()
+        raise
+    started = time.perf_counter()
+
+    def _done(_: "Future[T]") -> None:
+        PASSWORD_HASH_DURATION.labels(op).observe(time.perf_counter() - started)
+        _slots.release()
+
+    future.add_done_callback(_done)
+    return future
+
+
+def _run(op: str, fn: Callable[..., T], *args) -> T:
+    if PASSWORD_HASH_WORKERS <= 0:
+        with PASSWORD_HASH_DURATION.labels(op).time():
+            return fn(*args)
+
+    queued_at = time.perf_counter()
+    PASSWORD_HASH_QUEUE.inc()
+    try:
+        if not _slots.acquire(timeout=PASSWORD_HASH_QUEUE_TIMEOUT):
+            raise PasswordHasherBusy("Fila de hashing de senha cheia")
+    finally:
+        PASSWORD_HASH_QUEUE.dec()
+    PASSWORD_HASH_WAIT.observe(time.perf_counter() - queued_at)
+    return _submit(op, fn, *args).result()
+
+
+async def _run_async(op: str, fn: Callable[..., T], *args) -> T:
+    """
+    Versão para rotas async: espera vaga e resultado no event loop, sem ocupar
+    uma thread do threadpool do servidor enquanto o hash roda no outro processo.
+    """
+    if PASSWORD_HASH_WORKERS <= 0:
+        return await run_in_threadpool(_run, op, fn, *args)
+
+    queued_at = time.perf_counter()
+    deadline = queued_at + PASSWORD_HASH_QUEUE_TIMEOUT
+    PASSWORD_HASH_QUEUE.inc()
+    try:
+        while not _slots.acquire(blocking=False):
+            if time.perf_counter() >= deadline:
+                raise PasswordHasherBusy("Fila de hashing de senha cheia")
+            await asyncio.sleep(_SLOT_POLL_SECONDS)
+    finally:
+        PASSWORD_HASH_QUEUE.dec()
+    PASSWORD_HASH_WAIT.observe(time.perf_counter() - queued_at)
+    return await asyncio.wrap_future(_submit(op, fn, *args))
+
+
+def hash_password(password: str) -> str:
+    return _run("hash", _hash, password)
+
+
+def verify_and_update(password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    return _run("verify", _verify_and_update, password, hashed)
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_async("hash", _hash, password)
+
+
+async def verify_and_update_async(password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    return await _run_async("verify", _verify_and_update, password, hashed)
@@ -0,0 +1,145 @@
+"""
+Rate limit por token bucket para as rotas de autenticação.
+
+Os buckets ficam num arquivo mapeado em memória (mmap) compartilhado pelos
+workers do uvicorn: tabela de hash de tamanho fixo, slots de 24 bytes
+(hash da chave, tokens, último refill) e um flock em volta da leitura e da
+escrita. O refill é contínuo, então a janela desliza em vez de zerar a cada
+minuto. Quando a tabela enche, o slot menos recente da vizinhança é
+reaproveitado (o bucket volta cheio, então o erro é sempre a favor do
+cliente).
+"""
+from __future__ import annotations
+
+import hashlib
+import math
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, Optional
+
+try:
+    import fcntl  # type: ignore
+except ImportError:  # Windows: só exclusão entre threads do mesmo processo
+    fcntl = None  # type: ignore
+
+from app.core.metrics import RATE_LIMIT_REJECTIONS
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1").lower() in ("1", "true", "yes")
+RATE_LIMIT_FILE = os.getenv("RATE_LIMIT_FILE") or os.path.join(tempfile.gettempdir(), "projeto_ia_rate_limit.bin")
+RATE_LIMIT_SLOTS = int(os.getenv("RATE_LIMIT_SLOTS", "16384"))
+
+_SLOT = struct.Struct("<Qdd")
+_PROBES = 8
+
+
+@dataclass(frozen=True)
+class RateRule:
+    capacity: float  # rajada máxima
+    per_seconds: float  # tempo para recarregar a capacidade inteira
+
+    @property
+    def refill_rate(self) -> float:
+        return self.capacity / self.per_seconds
+
+
+# (rota, dimensão) -> regra
+RULES: Dict[str, RateRule] = {
+    "login:ip": RateRule(capacity=20, per_seconds=60),
+    "login:email": RateRule(capacity=5, per_seconds=60),
+    "register:ip": RateRule(capacity=5, per_seconds=60),
+    "forgot-password:ip": RateRule(capacity=5, per_seconds=60),
+    "forgot-password:email": RateRule(capacity=3, per_seconds=900),
+}
+
+
+class RateLimitExceeded(Exception):
+    def __init__(self, rule: str, retry_after: float) -> None:
+        super().__init__(rule)
+        self.rule = rule
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class SharedTokenBuckets:
+    def __init__(self, path: str = RATE_LIMIT_FILE, slots: int = RATE_LIMIT_SLOTS) -> None:
+        self.slots = slots
+        size = slots * _SLOT.size
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(self._fd).st_size < size:
+            os.ftruncate(self._fd, size)
+        self._mm = mmap.mmap(self._fd, size)
+        # flock é por descrição de arquivo: threads do mesmo processo precisam do Lock também
+        self._thread_lock = threading.Lock()
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        with self._thread_lock:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def take(self, key: str, rule: RateRule, now: Optional[float] = None) -> float:
+        """Consome um token. Retorna 0 se permitido, senão os segundos até o próximo token."""
+        now = time.time() if now is None else now
+        key_hash = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little") or 1
+        start = key_hash % self.slots
+        with self._locked():
+            offset = None
+            tokens = rule.capacity
+            last = now
+            oldest_offset, oldest_ts = None, math.inf
+            for probe in range(_PROBES):
+                slot_offset = ((start + probe) % self.slots) * _SLOT.size
+                slot_hash, slot_tokens, slot_ts = _SLOT.unpack_from(self._mm, slot_offset)
+                if slot_hash == key_hash:
+                    offset, tokens, last = slot_offset, slot_tokens, slot_ts
+                    break
+                if slot_ts < oldest_ts:  # slot vazio tem ts 0, então é escolhido primeiro
+                    oldest_offset, oldest_ts = slot_offset, slot_ts
+            if offset is None:
+                offset = oldest_offset
+
+            tokens = min(rule.capacity, tokens + max(0.0, now - last) * rule.refill_rate)
+            if tokens >= 1:
+                _SLOT.pack_into(self._mm, offset, key_hash, tokens - 1, now)
+                return 0.0
+            _SLOT.pack_into(self._mm, offset, key_hash, tokens, now)
+            return (1 - tokens) / rule.refill_rate
+
+
+_buckets: Optional[SharedTokenBuckets] = None
+_buckets_lock = threading.Lock()
+
+
+def _get_buckets() -> SharedTokenBuckets:
+    global _buckets
+    if _buckets is None:
+        with _buckets_lock:
+            if _buckets is None:
+                _buckets = SharedTokenBuckets()
+    return _buckets
+
+
+def enforce(route: str, *, ip: Optional[str] = None, email: Optional[str] = None) -> None:
+    """Aplica as regras da rota para IP e e-mail; levanta RateLimitExceeded (429)."""
+    if not RATE_LIMIT_ENABLED:
+        return
+    buckets = _get_buckets()
+    for dimension, value in (("ip", ip), ("email", email.strip().lower() if email else None)):
+        name = f"{route}:{dimension}"
+        rule = RULES.get(name)
+        if rule is None or not value:
+            continue
+        retry_after = buckets.take(f"{name}:{value}", rule)
+        if retry_after > 0:
+            RATE_LIMIT_REJECTIONS.labels(name).inc()
+            raise RateLimitExceeded(name, retry_after)
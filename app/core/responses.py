@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+from datetime import date, datetime
+from typing import Any, BinaryIO, List, Mapping, Optional, Tuple
+from uuid import UUID
+
+import anyio
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from app.core.http_cache import match_etag
+
+try:
+    # orjson serializa dict/list/datetime/UUID em C direto para bytes
+    import orjson  # type: ignore
+except ImportError:  # pragma: no cover - fallback para ambientes sem orjson
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Serializa o conteúdo para bytes JSON usando orjson quando disponível."""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+        default=_default,
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Resposta JSON padrão da API. Aceita dicts/listas com datetime e UUID
+    sem precisar passar por jsonable_encoder/Pydantic.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeNotSatisfiable(ValueError):
+    pass
+
+
+def parse_range(value: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Intervalo (início, fim inclusivo) do header Range, ou None para enviar o arquivo
+    inteiro (sem Range, sintaxe inválida ou vários intervalos, como a RFC 9110 permite).
+    """
+    if not value:
+        return None
+    match = _RANGE_RE.match(value.strip())
+    if not match or match.group(1) == match.group(2) == "":
+        return None
+    first, last = match.groups()
+    if first == "":
+        # sufixo: últimos N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise RangeNotSatisfiable(value)
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if last and end < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable(value)
+    return start, min(end, size - 1)
+
+
+class RangeFileResponse(Response):
+    """
+    Arquivo imutável do disco com ETag, If-None-Match (304), Range/If-Range (206/416) e HEAD.
+    Recebe o arquivo já aberto, então uma evicção do cache no meio do envio não o afeta.
+    O envio normal lê blocos (seek + read) numa thread, o que funciona também no Windows.
+    Se o servidor ASGI anunciar a extensão http.response.zerocopysend (sendfile), ela é
+    usada; o uvicorn deste projeto não anuncia, então esse caminho não roda aqui.
+    """
+
+    chunk_size = 64 * 1024
+
+    def __init__(
+        self,
+        file: BinaryIO,
+        *,
+        media_type: str,
+        etag: str,
+        headers: Optional[Mapping[str, str]] = None,
+    ) -> None:
+        self.file = file
+        self.media_type = media_type
+        self.etag = etag
+        self.status_code = 200
+        self.background = None
+        self.init_headers(headers)
+
+    def _headers(self, extra: Mapping[str, str]) -> List[Tuple[bytes, bytes]]:
+        raw = list(self.raw_headers)
+        raw.append((b"etag", self.etag.encode("latin-1")))
+        raw.append((b"accept-ranges", b"bytes"))
+        raw.extend((k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in extra.items())
+        return raw
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await self._send(scope, send)
+        finally:
+            self.file.close()
+
+    async def _send(self, scope: Scope, send: Send) -> None:
+        request_headers = Headers(scope=scope)
+        size = os.fstat(self.file.fileno()).st_size
+
+        if match_etag(request_headers.get("if-none-match"), self.etag):
+            await send({"type": "http.response.start", "status": 304, "headers": self._headers({})})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        if_range = request_headers.get("if-range")
+        range_header = request_headers.get("range") if if_range in (None, self.etag) else None
+        try:
+            byte_range = parse_range(range_header, size)
+        except RangeNotSatisfiable:
+            headers = self._headers({"content-range": f"bytes */{size}", "content-length": "0"})
+            await send({"type": "http.response.start", "status": 416, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        if byte_range is None:
+            status, start, length, extra = 200, 0, size, {}
+        else:
+            start, end = byte_range
+            status, length = 206, end - start + 1
+            extra = {"content-range": f"bytes {start}-{end}/{size}"}
+        extra["content-length"] = str(length)
+        await send({"type": "http.response.start", "status": status, "headers": self._headers(extra)})
+
+        if scope.get("method") == "HEAD" or length == 0:
+            await send({"type": "http.response.body", "body": b""})
+            return
+        if "http.response.zerocopysend" in scope.get("extensions", {}):
+            await send({"type": "http.response.zerocopysend", "file": self.file.fileno(), "offset": start, "count": length})
+            return
+
+        await anyio.to_thread.run_sync(self.file.seek, start)
+        remaining = length
+        while remaining > 0:
+            chunk = await anyio.to_thread.run_sync(self.file.read, min(self.chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        if remaining > 0:
+            await send({"type": "http.response.body", "body": b""})
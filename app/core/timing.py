@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sys
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Any, Dict, Iterator, List, Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+_logger = logging.getLogger("app.timing")
+
+# Nível da linha JSON por requisição ("off" desliga). O uvicorn só configura os loggers uvicorn.*.
+TIMING_LOG_LEVEL = os.getenv("TIMING_LOG_LEVEL", "INFO").upper()
+
+
+def configure_timing_log() -> None:
+    """Handler próprio para app.timing (stdout, só a mensagem JSON); chamado no startup."""
+    if TIMING_LOG_LEVEL == "OFF":
+        _logger.disabled = True
+        return
+    _logger.setLevel(TIMING_LOG_LEVEL)
+    if not _logger.handlers:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        _logger.addHandler(handler)
+    # se a aplicação configurar o root logger, a linha não sai duplicada
+    _logger.propagate = False
+
+
+class RequestTimings:
+    """Spans coletados durante uma requisição (ver ServerTimingMiddleware)."""
+
+    def __init__(self) -> None:
+        self.spans: List[Dict[str, Any]] = []
+        self.attrs: Dict[str, Any] = {}
+
+    def add(self, name: str, duration_ms: float, desc: Optional[str] = None, **attrs: Any) -> None:
+        self.spans.append({"name": name, "dur_ms": round(duration_ms, 2), "desc": desc, **attrs})
+
+    def header_value(self) -> str:
+        parts = []
+        for item in self.spans:
+            part = f"{item['name']};dur={item['dur_ms']:.1f}"
+            if item["desc"]:
+                part += f';desc="{item["desc"]}"'
+            parts.append(part)
+        return ", ".join(parts)
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+@contextmanager
+def timing_span(name: str, desc: Optional[str] = None, **attrs: Any) -> Iterator[None]:
+    """Mede o bloco e registra o span na requisição atual (no-op fora de requisições)."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, (perf_counter() - start) * 1000, desc, **attrs)
+
+
+def record_span(name: str, duration_ms: float, desc: Optional[str] = None, **attrs: Any) -> None:
+    """Registra um span já medido externamente (ex.: tentativas da OpenAI)."""
+    timings = _current.get()
+    if timings is not None:
+        timings.add(name, duration_ms, desc, **attrs)
+
+
+def annotate_request(**attrs: Any) -> None:
+    """Adiciona campos extras à linha de log estruturada da requisição."""
+    timings = _current.get()
+    if timings is not None:
+        timings.attrs.update(attrs)
+
+
+def count_request(name: str, amount: int = 1) -> None:
+    """Incrementa um contador na linha de log da requisição (ex.: db_checkouts)."""
+    timings = _current.get()
+    if timings is not None:
+        timings.attrs[name] = timings.attrs.get(name, 0) + amount
+
+
+class ServerTimingMiddleware:
+    """
+    Expõe os spans no header Server-Timing e emite uma linha de log JSON
+    por requisição que registrou algum span ou atributo.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        start = perf_counter()
+        status_code: Optional[int] = None
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if timings.spans:
+                    total_ms = (perf_counter() - start) * 1000
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", f"{timings.header_value()}, total;dur={total_ms:.1f}")
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            if timings.spans or timings.attrs:
+                _logger.info(
+                    json.dumps(
+                        {
+                            "method": scope.get("method"),
+                            "path": scope.get("path"),
+                            "status": status_code,
+                            "total_ms": round((perf_counter() - start) * 1000, 2),
+                            "spans": timings.spans,
+                            **timings.attrs,
+                        },
+                        ensure_ascii=False,
+                        default=str,
+                    )
+                )
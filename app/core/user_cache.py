@@ -0,0 +1,89 @@
+"""
+Cache em processo do usuário autenticado (get_current_user).
+
+Evita o SELECT por chave primária a cada requisição autenticada: guarda um
+snapshot imutável do usuário por (user_id, token), com TTL curto e tamanho
+máximo. update_user_password invalida as entradas do usuário neste processo;
+nos demais workers elas expiram pelo TTL.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.metrics import USER_CACHE_LOOKUPS
+
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "4096"))
+# Rotas só de leitura (get_current_user_readonly) podem confiar nos claims do JWT, sem consultar o banco.
+AUTH_TRUST_JWT_CLAIMS = os.getenv("AUTH_TRUST_JWT_CLAIMS", "0").lower() in ("1", "true", "yes")
+
+
+@dataclass(frozen=True)
+class AuthenticatedUser:
+    """Snapshot somente-leitura do usuário; compartilhado entre threads."""
+
+    id: int
+    email: str
+    username: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+    @classmethod
+    def from_model(cls, user: Any) -> "AuthenticatedUser":
+        return cls(id=user.id, email=user.email, username=user.username, created_at=user.created_at)
+
+    @classmethod
+    def from_claims(cls, payload: Dict[str, Any]) -> Optional["AuthenticatedUser"]:
+        email = payload.get("email")
+        if not email:
+            return None
+        return cls(id=int(payload["sub"]), email=email, username=payload.get("name"))
+
+
+_entries: "OrderedDict[Tuple[int, str], Tuple[float, AuthenticatedUser]]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def get_cached_user(user_id: int, token: str) -> Optional[AuthenticatedUser]:
+    key = (user_id, token)
+    now = time.monotonic()
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None and entry[0] > now:
+            _entries.move_to_end(key)
+            USER_CACHE_LOOKUPS.labels("hit").inc()
+            return entry[1]
+        if entry is not None:
+            del _entries[key]
+    USER_CACHE_LOOKUPS.labels("miss").inc()
+    return None
+
+
+def cache_user(token: str, user: AuthenticatedUser) -> None:
+    if USER_CACHE_TTL_SECONDS <= 0:
+        return
+    with _lock:
+        _entries[(user.id, token)] = (time.monotonic() + USER_CACHE_TTL_SECONDS, user)
+        _entries.move_to_end((user.id, token))
+        while len(_entries) > USER_CACHE_MAX_ENTRIES:
+            _entries.popitem(last=False)
+
+
+def invalidate_user(user_id: int) -> None:
+    with _lock:
+        for key in [k for k in _entries if k[0] == user_id]:
+            del _entries[key]
+
+
+def user_from_claims(payload: Dict[str, Any]) -> Optional[AuthenticatedUser]:
+    if not AUTH_TRUST_JWT_CLAIMS:
+        return None
+    user = AuthenticatedUser.from_claims(payload)
+    if user is not None:
+        USER_CACHE_LOOKUPS.labels("claims").inc()
+    return user
@@ -1,9 +1,13 @@
-from typing import List, Optional, Sequence, Tuple
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from uuid import uuid4
 
-from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import Row, func, insert, text
+from sqlalchemy.orm import Session, defer, selectinload
 
 from app.models.plan import Plan
 from app.models.card import Card
+from app.services.payload_store import put_payload, task_paths_by_identity
 
 
 def create_plan(
@@ -47,7 +51,10 @@ def create_plan_with_cards(
     version: int,
     raw_response: dict,
     cards_payload: Sequence[dict],
-) -> Tuple[Plan, List[Card]]:
+) -> Tuple[Plan, List[Row]]:
+    # O JSON da IA é gravado uma vez em plan_payloads; raw_response/data ficam NULL
+    # e as respostas da API os reconstroem a partir do payload.
+    digest = put_payload(db, raw_response)
     plan = Plan(
         user_id=user_id,
         plan_title=plan_title,
@@ -56,49 +63,120 @@ def create_plan_with_cards(
         perfil_label=perfil_label,
         semanas=semanas,
         version=version,
-        raw_response=raw_response,
-        data=raw_response,  # legacy compatibility
+        payload_hash=digest,
     )
     db.add(plan)
     db.flush()
 
-    card_models: List[Card] = []
-    for card in cards_payload:
-        card_model = Card(
-            plan_id=plan.id,
-            source_id=card.get("id"),
-            title=card.get("title") or "Tarefa",
-            description=card.get("description"),
-            instructions=card.get("instructions"),
-            stage_suggestion=card.get("stage_suggestion"),
-            column_key=card.get("column_key") or "novo",
-            order=card.get("order"),
-            type=card.get("type"),
-            needs_review=bool(card.get("needs_review")),
-            review_after_days=card.get("review_after_days"),
-            effort_minutes=card.get("effort_minutes"),
-            week=card.get("week"),
-            depends_on=card.get("depends_on") or [],
-            notes=card.get("notes"),
-            raw=card.get("raw") or {},
-        )
-        db.add(card_model)
-        card_models.append(card_model)
+    card_rows = insert_plan_cards(
+        db,
+        plan_id=plan.id,
+        cards_payload=cards_payload,
+        raw_paths=task_paths_by_identity(raw_response),
+    )
 
     db.commit()
     db.refresh(plan)
-    for model in card_models:
-        db.refresh(model)
-    return plan, card_models
+    return plan, card_rows
 
 
-def list_user_plans(db: Session, *, user_id: int) -> List[Plan]:
-    return (
-        db.query(Plan)
-        .filter(Plan.user_id == user_id)
-        .order_by(Plan.id.desc())
+def _card_row(plan_id: int, card: dict, raw_paths: Optional[Dict[int, List[int]]] = None) -> Dict[str, Any]:
+    """
+    Colunas da tabela cards a partir do dict de transformed_card_to_dict.
+    Se a tarefa do card estiver em raw_paths, grava só o caminho e deixa raw vazio.
+    """
+    raw = card.get("raw") or {}
+    raw_path = raw_paths.get(id(raw)) if raw_paths else None
+    return {
+        "id": uuid4(),
+        "plan_id": plan_id,
+        "source_id": card.get("id"),
+        "title": card.get("title") or "Tarefa",
+        "description": card.get("description"),
+        "instructions": card.get("instructions"),
+        "stage_suggestion": card.get("stage_suggestion"),
+        "column_key": card.get("column_key") or "novo",
+        "order": card.get("order"),
+        "type": card.get("type"),
+        "needs_review": bool(card.get("needs_review")),
+        "review_after_days": card.get("review_after_days"),
+        "effort_minutes": card.get("effort_minutes"),
+        "week": card.get("week"),
+        "depends_on": card.get("depends_on") or [],
+        "notes": card.get("notes"),
+        "raw": {} if raw_path else raw,
+        "raw_path": raw_path,
+    }
+
+
+def insert_plan_cards(
+    db: Session,
+    *,
+    plan_id: int,
+    cards_payload: Sequence[dict],
+    raw_paths: Optional[Dict[int, List[int]]] = None,
+) -> List[Row]:
+    """
+    Insere todos os cards com INSERT ... VALUES (...), (...) RETURNING (insertmanyvalues
+    do SQLAlchemy 2), trazendo UUIDs e defaults do servidor sem um SELECT por card.
+    Não faz commit. As linhas retornadas não expiram no commit e têm os mesmos
+    atributos de Card (card.title, card.order, ...).
+    """
+    if not cards_payload:
+        return []
+    table = Card.__table__
+    statement = insert(table).returning(*table.c, sort_by_parameter_order=True)
+    return list(db.execute(statement, [_card_row(plan_id, card, raw_paths) for card in cards_payload]))
+
+
+def list_user_plans(
+    db: Session,
+    *,
+    user_id: int,
+    limit: int | None = None,
+    before_id: int | None = None,
+    include_payload: bool = True,
+) -> List[Plan]:
+    """
+    Lista os planos do usuário do mais novo para o mais antigo.
+    Paginação por keyset: before_id é o menor id da página anterior.
+    include_payload=False não traz data/raw_response do banco (JSONB grandes).
+    """
+    query = db.query(Plan).filter(Plan.user_id == user_id)
+    if before_id is not None:
+        query = query.filter(Plan.id < before_id)
+    if not include_payload:
+        query = query.options(defer(Plan.data, raiseload=True), defer(Plan.raw_response, raiseload=True))
+    query = query.order_by(Plan.id.desc())
+    if limit is not None:
+        query = query.limit(limit)
+    return query.all()
+
+
+def get_plans_card_stats(db: Session, *, plan_ids: Sequence[int]) -> Dict[int, Dict[str, Any]]:
+    """Agrega no banco os cards por coluna e o esforço total (minutos) de cada plano."""
+    stats: Dict[int, Dict[str, Any]] = {
+        plan_id: {"cards_total": 0, "cards_by_column": {}, "effort_minutes_total": 0} for plan_id in plan_ids
+    }
+    if not plan_ids:
+        return stats
+    rows = (
+        db.query(
+            Card.plan_id,
+            Card.column_key,
+            func.count(Card.id),
+            func.coalesce(func.sum(Card.effort_minutes), 0),
+        )
+        .filter(Card.plan_id.in_(plan_ids))
+        .group_by(Card.plan_id, Card.column_key)
         .all()
     )
+    for plan_id, column_key, count, effort in rows:
+        entry = stats[plan_id]
+        entry["cards_by_column"][column_key or "novo"] = int(count)
+        entry["cards_total"] += int(count)
+        entry["effort_minutes_total"] += int(effort)
+    return stats
 
 
 def get_user_plan(db: Session, *, user_id: int, plan_id: int, include_cards: bool = False) -> Optional[Plan]:
@@ -108,6 +186,25 @@ def get_user_plan(db: Session, *, user_id: int, plan_id: int, include_cards: boo
     return query.first()
 
 
+def get_user_plan_version(
+    db: Session, *, user_id: int, plan_id: int
+) -> Optional[Tuple[Optional[datetime], Optional[datetime], int]]:
+    """
+    Retorna (plan.updated_at, max(cards.updated_at), total de cards) sem carregar JSONB.
+    Usa os índices de plans.id e cards.plan_id; None quando o plano não pertence ao usuário.
+    """
+    row = (
+        db.query(Plan.updated_at, func.max(Card.updated_at), func.count(Card.id))
+        .outerjoin(Card, Card.plan_id == Plan.id)
+        .filter(Plan.user_id == user_id, Plan.id == plan_id)
+        .group_by(Plan.id)
+        .first()
+    )
+    if row is None:
+        return None
+    return row[0], row[1], int(row[2] or 0)
+
+
 def get_plan_card_by_identifier(db: Session, *, plan_id: int, card_identifier: str) -> Optional[Card]:
     """
     Localiza o card pelo source_id (id lógico vindo da IA) ou pelo UUID real.
@@ -133,3 +230,121 @@ def list_cards(db: Session, *, plan_id: int) -> List[Card]:
         .order_by(Card.order.asc().nullsfirst(), Card.created_at.asc())
         .all()
     )
+
+
+def user_owns_plan(db: Session, *, user_id: int, plan_id: int) -> bool:
+    return (
+        db.query(Plan.id).filter(Plan.user_id == user_id, Plan.id == plan_id).first()
+        is not None
+    )
+
+
+class AmbiguousCardChange(ValueError):
+    """Mudança cujo card_id casa com mais de um card do plano (id da IA repetido entre semanas)."""
+
+    def __init__(self, card_ids: Sequence[str]):
+        super().__init__(f"card_id ambíguo: {', '.join(card_ids)}")
+        self.card_ids = list(card_ids)
+
+
+def bulk_update_cards(
+    db: Session,
+    *,
+    user_id: int,
+    plan_id: int,
+    changes: Sequence[dict],
+) -> List[Dict[str, Any]]:
+    """
+    Aplica várias alterações (column_key, notes, order) em um único
+    UPDATE ... FROM (VALUES ...) com checagem de dono do plano no mesmo comando.
+    Campos None mantêm o valor atual. Cada change é {"card_id", "column_key", "notes", "order", "week"};
+    card_id aceita o source_id (id da IA) ou o UUID do card. Ids da IA como "task-1" se
+    repetem entre semanas: com "week" só o card daquela semana é alterado; se o id for
+    único no plano a semana é ignorada (cards com week NULL, que o front envia como 1).
+    As mudanças são mescladas pelo card resolvido (campo a campo, a última vence), então
+    ("task-1", sem semana) e ("task-1", semana 2) não disputam a mesma linha.
+    Se alguma mudança casar com mais de um card nada é gravado e sobe AmbiguousCardChange.
+    Retorna, por mudança aplicada, [{"card_id", "week", "id", "source_id", "updated_at"}].
+    """
+    if not changes:
+        return []
+
+    params: Dict[str, Any] = {"plan_id": plan_id, "user_id": user_id}
+    values_sql = []
+    for idx, change in enumerate(changes):
+        values_sql.append(
+            f"({idx}, CAST(:card_id_{idx} AS varchar), CAST(:column_key_{idx} AS varchar), "
+            f"CAST(:notes_{idx} AS text), CAST(:order_{idx} AS integer), CAST(:week_{idx} AS integer))"
+        )
+        params[f"card_id_{idx}"] = change["card_id"]
+        params[f"column_key_{idx}"] = change.get("column_key")
+        params[f"notes_{idx}"] = change.get("notes")
+        params[f"order_{idx}"] = change.get("order")
+        params[f"week_{idx}"] = change.get("week")
+
+    statement = text(
+        f"""
+        WITH v(idx, card_id, column_key, notes, ord, week) AS (VALUES {", ".join(values_sql)}),
+        matched AS (
+            SELECT v.*, c.id AS target_id, count(*) OVER (PARTITION BY v.idx) AS matches
+            FROM v
+            JOIN plans AS p ON p.id = :plan_id AND p.user_id = :user_id
+            JOIN cards AS c ON c.plan_id = p.id
+             AND (
+                 CAST(c.id AS text) = v.card_id
+                 OR (
+                     c.source_id = v.card_id
+                     AND (
+                         v.week IS NULL
+                         OR c.week IS NOT DISTINCT FROM v.week
+                         -- id único no plano: a semana não importa (o front manda week ?? 1)
+                         OR NOT EXISTS (
+                             SELECT 1 FROM cards AS o
+                             WHERE o.plan_id = c.plan_id AND o.source_id = c.source_id AND o.id <> c.id
+                         )
+                     )
+                 )
+             )
+        ),
+        merged AS (
+            SELECT target_id,
+                   (array_agg(column_key ORDER BY idx DESC) FILTER (WHERE column_key IS NOT NULL))[1] AS column_key,
+                   (array_agg(notes ORDER BY idx DESC) FILTER (WHERE notes IS NOT NULL))[1] AS notes,
+                   (array_agg(ord ORDER BY idx DESC) FILTER (WHERE ord IS NOT NULL))[1] AS ord,
+                   array_agg(idx ORDER BY idx) AS idxs
+            FROM matched
+            WHERE matches = 1
+            GROUP BY target_id
+        ),
+        updated AS (
+            UPDATE cards AS c
+            SET column_key = COALESCE(m.column_key, c.column_key),
+                notes = COALESCE(m.notes, c.notes),
+                "order" = COALESCE(m.ord, c."order"),
+                updated_at = clock_timestamp()
+            FROM merged AS m
+            WHERE c.id = m.target_id
+            RETURNING m.idxs, c.id, c.source_id, c.updated_at
+        )
+        SELECT idxs, id, source_id, updated_at FROM updated
+        UNION ALL
+        SELECT DISTINCT ARRAY[idx], NULL, NULL, NULL FROM matched WHERE matches > 1
+        """
+    )
+    rows = db.execute(statement, params).all()
+    ambiguous = [changes[row[0][0]]["card_id"] for row in rows if row[1] is None]
+    if ambiguous:
+        db.rollback()
+        raise AmbiguousCardChange(ambiguous)
+    db.commit()
+    return [
+        {
+            "card_id": changes[idx]["card_id"],
+            "week": changes[idx].get("week"),
+            "id": row[1],
+            "source_id": row[2],
+            "updated_at": row[3],
+        }
+        for row in rows
+        for idx in row[0]
+    ]
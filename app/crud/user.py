@@ -1,9 +1,16 @@
 from typing import Optional
 
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
+from app.core.user_cache import invalidate_user
 from app.models.user import User
-from app.security import verify_password, hash_password
+from app.security import (
+    hash_password,
+    hash_password_async,
+    verify_and_update_password,
+    verify_and_update_password_async,
+)
 
 
 def get_user(db: Session, user_id: int) -> Optional[User]:
@@ -15,26 +22,57 @@ def get_user_by_email(db: Session, email: str) -> Optional[User]:
 
 
 def create_user(db: Session, *, email: str, password: str, name: str | None = None) -> User:
-    user = User(email=email, username=name, hashed_password=hash_password(password))
+    return create_user_with_hash(db, email=email, hashed_password=hash_password(password), name=name)
+
+
+def create_user_with_hash(db: Session, *, email: str, hashed_password: str, name: str | None = None) -> User:
+    user = User(email=email, username=name, hashed_password=hashed_password)
     db.add(user)
     db.commit()
     db.refresh(user)
     return user
 
 
+async def create_user_async(db: Session, *, email: str, password: str, name: str | None = None) -> User:
+    """Para rotas async: o hash roda no pool de processos, o banco no threadpool."""
+    hashed = await hash_password_async(password)
+    return await run_in_threadpool(create_user_with_hash, db, email=email, hashed_password=hashed, name=name)
+
+
 def authenticate_user(db: Session, *, email: str, password: str) -> Optional[User]:
     user = get_user_by_email(db, email)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    valid, new_hash = verify_and_update_password(password, user.hashed_password)
+    if not valid:
         return None
+    if new_hash:
+        # rehash transparente quando o esquema/rounds do pwd_context mudam
+        _set_password_hash(db, user.id, new_hash)
     return user
 
 
+def _set_password_hash(db: Session, user_id: int, new_hash: str) -> None:
+    db.query(User).filter(User.id == user_id).update({"hashed_password": new_hash})
+    db.commit()
+
+
+async def verify_user_password_async(db: Session, user: User, password: str) -> bool:
+    """
+    Parte de authenticate_user para rotas async (o usuário já foi carregado pela rota):
+    a verificação roda no pool de processos e só o rehash usa o threadpool.
+    """
+    valid, new_hash = await verify_and_update_password_async(password, user.hashed_password)
+    if valid and new_hash:
+        await run_in_threadpool(_set_password_hash, db, user.id, new_hash)
+    return valid
+
+
 def update_user_password(db: Session, user: User, new_password: str) -> User:
     """Atualiza a senha aplicando o mesmo hashing usado no cadastro/login."""
     user.hashed_password = hash_password(new_password)
     db.add(user)
     db.commit()
+    invalidate_user(user.id)
     db.refresh(user)
     return user
@@ -1,9 +1,13 @@
 import os
 import importlib
-from typing import Optional
+import time
+from typing import Callable, List, Optional
 
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool
 
 try:
     # Carrega variáveis do .env automaticamente para melhor DX
@@ -39,9 +43,103 @@ def _build_database_url() -> str:
 
 DATABASE_URL: str = _build_database_url()
 
+# Pool de conexões (por processo; com N workers o Postgres vê N * (size + overflow)).
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_WARMUP = int(os.getenv("DB_POOL_WARMUP", str(DB_POOL_SIZE)))
+# Limite por statement no servidor (ms); 0 desativa.
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "15000"))
+
+# Callbacks (segundos de espera, estourou o timeout?) chamados a cada checkout do pool.
+_pool_wait_observers: List[Callable[[float, bool], None]] = []
+
+
+def add_pool_wait_observer(observer: Callable[[float, bool], None]) -> None:
+    _pool_wait_observers.append(observer)
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool que mede quanto tempo cada checkout esperou por uma conexão livre."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            timed_out = True
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            for observer in _pool_wait_observers:
+                observer(waited, timed_out)
+
+
+def _connect_args() -> dict:
+    if DB_STATEMENT_TIMEOUT_MS <= 0:
+        return {}
+    return {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+
+
 engine = create_engine(
     DATABASE_URL,
+    poolclass=TimedQueuePool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
     pool_pre_ping=True,
+    connect_args=_connect_args(),
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+class LazySession:
+    """
+    Proxy de Session criado só no primeiro uso (get_db). Requisições que não tocam o
+    banco (ex.: predict-plan anônimo) não fazem checkout no pool; auth e handler
+    compartilham a mesma instância pela cache de dependências do FastAPI.
+    """
+
+    __slots__ = ("_factory", "_session")
+
+    def __init__(self, factory: Callable[[], Session] = SessionLocal) -> None:
+        self._factory = factory
+        self._session: Optional[Session] = None
+
+    @property
+    def started(self) -> bool:
+        return self._session is not None
+
+    def __getattr__(self, name: str):
+        if self._session is None:
+            self._session = self._factory()
+        return getattr(self._session, name)
+
+    def release(self) -> None:
+        """
+        Devolve a conexão ao pool antes de trabalho longo fora do banco. Os objetos já
+        carregados continuam legíveis (detached); um novo uso abre outra sessão.
+        """
+        self.close()
+
+    def close(self) -> None:
+        if self._session is not None:
+            session, self._session = self._session, None
+            session.close()
+
+
+def warm_up_pool(target: Engine = engine, size: Optional[int] = None) -> int:
+    """Abre as conexões do pool no startup, para o primeiro pico não pagar o handshake."""
+    wanted = DB_POOL_WARMUP if size is None else size
+    conns = []
+    try:
+        for _ in range(max(0, min(wanted, DB_POOL_SIZE))):
+            conns.append(target.connect())
+    finally:
+        for conn in conns:
+            conn.close()
+    return len(conns)
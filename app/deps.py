@@ -4,7 +4,8 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 
-from app.db import SessionLocal
+from app.core.user_cache import AuthenticatedUser, cache_user, get_cached_user, user_from_claims
+from app.db import LazySession
 from app.crud.user import get_user
 from app.security import decode_token
 
@@ -13,29 +14,63 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login", auto_error=F
 
 
 def get_db():
-    db = SessionLocal()
+    # Só conecta no primeiro uso; a mesma instância chega à auth e ao handler.
+    db = LazySession()
     try:
         yield db
     finally:
         db.close()
 
 
-def get_current_user(
-    token: str = Depends(OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")),
-    db: Session = Depends(get_db),
-):
+def _resolve_user(
+    db: Session, token: str, payload: dict, *, trust_claims: bool = False
+) -> Optional[AuthenticatedUser]:
+    """Claims do JWT (só rotas de leitura, se habilitado) -> cache em processo -> SELECT por id."""
+    if trust_claims:
+        claims_user = user_from_claims(payload)
+        if claims_user is not None:
+            return claims_user
+    user_id = int(payload.get("sub"))
+    cached = get_cached_user(user_id, token)
+    if cached is not None:
+        return cached
+    user = get_user(db, user_id)
+    if user is None:
+        return None
+    snapshot = AuthenticatedUser.from_model(user)
+    cache_user(token, snapshot)
+    return snapshot
+
+
+def _require_user(db: Session, token: str, *, trust_claims: bool) -> AuthenticatedUser:
     try:
         payload = decode_token(token)
-        user_id = int(payload.get("sub"))
+        int(payload.get("sub"))
     except Exception:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token inválido")
 
-    user = get_user(db, user_id)
+    user = _resolve_user(db, token, payload, trust_claims=trust_claims)
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Usuário não encontrado")
     return user
 
 
+def get_current_user(
+    token: str = Depends(OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")),
+    db: Session = Depends(get_db),
+):
+    # escrita e dados do perfil: usuário confirmado pelo cache/banco, nunca só pelos claims
+    return _require_user(db, token, trust_claims=False)
+
+
+def get_current_user_readonly(
+    token: str = Depends(OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")),
+    db: Session = Depends(get_db),
+):
+    """Para rotas só de leitura: com AUTH_TRUST_JWT_CLAIMS=1 dispensa a consulta ao banco."""
+    return _require_user(db, token, trust_claims=True)
+
+
 def get_current_user_optional(
     token: Optional[str] = Depends(oauth2_scheme),
     db: Session = Depends(get_db),
@@ -44,8 +79,7 @@ def get_current_user_optional(
         return None
     try:
         payload = decode_token(token)
-        user_id = int(payload.get("sub"))
+        int(payload.get("sub"))
     except Exception:
         return None
-    return get_user(db, user_id)
-
+    return _resolve_user(db, token, payload)
@@ -32,9 +32,11 @@ class Card(Base):
     notes: Mapped[str | None] = mapped_column(Text, nullable=True)
 
     raw: Mapped[dict] = mapped_column(JSONB)
+    # [semana, tarefa] dentro do payload do plano; quando presente, raw fica vazio.
+    raw_path: Mapped[list[int] | None] = mapped_column(ARRAY(Integer), nullable=True)
 
     created_at: Mapped[datetime] = mapped_column(server_default=func.now())
-    updated_at: Mapped[datetime] = mapped_column(server_default=func.now(), onupdate=func.now())
+    updated_at: Mapped[datetime] = mapped_column(server_default=func.now(), onupdate=func.clock_timestamp())
 
     plan: Mapped["Plan"] = relationship(back_populates="cards")
 
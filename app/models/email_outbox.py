@@ -0,0 +1,26 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import BigInteger, Index, Integer, String, Text, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class EmailOutbox(Base):
+    """E-mails a enviar, gravados na transação da requisição e entregues pelo sender em segundo plano."""
+
+    __tablename__ = "email_outbox"
+    __table_args__ = (Index("idx_email_outbox_pending", "next_attempt_at", postgresql_where="status = 'pending'"),)
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    to_email: Mapped[str] = mapped_column(String(320))
+    subject: Mapped[str] = mapped_column(String(255))
+    html_body: Mapped[str] = mapped_column(Text)
+    text_body: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    status: Mapped[str] = mapped_column(String(16), default="pending", server_default="pending")
+    attempts: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    next_attempt_at: Mapped[datetime] = mapped_column(server_default=func.now())
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(server_default=func.now())
+    sent_at: Mapped[Optional[datetime]] = mapped_column(nullable=True)
@@ -0,0 +1,18 @@
+from datetime import datetime
+
+from sqlalchemy import Integer, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class JobProgress(Base):
+    """Checkpoint de jobs em lote (ex.: backfill de planos legados) para retomar de onde pararam."""
+
+    __tablename__ = "job_progress"
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    last_id: Mapped[int] = mapped_column(Integer, default=0)
+    processed: Mapped[int] = mapped_column(Integer, default=0)
+    failed: Mapped[int] = mapped_column(Integer, default=0)
+    updated_at: Mapped[datetime] = mapped_column(server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,18 @@
+from datetime import datetime
+
+from sqlalchemy import Integer, LargeBinary, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class PlanPayload(Base):
+    """JSON cru da IA, endereçado pelo sha256 do JSON canônico e comprimido uma única vez."""
+
+    __tablename__ = "plan_payloads"
+
+    hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    codec: Mapped[str] = mapped_column(String(16), default="zlib")
+    body: Mapped[bytes] = mapped_column(LargeBinary)
+    raw_size: Mapped[int] = mapped_column(Integer)
+    created_at: Mapped[datetime] = mapped_column(server_default=func.now())
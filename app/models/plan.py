@@ -24,9 +24,16 @@ class Plan(Base):
     data: Mapped[dict | None] = mapped_column(
         JSONB, nullable=True
     )  # deprecated (mantido para compatibilidade)
+    # Quando preenchido, raw_response/data ficam NULL e o JSON vem de plan_payloads.
+    payload_hash: Mapped[str | None] = mapped_column(
+        String(64), ForeignKey("plan_payloads.hash"), nullable=True
+    )
 
     created_at: Mapped[datetime] = mapped_column(server_default=func.now())
-    updated_at: Mapped[datetime] = mapped_column(server_default=func.now(), onupdate=func.now())
+    # clock_timestamp(), não now() (início da transação): o ETag de GET /plans/{id} usa este valor
+    # e uma transação longa gravaria um horário anterior a leituras já servidas (ETag velho).
+    # Vale também para cards.updated_at e para os UPDATEs em SQL puro.
+    updated_at: Mapped[datetime] = mapped_column(server_default=func.now(), onupdate=func.clock_timestamp())
 
     user: Mapped["User"] = relationship(back_populates="plans")
     cards: Mapped[list["Card"]] = relationship(
@@ -39,3 +46,4 @@ class Plan(Base):
 
 from .user import User  # noqa: E402  # type: ignore
 from .card import Card  # noqa: E402  # type: ignore
+from .payload import PlanPayload  # noqa: E402,F401  # type: ignore
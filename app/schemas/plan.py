@@ -27,6 +27,8 @@ class StudyCard(BaseModel):
     depends_on: List[str] = Field(default_factory=list)
     raw: Dict[str, Any] = Field(default_factory=dict)
     notes: Optional[str] = None
+    # {"title"|"description"|"instructions": url de /api/v1/tts/audio/{chave}} com a pré-síntese ligada
+    audio: Optional[Dict[str, str]] = None
 
 
 class StudyPlanMeta(BaseModel):
@@ -58,6 +60,27 @@ class PlanOut(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class PlanStats(BaseModel):
+    cards_total: int = 0
+    cards_by_column: Dict[str, int] = Field(default_factory=dict)
+    effort_minutes_total: int = 0
+
+
+class PlanSummaryOut(BaseModel):
+    """Item leve da listagem (fields=summary): sem data/raw_response."""
+
+    id: int
+    plan_title: str | None = None
+    learning_type: str = "default"
+    tema: str | None = None
+    perfil_label: str | None = None
+    semanas: int | None = None
+    version: int = 1
+    created_at: datetime | None = None
+    updated_at: datetime | None = None
+    stats: PlanStats = Field(default_factory=PlanStats)
+
+
 class PlanDetail(PlanOut):
     raw_response: Dict[str, Any] | None = None
     cards: List[StudyCard] = Field(default_factory=list)
@@ -1,6 +1,6 @@
 import os
 from datetime import datetime, timedelta, timezone
-from typing import Any, Optional
+from typing import Any, Optional, Tuple
 
 import jwt
 from passlib.context import CryptContext
@@ -26,16 +26,42 @@ def get_jwt_exp_minutes() -> int:
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return verify_and_update_password(plain_password, hashed_password)[0]
+
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """(senha confere, novo hash se os parâmetros de custo mudaram)."""
+    from app.core.password_hasher import verify_and_update
+
+    return verify_and_update(plain_password, hashed_password)
 
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    from app.core.password_hasher import hash_password as _hash_in_pool
+
+    return _hash_in_pool(password)
+
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    from app.core.password_hasher import verify_and_update_async
+
+    return await verify_and_update_async(plain_password, hashed_password)
+
+
+async def hash_password_async(password: str) -> str:
+    from app.core.password_hasher import hash_password_async as _hash_in_pool
+
+    return await _hash_in_pool(password)
 
 
-def create_access_token(*, user_id: int) -> str:
+def create_access_token(*, user_id: int, email: Optional[str] = None, name: Optional[str] = None) -> str:
     expire = datetime.now(timezone.utc) + timedelta(minutes=get_jwt_exp_minutes())
-    payload = {"sub": str(user_id), "exp": expire}
+    payload: dict[str, Any] = {"sub": str(user_id), "exp": expire}
+    # claims opcionais: com AUTH_TRUST_JWT_CLAIMS=1 as rotas de leitura dispensam a consulta ao banco
+    if email:
+        payload["email"] = email
+        if name:
+            payload["name"] = name
     token = jwt.encode(payload, get_jwt_secret(), algorithm=get_jwt_alg())
     return token
 
@@ -0,0 +1,102 @@
+"""
+Infra comum dos jobs em lote (backfills/conversões de dados).
+
+Cada job processa lotes ordenados por id e grava o último id em job_progress na
+mesma transação do lote, então pode ser interrompido e retomado. Um
+pg_advisory_lock por job garante uma única execução entre vários workers.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models.job_progress import JobProgress
+
+_logger = logging.getLogger(__name__)
+
+# (db, batch_size) -> quantidade de linhas lidas no lote (0 = terminou)
+BatchFn = Callable[[Session, int], int]
+
+
+def get_progress(db: Session, name: str) -> JobProgress:
+    progress = db.get(JobProgress, name)
+    if progress is None:
+        progress = JobProgress(name=name, last_id=0, processed=0, failed=0)
+        db.add(progress)
+        db.flush()
+    return progress
+
+
+def run_batched_job(
+    session_factory: Callable[[], Session],
+    *,
+    name: str,
+    lock_key: int,
+    batch_fn: BatchFn,
+    batch_size: int = 100,
+    throttle_seconds: float = 0.5,
+    max_batches: Optional[int] = None,
+    stop_event: Optional[threading.Event] = None,
+) -> Dict[str, int]:
+    """
+    Roda lotes até acabar (ou até max_batches/stop_event). Se outro processo já
+    detém o advisory lock do job, retorna sem fazer nada.
+    """
+    lock_db = session_factory()
+    try:
+        acquired = lock_db.execute(select(func.pg_try_advisory_lock(lock_key))).scalar()
+        if not acquired:
+            _logger.info("%s: já em execução em outro processo; ignorando.", name)
+            return {"batches": 0, "rows": 0}
+
+        batches = rows = 0
+        try:
+            while max_batches is None or batches < max_batches:
+                if stop_event is not None and stop_event.is_set():
+                    break
+                db = session_factory()
+                try:
+                    count = batch_fn(db, batch_size)
+                finally:
+                    db.close()
+                if count == 0:
+                    _logger.info("%s: concluído (%s linhas nesta execução).", name, rows)
+                    break
+                batches += 1
+                rows += count
+                _logger.info("%s: lote %s com %s linhas.", name, batches, count)
+                if stop_event is not None:
+                    if stop_event.wait(throttle_seconds):
+                        break
+                elif throttle_seconds > 0:
+                    time.sleep(throttle_seconds)
+        finally:
+            lock_db.execute(select(func.pg_advisory_unlock(lock_key)))
+        return {"batches": batches, "rows": rows}
+    finally:
+        lock_db.close()
+
+
+def start_job_thread(target: Callable[..., Dict[str, int]], *args, **kwargs) -> threading.Event:
+    """Dispara o job em uma thread daemon; setar o Event retornado interrompe entre lotes."""
+    stop_event = threading.Event()
+    thread = threading.Thread(
+        target=target,
+        args=args,
+        kwargs={**kwargs, "stop_event": stop_event},
+        name=getattr(target, "__name__", "batch-job"),
+        daemon=True,
+    )
+    thread.start()
+    return stop_event
+
+
+def add_cli_arguments(parser) -> None:
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--throttle", type=float, default=0.5, help="pausa (s) entre lotes")
+    parser.add_argument("--max-batches", type=int, default=None)
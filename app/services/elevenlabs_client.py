@@ -0,0 +1,213 @@
+"""
+Cliente ElevenLabs compartilhado pelo processo.
+
+- Session com pool de conexões (keep-alive) em vez de uma conexão por pedido;
+- endpoint /stream: o áudio é repassado conforme chega;
+- limite de chamadas simultâneas (ELEVENLABS_MAX_CONCURRENCY);
+- circuit breaker: após ELEVENLABS_BREAKER_FAILURES falhas seguidas o circuito
+  abre por ELEVENLABS_BREAKER_RESET_SECONDS e as chamadas falham na hora
+  (o /tts cai direto no Piper); passado esse tempo, um pedido de teste decide
+  se fecha de novo.
+ELEVENLABS_BASE_URL permite apontar para um servidor local de testes.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.core.metrics import ELEVENLABS_REQUESTS
+
+ELEVENLABS_BASE_URL = os.getenv("ELEVENLABS_BASE_URL", "https://api.elevenlabs.io").rstrip("/")
+ELEVENLABS_MAX_CONCURRENCY = int(os.getenv("ELEVENLABS_MAX_CONCURRENCY", "4"))
+ELEVENLABS_QUEUE_TIMEOUT = float(os.getenv("ELEVENLABS_QUEUE_TIMEOUT", "2"))
+ELEVENLABS_CONNECT_TIMEOUT = float(os.getenv("ELEVENLABS_CONNECT_TIMEOUT", "3"))
+ELEVENLABS_READ_TIMEOUT = float(os.getenv("ELEVENLABS_READ_TIMEOUT", "15"))
+ELEVENLABS_BREAKER_FAILURES = int(os.getenv("ELEVENLABS_BREAKER_FAILURES", "3"))
+ELEVENLABS_BREAKER_RESET_SECONDS = float(os.getenv("ELEVENLABS_BREAKER_RESET_SECONDS", "30"))
+
+_CHUNK_SIZE = 8192
+
+
+class ElevenLabsUnavailable(RuntimeError):
+    """Circuito aberto ou limite de concorrência atingido: use o fallback."""
+
+
+class ElevenLabsError(RuntimeError):
+    def __init__(self, message: str, status_code: Optional[int] = None) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int, reset_seconds: float) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._probing or time.monotonic() - self._opened_at < self.reset_seconds:
+                return False
+            self._probing = True  # meio-aberto: deixa passar um pedido de teste
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+    def record_cancelled(self) -> None:
+        with self._lock:
+            self._probing = False
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+
+class ElevenLabsClient:
+    def __init__(self, base_url: str = ELEVENLABS_BASE_URL, max_concurrency: int = ELEVENLABS_MAX_CONCURRENCY) -> None:
+        self.base_url = base_url
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.breaker = CircuitBreaker(ELEVENLABS_BREAKER_FAILURES, ELEVENLABS_BREAKER_RESET_SECONDS)
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+
+    def stream(
+        self,
+        api_key: str,
+        voice_id: str,
+        payload: Dict[str, Any],
+        queue_timeout: float = ELEVENLABS_QUEUE_TIMEOUT,
+    ) -> "SpeechStream":
+        """
+        Abre o stream e valida o status antes de devolver o iterador: erros de conexão/HTTP
+        sobem aqui, antes de qualquer byte ter sido repassado ao cliente. O chamador deve
+        chamar close() no SpeechStream (mesmo sem iterá-lo) para devolver a vaga.
+        queue_timeout: espera máxima por uma vaga (quem já começou a tocar o áudio espera mais).
+        """
+        if not self.breaker.allow():
+            ELEVENLABS_REQUESTS.labels("circuit_open").inc()
+            raise ElevenLabsUnavailable("ElevenLabs indisponível (circuito aberto)")
+        if not self._slots.acquire(timeout=queue_timeout):
+            # se este era o pedido de teste do meio-aberto, libera para o próximo
+            self.breaker.record_cancelled()
+            ELEVENLABS_REQUESTS.labels("busy").inc()
+            raise ElevenLabsUnavailable("Limite de chamadas simultâneas à ElevenLabs")
+
+        try:
+            response = self.session.post(
+                f"{self.base_url}/v1/text-to-speech/{voice_id}/stream",
+                headers={"Accept": "audio/mpeg", "Content-Type": "application/json", "xi-api-key": api_key},
+                json=payload,
+                timeout=(ELEVENLABS_CONNECT_TIMEOUT, ELEVENLABS_READ_TIMEOUT),
+                stream=True,
+            )
+        except requests.RequestException as exc:
+            self._slots.release()
+            self.breaker.record_failure()
+            ELEVENLABS_REQUESTS.labels("error").inc()
+            raise ElevenLabsError(f"Erro ao contatar ElevenLabs: {exc}") from exc
+
+        if response.status_code >= 400:
+            detail = response.text[:200]
+            response.close()
+            self._slots.release()
+            # 4xx do cliente (texto/voz inválidos) não indicam indisponibilidade
+            if response.status_code >= 500 or response.status_code == 429:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            ELEVENLABS_REQUESTS.labels("error").inc()
+            raise ElevenLabsError(f"Falha ElevenLabs ({response.status_code}): {detail}", response.status_code)
+
+        return SpeechStream(self, response)
+
+
+class SpeechStream:
+    """
+    Iterador sobre o corpo do stream. close() é idempotente e devolve a vaga e a
+    conexão mesmo que o iterador nunca tenha sido iterado (ex.: cliente HTTP que
+    desconecta antes do primeiro chunk) — um gerador não executaria o finally.
+    """
+
+    def __init__(self, client: ElevenLabsClient, response: requests.Response) -> None:
+        self._client = client
+        self._response = response
+        self._chunks = response.iter_content(_CHUNK_SIZE)
+        self._closed = False
+
+    def __iter__(self) -> "SpeechStream":
+        return self
+
+    def __next__(self) -> bytes:
+        if self._closed:
+            raise StopIteration
+        try:
+            while True:
+                chunk = next(self._chunks)
+                if chunk:
+                    return chunk
+        except StopIteration:
+            self._finish("ok")
+            raise
+        except requests.RequestException as exc:
+            self._finish("error")
+            raise ElevenLabsError(f"Stream da ElevenLabs interrompido: {exc}") from exc
+
+    def close(self) -> None:
+        # fechado antes do fim: desistência do cliente, não conta contra a ElevenLabs
+        self._finish("cancelled")
+
+    def _finish(self, result: str) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._response.close()
+        self._client._slots.release()
+        breaker = self._client.breaker
+        if result == "ok":
+            breaker.record_success()
+        elif result == "error":
+            breaker.record_failure()
+        else:
+            breaker.record_cancelled()
+        ELEVENLABS_REQUESTS.labels(result).inc()
+
+    def __del__(self) -> None:
+        # rede de segurança: um stream abandonado sem close() não prende a vaga para sempre
+        if not getattr(self, "_closed", True):
+            self.close()
+
+
+_client: Optional[ElevenLabsClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> ElevenLabsClient:
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = ElevenLabsClient()
+    return _client
@@ -0,0 +1,203 @@
+"""
+Outbox de e-mails transacionais.
+
+A requisição só grava a mensagem em email_outbox (na mesma transação dos
+seus dados); um sender em segundo plano reivindica lotes com
+FOR UPDATE SKIP LOCKED (vários workers podem rodar o sender), envia pela
+mesma conexão SMTP autenticada e reagenda falhas com backoff exponencial.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import random
+import smtplib
+import threading
+from datetime import timedelta
+from typing import Any, Callable, List, Mapping, Optional, Sequence, Tuple
+
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+
+from app.core.metrics import EMAIL_OUTBOX_DELIVERIES
+from app.models.email_outbox import EmailOutbox
+from SMTP.email_service import SMTPConnection, build_message, build_password_reset_email
+
+_logger = logging.getLogger(__name__)
+
+EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv("EMAIL_OUTBOX_BATCH_SIZE", "20"))
+EMAIL_OUTBOX_POLL_SECONDS = float(os.getenv("EMAIL_OUTBOX_POLL_SECONDS", "2"))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv("EMAIL_OUTBOX_MAX_ATTEMPTS", "8"))
+EMAIL_OUTBOX_SMTP_TIMEOUT = float(os.getenv("EMAIL_OUTBOX_SMTP_TIMEOUT", "30"))
+_BACKOFF_BASE_SECONDS = 5
+_BACKOFF_MAX_SECONDS = 30 * 60
+# Erros do destinatário/mensagem: só aquela mensagem falha, a conexão segue utilizável.
+_MESSAGE_ERRORS = (
+    smtplib.SMTPRecipientsRefused,
+    smtplib.SMTPSenderRefused,
+    smtplib.SMTPDataError,
+    smtplib.SMTPNotSupportedError,
+)
+
+_CLAIM_SQL = text(
+    """
+    UPDATE email_outbox AS o
+    SET attempts = o.attempts + 1,
+        next_attempt_at = NOW() + make_interval(secs => :lease)
+    FROM (
+        SELECT id FROM email_outbox
+        WHERE status = 'pending' AND next_attempt_at <= NOW()
+        ORDER BY next_attempt_at, id
+        LIMIT :limit
+        FOR UPDATE SKIP LOCKED
+    ) AS picked
+    WHERE o.id = picked.id
+    RETURNING o.id, o.to_email, o.subject, o.html_body, o.text_body, o.attempts
+    """
+)
+
+_wakeup = threading.Event()
+
+
+def enqueue_email(db: Session, *, to_email: str, subject: str, html_body: str, text_body: Optional[str] = None) -> EmailOutbox:
+    """Adiciona o e-mail à outbox na transação corrente. Não faz commit."""
+    item = EmailOutbox(to_email=to_email, subject=subject, html_body=html_body, text_body=text_body)
+    db.add(item)
+    db.flush()
+    return item
+
+
+def enqueue_password_reset_email(db: Session, *, to_email: str, reset_link: str) -> EmailOutbox:
+    subject, html_body, text_body = build_password_reset_email(reset_link)
+    return enqueue_email(db, to_email=to_email, subject=subject, html_body=html_body, text_body=text_body)
+
+
+def wake_sender() -> None:
+    """Acorda o sender deste processo (chamar após o commit que gravou a mensagem)."""
+    _wakeup.set()
+
+
+def _backoff(attempts: int) -> float:
+    delay = min(_BACKOFF_MAX_SECONDS, _BACKOFF_BASE_SECONDS * 2 ** max(0, attempts - 1))
+    return delay * random.uniform(0.8, 1.2)
+
+
+def lease_seconds(batch_size: int, smtp_timeout: float = EMAIL_OUTBOX_SMTP_TIMEOUT) -> float:
+    """
+    Tempo em que um lote reivindicado fica reservado para o sender que o pegou. Cobre o pior
+    caso (cada envio esgotando o timeout, com uma reconexão) para outro worker não
+    reivindicar no meio do envio e duplicar mensagens.
+    """
+    return batch_size * smtp_timeout * 2 + 60
+
+
+def send_rows(
+    conn: SMTPConnection, rows: Sequence[Mapping[str, Any]]
+) -> Tuple[List[int], List[Tuple[Mapping[str, Any], str]], List[int]]:
+    """
+    Envia as mensagens pela conexão. Retorna (enviadas, falhas, não tentadas): uma falha
+    de conexão interrompe o lote, e o restante volta para a fila sem gastar tentativa.
+    """
+    sent: List[int] = []
+    failed: List[Tuple[Mapping[str, Any], str]] = []
+    for idx, row in enumerate(rows):
+        try:
+            conn.send(build_message(row["to_email"], row["subject"], row["html_body"], row["text_body"]))
+            sent.append(row["id"])
+        except _MESSAGE_ERRORS as exc:
+            _logger.warning("Outbox: e-mail %s recusado: %s", row["id"], exc)
+            failed.append((row, str(exc)[:1000]))
+        except OSError as exc:  # inclui SMTPException: servidor fora, sessão caiu, login
+            _logger.warning("Outbox: falha de conexão SMTP no e-mail %s: %s", row["id"], exc)
+            failed.append((row, str(exc)[:1000]))
+            conn.close()
+            return sent, failed, [r["id"] for r in rows[idx + 1 :]]
+        except Exception as exc:
+            _logger.warning("Outbox: falha ao montar/enviar e-mail %s: %s", row["id"], exc)
+            failed.append((row, str(exc)[:1000]))
+    return sent, failed, []
+
+
+def deliver_batch(session_factory: Callable[[], Session], conn: SMTPConnection, batch_size: int = EMAIL_OUTBOX_BATCH_SIZE) -> int:
+    """Reivindica e envia um lote. Retorna quantas mensagens foram reivindicadas."""
+    db = session_factory()
+    try:
+        lease = lease_seconds(batch_size, getattr(conn, "timeout", EMAIL_OUTBOX_SMTP_TIMEOUT))
+        rows = db.execute(_CLAIM_SQL, {"limit": batch_size, "lease": lease}).mappings().all()
+        db.commit()
+        if not rows:
+            return 0
+
+        # envio fora de transação: a conexão do pool não fica presa durante o SMTP
+        sent, failed, unsent = send_rows(conn, rows)
+
+        # horários pelo relógio do banco: a reivindicação compara com NOW()
+        if sent:
+            db.query(EmailOutbox).filter(EmailOutbox.id.in_(sent)).update(
+                {"status": "sent", "sent_at": func.now(), "last_error": None}, synchronize_session=False
+            )
+            EMAIL_OUTBOX_DELIVERIES.labels("sent").inc(len(sent))
+        for row, error in failed:
+            give_up = row["attempts"] >= EMAIL_OUTBOX_MAX_ATTEMPTS
+            values: dict = {"last_error": error}
+            if give_up:
+                values["status"] = "failed"
+            else:
+                values["next_attempt_at"] = func.now() + timedelta(seconds=_backoff(row["attempts"]))
+            db.query(EmailOutbox).filter(EmailOutbox.id == row["id"]).update(values, synchronize_session=False)
+            EMAIL_OUTBOX_DELIVERIES.labels("failed" if give_up else "retry").inc()
+        if unsent:
+            # nem chegaram a ser tentadas: devolve a tentativa e espera o SMTP voltar
+            db.query(EmailOutbox).filter(EmailOutbox.id.in_(unsent)).update(
+                {
+                    "attempts": EmailOutbox.attempts - 1,
+                    "next_attempt_at": func.now() + timedelta(seconds=_backoff(1)),
+                },
+                synchronize_session=False,
+            )
+            EMAIL_OUTBOX_DELIVERIES.labels("deferred").inc(len(unsent))
+        db.commit()
+        return len(rows)
+    finally:
+        db.close()
+
+
+def run_sender(
+    session_factory: Callable[[], Session],
+    *,
+    stop_event: threading.Event,
+    conn_factory: Optional[Callable[[], SMTPConnection]] = None,
+) -> None:
+    conn = conn_factory() if conn_factory is not None else SMTPConnection(timeout=EMAIL_OUTBOX_SMTP_TIMEOUT)
+    try:
+        while not stop_event.is_set():
+            try:
+                claimed = deliver_batch(session_factory, conn)
+            except Exception:
+                _logger.exception("Outbox: erro no ciclo do sender")
+                claimed = 0
+            if claimed:
+                continue
+            _wakeup.wait(EMAIL_OUTBOX_POLL_SECONDS)
+            _wakeup.clear()
+    finally:
+        conn.close()
+
+
+def start_sender_thread(session_factory: Callable[[], Session], **kwargs) -> threading.Event:
+    """Dispara o sender em uma thread daemon; setar o Event retornado encerra o loop."""
+    stop_event = threading.Event()
+    thread = threading.Thread(
+        target=run_sender,
+        args=(session_factory,),
+        kwargs={**kwargs, "stop_event": stop_event},
+        name="email-outbox-sender",
+        daemon=True,
+    )
+    thread.start()
+    return stop_event
+
+
+def stop_sender(stop_event: threading.Event) -> None:
+    stop_event.set()
+    _wakeup.set()
@@ -0,0 +1,161 @@
+"""
+Backfill dos planos legados (apenas plan.data JSON) para a tabela cards.
+
+Processa os planos em lotes ordenados por id, com pausa entre lotes, e grava o
+último id processado em job_progress; pode ser interrompido e retomado.
+O JSON migrado vai para plan_payloads, como nos planos novos; o raw_response só
+é descartado quando é igual ao data (senão a resposta original da IA se perderia).
+
+Uso (na raiz do projeto):
+    python -m app.services.legacy_backfill --batch-size 100 --throttle 0.5
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import exists
+from sqlalchemy.orm import Session
+
+from app.crud.plan import insert_plan_cards
+from app.models.card import Card
+from app.models.plan import Plan
+from app.services.batch_jobs import add_cli_arguments, get_progress, run_batched_job, start_job_thread
+from app.services.payload_store import put_payload, task_paths_by_identity
+from app.services.plan_serializer import legacy_card_to_dict, transformed_card_to_dict
+from app.services.plan_transformer import transform_ai_plan
+
+_logger = logging.getLogger(__name__)
+
+JOB_NAME = "legacy_plan_cards"
+# Chave do pg_advisory_lock: garante um único backfill rodando entre vários workers.
+_ADVISORY_LOCK_KEY = 7_331_001
+
+
+def _legacy_cards(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Cards do plano na ordem do JSON. transform_ai_plan ignora tarefas em texto puro, que
+    o caminho de leitura legado (_plan_to_cards) exibia; elas viram cards como lá.
+    """
+    transformed = iter(transform_ai_plan(payload).cards)
+    cards: List[Dict[str, Any]] = []
+    for semana in payload.get("plano", []):
+        week_cards = 0
+        for tarefa in semana.get("tarefas") or []:
+            week_cards += 1
+            if isinstance(tarefa, dict):
+                card = transformed_card_to_dict(next(transformed))
+            else:
+                legacy = {
+                    "id": f"task-{week_cards}",
+                    "title": "Tarefa",
+                    "type": "teoria",
+                    "hours": "",
+                    "description": str(tarefa),
+                    "notes": "",
+                    "status": "novo",
+                }
+                card = legacy_card_to_dict(legacy, semana.get("semana"))
+            card["order"] = len(cards) + 1
+            cards.append(card)
+    return cards
+
+
+def backfill_batch(db: Session, batch_size: int) -> int:
+    """
+    Migra o próximo lote de planos sem cards e avança o checkpoint na mesma transação.
+    Retorna quantos planos foram lidos (0 = terminou).
+    """
+    progress = get_progress(db, JOB_NAME)
+    plans = (
+        db.query(Plan)
+        .filter(
+            Plan.id > progress.last_id,
+            Plan.data.isnot(None),
+            ~exists().where(Card.plan_id == Plan.id),
+        )
+        .order_by(Plan.id.asc())
+        .limit(batch_size)
+        .with_for_update(of=Plan)
+        .all()
+    )
+    if not plans:
+        db.commit()
+        return 0
+
+    for plan in plans:
+        try:
+            with db.begin_nested():
+                payload = dict(plan.data or {})
+                insert_plan_cards(
+                    db,
+                    plan_id=plan.id,
+                    cards_payload=_legacy_cards(payload),
+                    raw_paths=task_paths_by_identity(payload),
+                )
+                plan.payload_hash = put_payload(db, payload)
+                plan.data = None
+                # data editado diverge da resposta original da IA: o raw_response fica inline
+                if plan.raw_response == payload:
+                    plan.raw_response = None
+                plan.version = max(plan.version or 1, 2)
+            progress.processed += 1
+        except Exception:
+            _logger.exception("Backfill: falha ao migrar plano %s", plan.id)
+            progress.failed += 1
+        progress.last_id = plan.id
+
+    db.commit()
+    return len(plans)
+
+
+def run_backfill(
+    session_factory: Callable[[], Session],
+    *,
+    batch_size: int = 100,
+    throttle_seconds: float = 0.5,
+    max_batches: Optional[int] = None,
+    stop_event: Optional[threading.Event] = None,
+) -> Dict[str, int]:
+    return run_batched_job(
+        session_factory,
+        name=JOB_NAME,
+        lock_key=_ADVISORY_LOCK_KEY,
+        batch_fn=backfill_batch,
+        batch_size=batch_size,
+        throttle_seconds=throttle_seconds,
+        max_batches=max_batches,
+        stop_event=stop_event,
+    )
+
+
+def start_backfill_thread(session_factory: Callable[[], Session], **kwargs) -> threading.Event:
+    """Dispara o backfill em uma thread daemon; setar o Event retornado interrompe entre lotes."""
+    return start_job_thread(run_backfill, session_factory, **kwargs)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Migra plan.data legado para a tabela cards.")
+    add_cli_arguments(parser)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    from app.db import SessionLocal, engine
+    from app.models.base import Base
+    import app.models.user  # noqa: F401
+
+    Base.metadata.create_all(bind=engine)
+    result = run_backfill(
+        SessionLocal,
+        batch_size=args.batch_size,
+        throttle_seconds=args.throttle,
+        max_batches=args.max_batches,
+    )
+    _logger.info("Backfill: %s", result)
+
+
+if __name__ == "__main__":
+    main()
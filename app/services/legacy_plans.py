@@ -0,0 +1,143 @@
+"""
+Atualizações pontuais em planos legados (tarefas só em plan.data).
+
+Em vez de carregar o documento inteiro, alterar no Python e regravar, o campo
+é alterado no servidor com jsonb_set. A posição de cada tarefa
+(semana, id) -> (índice da semana, índice da tarefa) é calculada no banco e
+mantida em um cache por plano; o UPDATE confere que o caminho ainda aponta
+para a mesma tarefa e, se não apontar, o índice é recalculado uma vez.
+"""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.crud.plan import user_owns_plan
+
+TaskIndex = Dict[Tuple[int, str], Tuple[int, int]]
+
+PATCHABLE_FIELDS = {"status", "notes"}
+_INDEX_CACHE_SIZE = 512
+
+_index_cache: "OrderedDict[int, TaskIndex]" = OrderedDict()
+_index_lock = threading.Lock()
+
+_INDEX_SQL = text(
+    """
+    SELECT w.week ->> 'semana', t.task ->> 'id', w.idx - 1, t.idx - 1
+    FROM plans AS p
+    CROSS JOIN LATERAL jsonb_array_elements(
+        CASE WHEN jsonb_typeof(p.data -> 'plano') = 'array' THEN p.data -> 'plano' ELSE CAST('[]' AS jsonb) END
+    ) WITH ORDINALITY AS w(week, idx)
+    CROSS JOIN LATERAL jsonb_array_elements(
+        CASE WHEN jsonb_typeof(w.week -> 'tarefas') = 'array' THEN w.week -> 'tarefas' ELSE CAST('[]' AS jsonb) END
+    ) WITH ORDINALITY AS t(task, idx)
+    WHERE p.id = :plan_id
+      AND p.user_id = :user_id
+      AND jsonb_typeof(t.task) = 'object'
+    """
+)
+
+_PATCH_SQL = text(
+    """
+    UPDATE plans
+    SET data = jsonb_set(data, CAST(:path AS text[]), to_jsonb(CAST(:value AS text)), true),
+        updated_at = clock_timestamp()
+    WHERE id = :plan_id
+      AND user_id = :user_id
+      AND data #>> CAST(:id_path AS text[]) = :card_id
+    RETURNING id
+    """
+)
+
+
+def _load_index(db: Session, *, user_id: int, plan_id: int) -> TaskIndex:
+    index: TaskIndex = {}
+    for semana, task_id, week_idx, task_idx in db.execute(
+        _INDEX_SQL, {"plan_id": plan_id, "user_id": user_id}
+    ):
+        try:
+            week_number = int(semana)
+        except (TypeError, ValueError):
+            week_number = -1
+        # mesma regra do fallback antigo: a primeira tarefa com o id na semana vence
+        index.setdefault((week_number, task_id), (week_idx, task_idx))
+    with _index_lock:
+        _index_cache[plan_id] = index
+        _index_cache.move_to_end(plan_id)
+        while len(_index_cache) > _INDEX_CACHE_SIZE:
+            _index_cache.popitem(last=False)
+    return index
+
+
+def _cached_index(plan_id: int) -> Optional[TaskIndex]:
+    with _index_lock:
+        index = _index_cache.get(plan_id)
+        if index is not None:
+            _index_cache.move_to_end(plan_id)
+        return index
+
+
+def invalidate_task_index(plan_id: int) -> None:
+    """Chamar quando plan.data for substituído por inteiro."""
+    with _index_lock:
+        _index_cache.pop(plan_id, None)
+
+
+def patch_legacy_task(
+    db: Session,
+    *,
+    user_id: int,
+    plan_id: int,
+    semana: int,
+    card_id: str,
+    field: str,
+    value: Any,
+) -> Optional[bool]:
+    """
+    Altera um campo (status/notes) de uma tarefa de plan.data com jsonb_set.
+    Retorna True se alterou, False se a tarefa não existe na semana e None se o
+    plano não existe/não é do usuário.
+    """
+    if field not in PATCHABLE_FIELDS:
+        raise ValueError(f"Campo não suportado: {field}")
+
+    index = _cached_index(plan_id)
+    fresh = index is None
+    if index is None:
+        index = _load_index(db, user_id=user_id, plan_id=plan_id)
+
+    while True:
+        position = index.get((int(semana), card_id))
+        if position is not None:
+            week_idx, task_idx = position
+            base_path = ["plano", str(week_idx), "tarefas", str(task_idx)]
+            row = db.execute(
+                _PATCH_SQL,
+                {
+                    "path": base_path + [field],
+                    "id_path": base_path + ["id"],
+                    "value": value,
+                    "plan_id": plan_id,
+                    "user_id": user_id,
+                    "card_id": card_id,
+                },
+            ).first()
+            if row is not None:
+                db.commit()
+                return True
+        if fresh:
+            break
+        # índice desatualizado (documento substituído): recalcula uma vez
+        index = _load_index(db, user_id=user_id, plan_id=plan_id)
+        fresh = True
+
+    db.rollback()
+    if not index and not user_owns_plan(db, user_id=user_id, plan_id=plan_id):
+        invalidate_task_index(plan_id)
+        return None
+    return False
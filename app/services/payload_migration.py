@@ -0,0 +1,117 @@
+"""
+Conversão dos planos já gravados para plan_payloads.
+
+Planos com cards que ainda guardam raw_response/data inline passam a apontar
+para o payload deduplicado; o raw de cada card vira o caminho [semana, tarefa]
+quando a tarefa é encontrada no payload (senão o raw inline é mantido).
+Retomável via job_progress. O espaço liberado só volta após VACUUM.
+
+Uso (na raiz do projeto):
+    python -m app.services.payload_migration --batch-size 100 --throttle 0.5
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import threading
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import exists, or_
+from sqlalchemy.orm import Session
+
+from app.models.card import Card
+from app.models.plan import Plan
+from app.services.batch_jobs import add_cli_arguments, get_progress, run_batched_job
+from app.services.payload_store import payload_hash, put_payload, task_paths_by_content
+
+_logger = logging.getLogger(__name__)
+
+JOB_NAME = "plan_payloads"
+_ADVISORY_LOCK_KEY = 7_331_002
+
+
+def migrate_batch(db: Session, batch_size: int) -> int:
+    progress = get_progress(db, JOB_NAME)
+    plans = (
+        db.query(Plan)
+        .filter(
+            Plan.id > progress.last_id,
+            Plan.payload_hash.is_(None),
+            Plan.raw_response.isnot(None),
+            # data divergente do raw_response = plano legado editado; fica como está
+            or_(Plan.data.is_(None), Plan.data == Plan.raw_response),
+            exists().where(Card.plan_id == Plan.id),
+        )
+        .order_by(Plan.id.asc())
+        .limit(batch_size)
+        .with_for_update(of=Plan)
+        .all()
+    )
+    if not plans:
+        db.commit()
+        return 0
+
+    for plan in plans:
+        try:
+            with db.begin_nested():
+                payload = plan.raw_response
+                paths = task_paths_by_content(payload)
+                for card in db.query(Card).filter(Card.plan_id == plan.id).all():
+                    path = paths.get(payload_hash(card.raw)) if card.raw else None
+                    if path is not None:
+                        card.raw_path = path
+                        card.raw = {}
+                plan.payload_hash = put_payload(db, payload)
+                plan.raw_response = None
+                plan.data = None
+            progress.processed += 1
+        except Exception:
+            _logger.exception("Payloads: falha ao converter plano %s", plan.id)
+            progress.failed += 1
+        progress.last_id = plan.id
+
+    db.commit()
+    return len(plans)
+
+
+def run_migration(
+    session_factory: Callable[[], Session],
+    *,
+    batch_size: int = 100,
+    throttle_seconds: float = 0.5,
+    max_batches: Optional[int] = None,
+    stop_event: Optional[threading.Event] = None,
+) -> Dict[str, int]:
+    return run_batched_job(
+        session_factory,
+        name=JOB_NAME,
+        lock_key=_ADVISORY_LOCK_KEY,
+        batch_fn=migrate_batch,
+        batch_size=batch_size,
+        throttle_seconds=throttle_seconds,
+        max_batches=max_batches,
+        stop_event=stop_event,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Move o JSON dos planos para plan_payloads.")
+    add_cli_arguments(parser)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    from app.db import SessionLocal
+    import app.models.user  # noqa: F401
+
+    result = run_migration(
+        SessionLocal,
+        batch_size=args.batch_size,
+        throttle_seconds=args.throttle,
+        max_batches=args.max_batches,
+    )
+    _logger.info("Payloads: %s", result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Armazenamento endereçado por conteúdo do JSON dos planos (tabela plan_payloads).
+
+O JSON da IA é gravado uma única vez (sha256 do JSON canônico, zlib) e
+referenciado por plans.payload_hash; cada card guarda só o caminho
+[semana, tarefa] da sua tarefa (cards.raw_path). Como o conteúdo é imutável,
+os payloads já descomprimidos ficam num cache LRU por processo.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.payload import PlanPayload
+
+_CODEC = "zlib"
+_ZLIB_LEVEL = 6
+_CACHE_SIZE = 128
+
+_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def canonical_json(payload: Any) -> bytes:
+    return json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+def payload_hash(payload: Any) -> str:
+    return hashlib.sha256(canonical_json(payload)).hexdigest()
+
+
+def _remember(digest: str, payload: Dict[str, Any]) -> None:
+    with _cache_lock:
+        _cache[digest] = payload
+        _cache.move_to_end(digest)
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def _decode(codec: str, body: bytes) -> Dict[str, Any]:
+    if codec != _CODEC:
+        raise ValueError(f"Codec de payload desconhecido: {codec}")
+    return json.loads(zlib.decompress(body))
+
+
+def put_payload(db: Session, payload: Dict[str, Any]) -> str:
+    """Grava o payload se ainda não existir (ON CONFLICT DO NOTHING) e devolve o hash. Não faz commit."""
+    raw = canonical_json(payload)
+    digest = hashlib.sha256(raw).hexdigest()
+    db.execute(
+        pg_insert(PlanPayload)
+        .values(hash=digest, codec=_CODEC, body=zlib.compress(raw, _ZLIB_LEVEL), raw_size=len(raw))
+        .on_conflict_do_nothing(index_elements=["hash"])
+    )
+    # cacheia uma cópia: o dict do chamador pode continuar sendo alterado
+    _remember(digest, json.loads(raw))
+    return digest
+
+
+def get_payloads(db: Session, hashes: Iterable[Optional[str]]) -> Dict[str, Dict[str, Any]]:
+    """Carrega vários payloads de uma vez (cache primeiro, um SELECT para o restante)."""
+    wanted = {h for h in hashes if h}
+    found: Dict[str, Dict[str, Any]] = {}
+    with _cache_lock:
+        for digest in wanted:
+            if digest in _cache:
+                found[digest] = _cache[digest]
+                _cache.move_to_end(digest)
+    missing = wanted - found.keys()
+    if missing:
+        rows = (
+            db.query(PlanPayload.hash, PlanPayload.codec, PlanPayload.body)
+            .filter(PlanPayload.hash.in_(missing))
+            .all()
+        )
+        for digest, codec, body in rows:
+            payload = _decode(codec, body)
+            _remember(digest, payload)
+            found[digest] = payload
+    return found
+
+
+def get_payload(db: Session, digest: Optional[str]) -> Optional[Dict[str, Any]]:
+    if not digest:
+        return None
+    return get_payloads(db, [digest]).get(digest)
+
+
+def task_paths_by_identity(payload: Dict[str, Any]) -> Dict[int, List[int]]:
+    """
+    Mapeia id(tarefa) -> [semana, tarefa] no payload. transform_ai_plan repassa os
+    próprios dicts das tarefas em card.raw, então a identidade localiza cada card.
+    """
+    paths: Dict[int, List[int]] = {}
+    for week_idx, week in enumerate(_list(payload.get("plano"))):
+        if not isinstance(week, dict):
+            continue
+        for task_idx, task in enumerate(_list(week.get("tarefas"))):
+            if isinstance(task, dict):
+                paths[id(task)] = [week_idx, task_idx]
+    return paths
+
+
+def task_paths_by_content(payload: Dict[str, Any]) -> Dict[str, List[int]]:
+    """Mapeia hash do JSON da tarefa -> [semana, tarefa]; usado na conversão de linhas já gravadas."""
+    paths: Dict[str, List[int]] = {}
+    for week_idx, week in enumerate(_list(payload.get("plano"))):
+        if not isinstance(week, dict):
+            continue
+        for task_idx, task in enumerate(_list(week.get("tarefas"))):
+            if isinstance(task, dict):
+                paths.setdefault(payload_hash(task), [week_idx, task_idx])
+    return paths
+
+
+def resolve_task(payload: Optional[Dict[str, Any]], path: Optional[Sequence[int]]) -> Optional[Dict[str, Any]]:
+    if payload is None or not path or len(path) != 2:
+        return None
+    try:
+        task = payload["plano"][path[0]]["tarefas"][path[1]]
+    except (KeyError, IndexError, TypeError):
+        return None
+    return task if isinstance(task, dict) else None
+
+
+def _list(value: Any) -> list:
+    return value if isinstance(value, list) else []
@@ -0,0 +1,227 @@
+"""
+Pool de workers Piper de vida longa (app.services.piper_worker).
+
+Cada worker mantém o modelo .onnx carregado e atende um pedido por vez pelo
+stdin/stdout. O pool limita os pedidos em andamento (workers + fila), mata e
+reinicia workers que travam (timeout) ou morrem, e checa periodicamente os
+ociosos com um ping.
+"""
+from __future__ import annotations
+
+import importlib.util
+import json
+import logging
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.metrics import PIPER_POOL_WAIT, PIPER_WORKER_RESTARTS
+from app.services.piper_worker import FRAME, STATUS_OK
+
+_logger = logging.getLogger(__name__)
+_PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+PIPER_WORKERS = int(os.getenv("PIPER_WORKERS", "2"))
+PIPER_QUEUE_SIZE = int(os.getenv("PIPER_QUEUE_SIZE", "16"))
+PIPER_QUEUE_TIMEOUT = float(os.getenv("PIPER_QUEUE_TIMEOUT", "10"))
+PIPER_REQUEST_TIMEOUT = float(os.getenv("PIPER_REQUEST_TIMEOUT", "60"))
+PIPER_STARTUP_TIMEOUT = float(os.getenv("PIPER_STARTUP_TIMEOUT", "60"))
+PIPER_HEALTH_SECONDS = float(os.getenv("PIPER_HEALTH_SECONDS", "30"))
+
+
+class PiperBusy(RuntimeError):
+    """Todos os workers ocupados e a fila cheia por mais que PIPER_QUEUE_TIMEOUT."""
+
+
+class PiperWorkerError(RuntimeError):
+    """O worker morreu, travou ou não subiu."""
+
+
+class PiperSynthesisError(RuntimeError):
+    """O worker respondeu com erro de síntese (o processo segue saudável)."""
+
+
+def _read_exact(stream, size: int) -> bytes:
+    chunks: List[bytes] = []
+    remaining = size
+    while remaining:
+        chunk = stream.read(remaining)
+        if not chunk:
+            raise PiperWorkerError("Worker Piper encerrou a saída")
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
+
+
+class _PiperProcess:
+    def __init__(self, model_path: str) -> None:
+        self.model_path = model_path
+        self.proc: Optional[subprocess.Popen] = None
+        self.sample_rate = 22050
+        self.start()
+
+    def start(self) -> None:
+        self.proc = subprocess.Popen(
+            [sys.executable, "-m", "app.services.piper_worker", "--model", self.model_path],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            cwd=str(_PROJECT_ROOT),
+        )
+        status, body = self._read_frame(PIPER_STARTUP_TIMEOUT)
+        if status != STATUS_OK:
+            self.stop()
+            raise PiperWorkerError(body.decode("utf-8", "replace"))
+        self.sample_rate = int(json.loads(body)["sample_rate"])
+
+    def _read_frame(self, timeout: float) -> Tuple[int, bytes]:
+        proc = self.proc
+        # sem leitura com timeout em pipes no Windows: um watchdog mata o processo travado
+        watchdog = threading.Timer(timeout, proc.kill)
+        watchdog.start()
+        try:
+            status, size = FRAME.unpack(_read_exact(proc.stdout, FRAME.size))
+            return status, _read_exact(proc.stdout, size)
+        finally:
+            watchdog.cancel()
+
+    def request(self, payload: Dict[str, Any], timeout: float) -> bytes:
+        if not self.alive():
+            raise PiperWorkerError("Worker Piper não está em execução")
+        try:
+            self.proc.stdin.write(json.dumps(payload).encode("utf-8") + b"\n")
+            self.proc.stdin.flush()
+        except OSError as exc:
+            raise PiperWorkerError(str(exc)) from exc
+        status, body = self._read_frame(timeout)
+        if status != STATUS_OK:
+            raise PiperSynthesisError(body.decode("utf-8", "replace"))
+        return body
+
+    def alive(self) -> bool:
+        return self.proc is not None and self.proc.poll() is None
+
+    def stop(self) -> None:
+        proc, self.proc = self.proc, None
+        if proc is None:
+            return
+        try:
+            proc.stdin.close()
+            proc.wait(timeout=2)
+        except Exception:
+            proc.kill()
+
+
+class PiperPool:
+    def __init__(self, model_path: str, size: int = PIPER_WORKERS, queue_size: int = PIPER_QUEUE_SIZE) -> None:
+        self.model_path = model_path
+        self.size = size
+        self._idle: "queue.Queue[_PiperProcess]" = queue.Queue()
+        self._slots = threading.BoundedSemaphore(size + queue_size)
+        self._stop = threading.Event()
+        for _ in range(size):
+            self._idle.put(_PiperProcess(model_path))
+        threading.Thread(target=self._health_loop, name="piper-health", daemon=True).start()
+
+    def _restart(self, worker: _PiperProcess, reason: str) -> None:
+        PIPER_WORKER_RESTARTS.labels(reason).inc()
+        worker.stop()
+        try:
+            worker.start()
+        except Exception:
+            _logger.exception("Piper: falha ao reiniciar worker")
+
+    def synthesize(self, text: str) -> Tuple[bytes, int]:
+        """(PCM int16 mono, sample rate)."""
+        queued_at = time.perf_counter()
+        if not self._slots.acquire(timeout=PIPER_QUEUE_TIMEOUT):
+            raise PiperBusy("Fila do Piper cheia")
+        try:
+            try:
+                worker = self._idle.get(timeout=max(0.0, PIPER_QUEUE_TIMEOUT - (time.perf_counter() - queued_at)))
+            except queue.Empty:
+                raise PiperBusy("Nenhum worker Piper livre")
+            PIPER_POOL_WAIT.observe(time.perf_counter() - queued_at)
+            try:
+                try:
+                    return worker.request({"text": text}, PIPER_REQUEST_TIMEOUT), worker.sample_rate
+                except PiperWorkerError:
+                    # worker caiu ou travou: reinicia e tenta uma vez mais
+                    self._restart(worker, "crash")
+                    return worker.request({"text": text}, PIPER_REQUEST_TIMEOUT), worker.sample_rate
+            finally:
+                self._idle.put(worker)
+        finally:
+            self._slots.release()
+
+    def _health_loop(self) -> None:
+        while not self._stop.wait(PIPER_HEALTH_SECONDS):
+            for _ in range(self.size):
+                try:
+                    worker = self._idle.get_nowait()
+                except queue.Empty:
+                    break  # os demais estão atendendo pedidos
+                try:
+                    worker.request({"ping": True}, timeout=5)
+                except Exception:
+                    self._restart(worker, "health")
+                finally:
+                    self._idle.put(worker)
+
+    def close(self) -> None:
+        self._stop.set()
+        while True:
+            try:
+                self._idle.get_nowait().stop()
+            except queue.Empty:
+                break
+
+
+_pool: Optional[PiperPool] = None
+_pool_lock = threading.Lock()
+
+
+def piper_pool_available() -> bool:
+    model_path = os.getenv("PIPER_MODEL_PATH")
+    return (
+        PIPER_WORKERS > 0
+        and bool(model_path)
+        and Path(model_path).exists()
+        and importlib.util.find_spec("piper") is not None
+    )
+
+
+def get_piper_pool() -> Optional[PiperPool]:
+    """Pool compartilhado do processo; None quando o pool não pode ser usado (cai no CLI)."""
+    global _pool
+    if _pool is None and piper_pool_available():
+        with _pool_lock:
+            if _pool is None:
+                _pool = PiperPool(os.environ["PIPER_MODEL_PATH"])
+    return _pool
+
+
+def warm_piper_pool() -> None:
+    """Sobe o pool em segundo plano no startup (carregar o modelo leva segundos)."""
+
+    def _warm() -> None:
+        try:
+            get_piper_pool()
+        except Exception:
+            _logger.exception("Piper: falha ao iniciar o pool; usando o CLI")
+
+    if piper_pool_available():
+        threading.Thread(target=_warm, name="piper-warmup", daemon=True).start()
+
+
+def shutdown_piper_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close()
@@ -0,0 +1,65 @@
+"""
+Processo worker do pool Piper (ver piper_pool): carrega o modelo uma vez e
+atende pedidos pelo stdin/stdout, sem arquivos temporários.
+
+Protocolo (binário, um pedido por vez):
+- pedido: uma linha JSON {"text": "..."} ou {"ping": true};
+- resposta: cabeçalho struct ">BI" (status 0=ok/1=erro, tamanho) + corpo
+  (PCM int16 mono, ou mensagem de erro em UTF-8).
+Ao subir, envia um frame ok com {"sample_rate": N} em JSON.
+
+Requer o pacote piper-tts (PiperVoice).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import struct
+import sys
+
+FRAME = struct.Struct(">BI")
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+
+def _write_frame(out, status: int, body: bytes) -> None:
+    out.write(FRAME.pack(status, len(body)))
+    out.write(body)
+    out.flush()
+
+
+def _synthesize(voice, text: str) -> bytes:
+    # piper-tts < 1.3: synthesize_stream_raw; >= 1.3: synthesize() gera AudioChunk
+    if hasattr(voice, "synthesize_stream_raw"):
+        return b"".join(voice.synthesize_stream_raw(text))
+    return b"".join(chunk.audio_int16_bytes for chunk in voice.synthesize(text))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", required=True)
+    args = parser.parse_args()
+
+    out = sys.stdout.buffer
+    try:
+        from piper import PiperVoice  # type: ignore
+
+        voice = PiperVoice.load(args.model)
+    except Exception as exc:
+        _write_frame(out, STATUS_ERROR, f"Falha ao carregar o modelo Piper: {exc}".encode("utf-8"))
+        return
+    _write_frame(out, STATUS_OK, json.dumps({"sample_rate": voice.config.sample_rate}).encode("utf-8"))
+
+    for line in sys.stdin.buffer:
+        try:
+            request = json.loads(line)
+            if request.get("ping"):
+                _write_frame(out, STATUS_OK, b"")
+                continue
+            _write_frame(out, STATUS_OK, _synthesize(voice, request.get("text") or ""))
+        except Exception as exc:
+            _write_frame(out, STATUS_ERROR, str(exc).encode("utf-8"))
+
+
+if __name__ == "__main__":
+    main()
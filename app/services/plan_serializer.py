@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import Row
+
+from app.models.card import Card
+from app.models.plan import Plan
+from app.services.payload_store import resolve_task
+from app.services.plan_transformer import TransformedCard
+from app.services.tts_presynthesis import card_audio_urls
+
+# Mesmas chaves/defaults de app.schemas.plan.StudyCard, montadas em um único passo
+# (sem asdict -> StudyCard -> model_dump) para planos com muitos cards.
+
+
+def card_model_to_dict(
+    card: Card | Row, payload: Optional[Dict[str, Any]] = None, language: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Aceita o Card do ORM ou a Row da tabela cards (ex.: RETURNING de insert_plan_cards).
+    Cards com raw_path têm o raw reconstruído a partir do payload do plano.
+    audio traz as URLs do áudio pré-sintetizado no idioma dado (None com a pré-síntese desligada).
+    """
+    raw = card.raw or {}
+    if not raw and card.raw_path:
+        raw = resolve_task(payload, card.raw_path) or {}
+    data = {
+        "id": card.source_id or str(card.id),
+        "title": card.title,
+        "description": card.description,
+        "instructions": card.instructions,
+        "order": card.order,
+        "type": card.type,
+        "needs_review": bool(card.needs_review),
+        "review_after_days": card.review_after_days,
+        "effort_minutes": card.effort_minutes,
+        "stage_suggestion": card.stage_suggestion,
+        "column_key": card.column_key or "novo",
+        "week": card.week,
+        "depends_on": card.depends_on or [],
+        "raw": raw,
+        "notes": card.notes,
+    }
+    data["audio"] = card_audio_urls(data, language)
+    return data
+
+
+def transformed_card_to_dict(card: TransformedCard) -> Dict[str, Any]:
+    return {
+        "id": card.id or "",
+        "title": card.title or "Tarefa",
+        "description": card.description,
+        "instructions": card.instructions,
+        "order": card.order,
+        "type": card.type,
+        "needs_review": bool(card.needs_review),
+        "review_after_days": card.review_after_days,
+        "effort_minutes": card.effort_minutes,
+        "stage_suggestion": card.stage_suggestion,
+        "column_key": card.column_key or "novo",
+        "week": card.week,
+        "depends_on": card.depends_on or [],
+        "raw": card.raw or {},
+        "notes": card.notes,
+    }
+
+
+def legacy_card_to_dict(card: Dict[str, Any], week: Optional[int]) -> Dict[str, Any]:
+    """Card vindo de _plan_to_cards (planos anteriores à tabela cards)."""
+    return {
+        "id": card.get("id", ""),
+        "title": card.get("title", "Tarefa"),
+        "description": card.get("description"),
+        "instructions": card.get("description"),
+        "order": None,
+        "type": card.get("type"),
+        "needs_review": False,
+        "review_after_days": None,
+        "effort_minutes": None,
+        "stage_suggestion": None,
+        "column_key": card.get("status", "novo"),
+        "week": week,
+        "depends_on": [],
+        "raw": card,
+        "notes": card.get("notes"),
+    }
+
+
+def plan_detail_to_dict(
+    plan: Plan, cards: Iterable[Dict[str, Any]], payload: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Equivalente a PlanDetail(...).model_dump() para um Plan do ORM.
+    Planos em plan_payloads devolvem o payload em data/raw_response, como antes.
+    """
+    cards_list: List[Dict[str, Any]] = list(cards)
+    return {
+        "id": plan.id,
+        "plan_title": plan.plan_title,
+        "learning_type": plan.learning_type or "default",
+        "tema": plan.tema,
+        "perfil_label": plan.perfil_label,
+        "semanas": plan.semanas,
+        "version": plan.version if plan.version is not None else 1,
+        "created_at": plan.created_at,
+        "data": plan.data if plan.data is not None else payload,
+        "raw_response": plan.raw_response if plan.raw_response is not None else payload,
+        "cards": cards_list,
+    }
+
+
+def plan_summary_to_dict(plan: Plan, stats: Dict[str, Any]) -> Dict[str, Any]:
+    """Item de PlanSummaryOut; não toca em data/raw_response (carregados com defer)."""
+    return {
+        "id": plan.id,
+        "plan_title": plan.plan_title,
+        "learning_type": plan.learning_type or "default",
+        "tema": plan.tema,
+        "perfil_label": plan.perfil_label,
+        "semanas": plan.semanas,
+        "version": plan.version if plan.version is not None else 1,
+        "created_at": plan.created_at,
+        "updated_at": plan.updated_at,
+        "stats": stats,
+    }
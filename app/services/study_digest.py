@@ -0,0 +1,212 @@
+"""
+Resumo semanal de estudos por e-mail.
+
+Uma consulta agregada (cards pendentes por semana + revisões vencidas) por
+lote de usuários (keyset por users.id): cada lote é um comando curto, dentro do
+statement_timeout, e nenhuma conexão/transação fica aberta durante os envios.
+As mensagens vão para uma fila limitada consumida por um pequeno pool de
+threads, cada uma com sua conexão SMTP persistente. O checkpoint (último
+usuário do lote concluído) fica em job_progress por semana ISO, gravado no fim
+de cada lote, então uma execução interrompida é retomada sem reenviar.
+Falhas de envio caem na outbox, que reprocessa com backoff.
+
+Uso (na raiz do projeto, ex.: cron semanal):
+    python -m app.services.study_digest --connections 4
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import queue
+import threading
+from datetime import date
+from itertools import groupby
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.services.batch_jobs import get_progress
+from app.services.email_outbox import enqueue_email
+from SMTP.email_service import SMTPConnection, build_digest_email, build_message
+
+_logger = logging.getLogger(__name__)
+
+FRONTEND_BASE_URL = os.getenv("FRONTEND_BASE_URL", "http://localhost:5173")
+# Última coluna de cada preset do quadro (ver boardPresets no front).
+DONE_COLUMNS = ["concluido", "dominei", "consolidado", "refletir", "pronto"]
+
+_DIGEST_SQL = text(
+    """
+    WITH per_week AS (
+        SELECT p.user_id,
+               c.week,
+               COUNT(*) FILTER (WHERE NOT (c.column_key = ANY(:done))) AS pending,
+               COUNT(*) FILTER (
+                   WHERE c.column_key = ANY(:done)
+                     AND c.needs_review
+                     AND c.updated_at + make_interval(days => COALESCE(c.review_after_days, 0))
+                         BETWEEN NOW() - INTERVAL '7 days' AND NOW()
+               ) AS due_reviews,
+               MAX(c.updated_at) AS last_activity
+        FROM cards AS c
+        JOIN plans AS p ON p.id = c.plan_id
+        WHERE p.user_id > :after_user_id
+          AND p.user_id <= :until_user_id
+        GROUP BY p.user_id, c.week
+    ),
+    active AS (
+        SELECT user_id
+        FROM per_week
+        GROUP BY user_id
+        HAVING MAX(last_activity) >= NOW() - make_interval(days => :active_days)
+           AND SUM(pending) + SUM(due_reviews) > 0
+    )
+    SELECT u.id, u.email, u.username, w.week, w.pending, w.due_reviews
+    FROM active AS a
+    JOIN users AS u ON u.id = a.user_id
+    JOIN per_week AS w ON w.user_id = a.user_id
+    WHERE w.pending > 0 OR w.due_reviews > 0
+    ORDER BY u.id, w.week NULLS LAST
+    """
+)
+
+# Último id do próximo lote de usuários (None = acabou).
+_BATCH_END_SQL = text(
+    """
+    SELECT MAX(id) FROM (
+        SELECT id FROM users WHERE id > :after_user_id ORDER BY id LIMIT :batch_users
+    ) AS batch
+    """
+)
+
+_STOP = object()
+
+
+def _job_name(today: Optional[date] = None) -> str:
+    year, week, _ = (today or date.today()).isocalendar()
+    return f"study_digest:{year}-W{week:02d}"
+
+
+def _sender_loop(jobs: "queue.Queue", conn: SMTPConnection, failures: List[Tuple], lock: threading.Lock) -> None:
+    try:
+        while True:
+            item = jobs.get()
+            try:
+                if item is _STOP:
+                    return
+                to_email, subject, html_body, text_body = item
+                try:
+                    conn.send(build_message(to_email, subject, html_body, text_body))
+                except Exception as exc:
+                    _logger.warning("Digest: falha ao enviar para %s: %s", to_email, exc)
+                    conn.close()
+                    with lock:
+                        failures.append(item)
+            finally:
+                jobs.task_done()
+    finally:
+        conn.close()
+
+
+def run_digest(
+    session_factory: Callable[[], Session],
+    *,
+    connections: int = 4,
+    active_days: int = 30,
+    batch_users: int = 500,
+    conn_factory: Callable[[], SMTPConnection] = SMTPConnection,
+) -> Dict[str, int]:
+    job_name = _job_name()
+    db = session_factory()
+    try:
+        after_user_id = get_progress(db, job_name).last_id
+        db.commit()
+
+        jobs: "queue.Queue" = queue.Queue(maxsize=connections * 50)
+        failures: List[Tuple] = []
+        lock = threading.Lock()
+        senders = [
+            threading.Thread(target=_sender_loop, args=(jobs, conn_factory(), failures, lock), name=f"digest-smtp-{i}", daemon=True)
+            for i in range(connections)
+        ]
+        for sender in senders:
+            sender.start()
+
+        def checkpoint(last_user_id: int, since_checkpoint: int) -> None:
+            # só avança depois que tudo até aqui foi entregue (ou foi para a outbox)
+            jobs.join()
+            with lock:
+                pending_failures, failures[:] = list(failures), []
+            progress = get_progress(db, job_name)
+            for to_email, subject, html_body, text_body in pending_failures:
+                enqueue_email(db, to_email=to_email, subject=subject, html_body=html_body, text_body=text_body)
+            progress.last_id = last_user_id
+            progress.failed += len(pending_failures)
+            progress.processed += since_checkpoint
+            db.commit()
+
+        users = 0
+        while True:
+            until_user_id = db.execute(
+                _BATCH_END_SQL, {"after_user_id": after_user_id, "batch_users": batch_users}
+            ).scalar()
+            if until_user_id is None:
+                break
+            result = db.execute(
+                _DIGEST_SQL,
+                {
+                    "done": DONE_COLUMNS,
+                    "after_user_id": after_user_id,
+                    "until_user_id": until_user_id,
+                    "active_days": active_days,
+                },
+            ).all()
+            db.commit()  # encerra a transação antes dos envios
+            batch = 0
+            for (_, email, username), rows in groupby(result, key=lambda r: (r.id, r.email, r.username)):
+                weeks = [(r.week, int(r.pending), int(r.due_reviews)) for r in rows]
+                name = username or email.split("@")[0].title()
+                jobs.put((email, *build_digest_email(name, weeks, FRONTEND_BASE_URL)))
+                batch += 1
+            users += batch
+            # até until_user_id está tudo visto, inclusive usuários sem nada a enviar
+            checkpoint(until_user_id, batch)
+            after_user_id = until_user_id
+
+        for _ in senders:
+            jobs.put(_STOP)
+        for sender in senders:
+            sender.join()
+        progress = get_progress(db, job_name)
+        return {"users": users, "failed_total": progress.failed, "processed_total": progress.processed}
+    finally:
+        db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Envia o resumo semanal de estudos por e-mail.")
+    parser.add_argument("--connections", type=int, default=4, help="conexões SMTP simultâneas")
+    parser.add_argument("--active-days", type=int, default=30, help="só usuários com atividade nesse período")
+    parser.add_argument("--batch-users", type=int, default=500, help="usuários por consulta/checkpoint")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    from app.db import SessionLocal
+    import app.models.user  # noqa: F401
+    import app.models.job_progress  # noqa: F401
+    import app.models.email_outbox  # noqa: F401
+
+    result = run_digest(
+        SessionLocal,
+        connections=args.connections,
+        active_days=args.active_days,
+        batch_users=args.batch_users,
+    )
+    _logger.info("Digest: %s", result)
+
+
+if __name__ == "__main__":
+    main()
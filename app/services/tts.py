@@ -1,15 +1,25 @@
 from __future__ import annotations
 
+import io
+import json
 import os
 import shutil
 import subprocess
-import tempfile
+import wave
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 
-import requests
 from fastapi import HTTPException
 
+from app.services.elevenlabs_client import (
+    ElevenLabsError,
+    ElevenLabsUnavailable,
+    SpeechStream,
+    get_client as get_elevenlabs_client,
+)
+from app.services.piper_pool import PiperBusy, PiperSynthesisError, PiperWorkerError, get_piper_pool
+from app.services.tts_cache import synthesis_key
+
 
 def _resolve_binary(binary_env: str) -> Optional[str]:
     """
@@ -23,13 +33,31 @@ def _resolve_binary(binary_env: str) -> Optional[str]:
     return resolved
 
 
-def synthesize_with_piper(text: str, language: Optional[str] = None) -> bytes:
+def pcm_to_wav(pcm: bytes, sample_rate: int) -> bytes:
+    """Empacota PCM int16 mono em WAV (o formato que o endpoint sempre devolveu)."""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm)
+    return buffer.getvalue()
+
+
+def _piper_sample_rate(model: Path) -> int:
+    config = Path(f"{model}.json")
+    try:
+        return int(json.loads(config.read_text(encoding="utf-8"))["audio"]["sample_rate"])
+    except Exception:
+        return 22050
+
+
+def synthesize_piper_pcm(text: str, language: Optional[str] = None) -> Tuple[bytes, int]:
     """
-    Invokes the Piper CLI to synthesize audio for the given text.
-    Requires two environment variables:
-      - PIPER_MODEL_PATH: path to the .onnx model file
-      - PIPER_BIN (optional): path or name of the Piper executable (defaults to 'piper')
-    Returns the resulting WAV bytes.
+    Sintetiza com o Piper e devolve (PCM int16 mono, sample rate).
+    Usa o pool de workers com o modelo já carregado (piper_pool) quando o pacote
+    piper-tts está instalado; senão, chama o CLI (PIPER_BIN) com saída raw no stdout.
+    Requires PIPER_MODEL_PATH: path to the .onnx model file.
     """
     if not text.strip():
         raise HTTPException(status_code=400, detail="Texto vazio para síntese.")
@@ -47,6 +75,15 @@ def synthesize_with_piper(text: str, language: Optional[str] = None) -> bytes:
             detail=f"Modelo Piper não encontrado em {model}",
         )
 
+    try:
+        pool = get_piper_pool()
+        if pool is not None:
+            return pool.synthesize(text)
+    except PiperBusy as exc:
+        raise HTTPException(status_code=503, detail="Síntese de voz ocupada; tente novamente.") from exc
+    except (PiperWorkerError, PiperSynthesisError) as exc:
+        raise HTTPException(status_code=500, detail=f"Falha ao sintetizar com Piper: {exc}") from exc
+
     binary_env = os.getenv("PIPER_BIN", "piper")
     binary_path = _resolve_binary(binary_env)
     if not binary_path:
@@ -55,40 +92,27 @@ def synthesize_with_piper(text: str, language: Optional[str] = None) -> bytes:
             detail=f"Binário Piper '{binary_env}' não localizado. Instale o Piper e ajuste PIPER_BIN.",
         )
 
-    # Piper recebe texto em stdin; podemos opcionalmente informar idioma futuro.
-    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp_out:
-        tmp_path = Path(tmp_out.name)
-
-    try:
-        cmd = [
-            binary_path,
-            "--model",
-            str(model),
-            "--output_file",
-            str(tmp_path),
-        ]
-
-        proc = subprocess.run(
-            cmd,
-            input=text,
-            text=True,
-            capture_output=True,
-            check=False,
+    # Piper recebe texto em stdin e, com --output_raw, devolve o PCM no stdout (sem arquivo temporário).
+    proc = subprocess.run(
+        [binary_path, "--model", str(model), "--output_raw"],
+        input=text.encode("utf-8"),
+        capture_output=True,
+        check=False,
+    )
+    if proc.returncode != 0:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Falha ao sintetizar com Piper: {proc.stderr.decode('utf-8', 'replace').strip()}",
         )
-        if proc.returncode != 0:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Falha ao sintetizar com Piper: {proc.stderr.strip() or proc.stdout.strip()}",
-            )
-        data = tmp_path.read_bytes()
-        if not data:
-            raise HTTPException(status_code=500, detail="Piper não retornou áudio.")
-        return data
-    finally:
-        try:
-            tmp_path.unlink(missing_ok=True)
-        except Exception:
-            pass
+    if not proc.stdout:
+        raise HTTPException(status_code=500, detail="Piper não retornou áudio.")
+    return proc.stdout, _piper_sample_rate(model)
+
+
+def synthesize_with_piper(text: str, language: Optional[str] = None) -> bytes:
+    """Returns the resulting WAV bytes."""
+    pcm, sample_rate = synthesize_piper_pcm(text, language)
+    return pcm_to_wav(pcm, sample_rate)
 
 
 _ELEVENLABS_DEFAULT_VOICES: Dict[str, Dict[str, Any]] = {
@@ -130,9 +154,26 @@ def _resolve_language(language: Optional[str]) -> str:
     return lang
 
 
-def synthesize_with_elevenlabs(text: str, language: Optional[str] = None) -> bytes:
+def voice_settings(provider: str, language: Optional[str] = None) -> Dict[str, Any]:
+    """Parâmetros que mudam o áudio gerado (entram na chave do cache de TTS)."""
+    if provider == "elevenlabs":
+        return dict(_ELEVENLABS_DEFAULT_VOICES.get(_resolve_language(language)) or _ELEVENLABS_DEFAULT_VOICES["pt"])
+    return {"model": Path(os.getenv("PIPER_MODEL_PATH", "")).name}
+
+
+def synthesis_cache_key(text: str, language: Optional[str], provider: str) -> str:
+    return synthesis_key(text, _resolve_language(language), provider, voice_settings(provider, language))
+
+
+def stream_elevenlabs(
+    text: str, language: Optional[str] = None, queue_timeout: Optional[float] = None
+) -> SpeechStream:
     """
-    Call ElevenLabs using the server-side API key so the frontend never needs to expose it.
+    Abre o stream de MP3 da ElevenLabs (cliente compartilhado do processo). Falhas de conexão,
+    status HTTP, circuito aberto ou limite de concorrência viram HTTPException antes do primeiro
+    byte, então os chamadores podem cair no Piper; erros no meio do stream sobem como ElevenLabsError.
+    O chamador precisa chamar close() no stream devolvido (libera a vaga do cliente).
+    queue_timeout (None = ELEVENLABS_QUEUE_TIMEOUT) limita a espera por uma vaga do cliente.
     """
     if not text.strip():
         raise HTTPException(status_code=400, detail="Texto vazio para síntese.")
@@ -141,9 +182,7 @@ def synthesize_with_elevenlabs(text: str, language: Optional[str] = None) -> byt
     if not api_key:
         raise HTTPException(status_code=503, detail="ElevenLabs não configurado no backend.")
 
-    normalized_lang = _resolve_language(language)
-    voice_cfg = _ELEVENLABS_DEFAULT_VOICES.get(normalized_lang) or _ELEVENLABS_DEFAULT_VOICES["pt"]
-
+    voice_cfg = voice_settings("elevenlabs", language)
     payload = {
         "text": text,
         "model_id": voice_cfg["model_id"],
@@ -155,22 +194,27 @@ def synthesize_with_elevenlabs(text: str, language: Optional[str] = None) -> byt
         },
     }
 
-    url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_cfg['voice_id']}"
     try:
-        response = requests.post(
-            url,
-            headers={
-                "Accept": "audio/mpeg",
-                "Content-Type": "application/json",
-                "xi-api-key": api_key,
-            },
-            json=payload,
-            timeout=30,
-        )
-    except requests.RequestException as exc:  # pragma: no cover - network failures
-        raise HTTPException(status_code=502, detail=f"Erro ao contatar ElevenLabs: {exc}") from exc
-
-    if response.status_code >= 400:
-        raise HTTPException(status_code=502, detail=f"Falha ElevenLabs ({response.status_code}): {response.text[:200]}")
-
-    return response.content
+        client = get_elevenlabs_client()
+        if queue_timeout is None:
+            return client.stream(api_key, voice_cfg["voice_id"], payload)
+        return client.stream(api_key, voice_cfg["voice_id"], payload, queue_timeout=queue_timeout)
+    except ElevenLabsUnavailable as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+    except ElevenLabsError as exc:
+        raise HTTPException(status_code=502, detail=str(exc)) from exc
+
+
+def synthesize_with_elevenlabs(
+    text: str, language: Optional[str] = None, queue_timeout: Optional[float] = None
+) -> bytes:
+    """
+    Call ElevenLabs using the server-side API key so the frontend never needs to expose it.
+    """
+    chunks = stream_elevenlabs(text, language, queue_timeout)
+    try:
+        return b"".join(chunks)
+    except ElevenLabsError as exc:
+        raise HTTPException(status_code=502, detail=str(exc)) from exc
+    finally:
+        chunks.close()
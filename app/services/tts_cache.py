@@ -0,0 +1,141 @@
+"""
+Cache em disco do áudio sintetizado, endereçado por conteúdo.
+
+A chave é o sha256 de (texto, idioma, provedor, configurações de voz), então o
+mesmo card tocado de novo não chama o Piper nem a ElevenLabs. Os arquivos
+ficam em TTS_CACHE_DIR (compartilhado pelos workers do host), gravados de
+forma atômica (tmp + rename). O LRU usa o mtime: cada hit "toca" o arquivo e,
+quando o total passa de TTS_CACHE_MAX_BYTES, os menos recentes saem até 90%
+do limite.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.metrics import TTS_CACHE_LOOKUPS
+
+TTS_CACHE_DIR = Path(os.getenv("TTS_CACHE_DIR") or Path(tempfile.gettempdir()) / "projeto_ia_tts")
+TTS_CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+MEDIA_TYPES = {"mp3": "audio/mpeg", "wav": "audio/wav"}
+
+_size_lock = threading.Lock()
+# estimativa do tamanho do cache neste processo; a varredura da evicção corrige o valor real
+_approx_size: Optional[int] = None
+
+
+def synthesis_key(text: str, language: str, provider: str, voice: Dict[str, Any]) -> str:
+    material = json.dumps(
+        {"text": text, "language": language, "provider": provider, "voice": voice},
+        ensure_ascii=False,
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def _path(key: str, ext: str) -> Path:
+    return TTS_CACHE_DIR / key[:2] / f"{key}.{ext}"
+
+
+def lookup(key: str) -> Optional[Tuple[Path, str]]:
+    """(arquivo, extensão) do áudio em cache, ou None. Marca o uso para o LRU."""
+    for ext in MEDIA_TYPES:
+        path = _path(key, ext)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            continue
+        TTS_CACHE_LOOKUPS.labels("hit").inc()
+        return path, ext
+    TTS_CACHE_LOOKUPS.labels("miss").inc()
+    return None
+
+
+def exists(key: str) -> bool:
+    """Consulta sem tocar no LRU nem nas métricas (usada pela pré-síntese)."""
+    return any(_path(key, ext).exists() for ext in MEDIA_TYPES)
+
+
+def load(key: str) -> Optional[Tuple[bytes, str]]:
+    """Conteúdo do áudio em cache; tolera a evicção entre a consulta e a leitura."""
+    found = lookup(key)
+    if found is None:
+        return None
+    path, ext = found
+    try:
+        return path.read_bytes(), ext
+    except FileNotFoundError:
+        return None
+
+
+def store(key: str, ext: str, data: bytes) -> Path:
+    path = _path(key, ext)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            tmp.write(data)
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+    _account(len(data))
+    return path
+
+
+def _account(added: int) -> None:
+    global _approx_size
+    with _size_lock:
+        if _approx_size is None:
+            _approx_size = _scan_size()
+        else:
+            _approx_size += added
+        over = _approx_size > TTS_CACHE_MAX_BYTES
+    if over:
+        evict()
+
+
+def _entries():
+    if not TTS_CACHE_DIR.exists():
+        return
+    for shard in os.scandir(TTS_CACHE_DIR):
+        if not shard.is_dir():
+            continue
+        for entry in os.scandir(shard.path):
+            if entry.is_file() and not entry.name.endswith(".tmp"):
+                yield entry
+
+
+def _scan_size() -> int:
+    return sum(entry.stat().st_size for entry in _entries())
+
+
+def evict(target_ratio: float = 0.9) -> int:
+    """Remove os arquivos menos usados até o cache caber em target_ratio do limite."""
+    global _approx_size
+    files = []
+    for entry in _entries():
+        stat = entry.stat()
+        files.append((stat.st_mtime, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in files)
+    target = int(TTS_CACHE_MAX_BYTES * target_ratio)
+    removed = 0
+    for _, size, path in sorted(files):
+        if total <= target:
+            break
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass  # outro worker removeu antes
+        total -= size
+        removed += 1
+    with _size_lock:
+        _approx_size = total
+    return removed
@@ -0,0 +1,179 @@
+"""
+Pré-síntese do áudio dos cards na criação do plano.
+
+predict-plan enfileira título, descrição e instruções de cada card (na ordem do
+plano). Os cards (card_model_to_dict) trazem as URLs de /api/v1/tts/audio/{chave};
+a chave é a mesma de synthesis_cache_key, então a URL já vale antes de o áudio
+existir (até lá o GET responde 404 e o front usa o POST /tts). Se a ElevenLabs
+falhar, o áudio do Piper é gravado sob a mesma chave: a URL anunciada não fica
+em 404 para sempre. Uma thread por processo sintetiza em
+baixa prioridade: só avança quando não houve TTS interativo nos últimos
+TTS_PRESYNTH_IDLE_SECONDS, para não disputar o Piper/ElevenLabs com quem está ouvindo.
+"""
+from __future__ import annotations
+
+import itertools
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+
+from app.core.metrics import TTS_PRESYNTH_JOBS
+from app.services import tts_cache
+from app.services.tts import (
+    is_elevenlabs_configured,
+    synthesis_cache_key,
+    synthesize_with_elevenlabs,
+    synthesize_with_piper,
+)
+
+_logger = logging.getLogger(__name__)
+
+TTS_PRESYNTH_ENABLED = os.getenv("TTS_PRESYNTH_ENABLED", "0").lower() in {"1", "true", "yes"}
+TTS_PRESYNTH_QUEUE_SIZE = int(os.getenv("TTS_PRESYNTH_QUEUE_SIZE", "2000"))
+TTS_PRESYNTH_IDLE_SECONDS = float(os.getenv("TTS_PRESYNTH_IDLE_SECONDS", "2"))
+
+AUDIO_FIELDS = ("title", "description", "instructions")
+AUDIO_URL_PREFIX = "/api/v1/tts/audio/"
+
+# (prioridade, sequência, chave, texto, idioma, provedor); prioridade = ordem do card no plano
+_Job = Tuple[int, int, str, str, Optional[str], str]
+
+_queue: "queue.PriorityQueue[_Job]" = queue.PriorityQueue(TTS_PRESYNTH_QUEUE_SIZE)
+_pending: set = set()
+_pending_lock = threading.Lock()
+_seq = itertools.count()
+_last_interactive = 0.0
+_stop: Optional[threading.Event] = None
+
+
+def note_interactive_tts() -> None:
+    """Chamado pelas rotas de TTS: adia a pré-síntese enquanto há uso interativo."""
+    global _last_interactive
+    _last_interactive = time.monotonic()
+
+
+def presynthesis_provider() -> str:
+    return "elevenlabs" if is_elevenlabs_configured() else "piper"
+
+
+def audio_url(key: str) -> str:
+    return f"{AUDIO_URL_PREFIX}{key}"
+
+
+def _card_audio_keys(card: Dict[str, Any], language: Optional[str], provider: str) -> Dict[str, Tuple[str, str]]:
+    """{campo: (chave, texto)} dos textos do card com áudio."""
+    keys: Dict[str, Tuple[str, str]] = {}
+    for field in AUDIO_FIELDS:
+        text = (card.get(field) or "").strip()
+        if text:
+            keys[field] = (synthesis_cache_key(text, language, provider), text)
+    return keys
+
+
+def card_audio_urls(card: Dict[str, Any], language: Optional[str]) -> Optional[Dict[str, str]]:
+    """{campo: url} do áudio pré-sintetizado do card; None com a pré-síntese desligada."""
+    if not TTS_PRESYNTH_ENABLED:
+        return None
+    keys = _card_audio_keys(card, language, presynthesis_provider())
+    return {field: audio_url(key) for field, (key, _) in keys.items()} or None
+
+
+def enqueue_cards(cards: Sequence[Dict[str, Any]], language: Optional[str]) -> None:
+    """Enfileira os textos dos cards; com a fila cheia o texto só fica sem pré-síntese."""
+    provider = presynthesis_provider()
+    for priority, card in enumerate(cards):
+        for key, text in _card_audio_keys(card, language, provider).values():
+            _submit((priority, next(_seq), key, text, language, provider))
+
+
+def _submit(job: _Job) -> None:
+    key = job[2]
+    with _pending_lock:
+        if key in _pending:
+            return
+        _pending.add(key)
+    try:
+        _queue.put_nowait(job)
+    except queue.Full:
+        with _pending_lock:
+            _pending.discard(key)
+        TTS_PRESYNTH_JOBS.labels("dropped").inc()
+
+
+def _synthesize(text: str, language: Optional[str], provider: str) -> Tuple[bytes, str]:
+    if provider == "elevenlabs":
+        return synthesize_with_elevenlabs(text, language), "mp3"
+    return synthesize_with_piper(text, language), "wav"
+
+
+def _run_job(job: _Job) -> None:
+    _, _, key, text, language, provider = job
+    if tts_cache.exists(key):
+        TTS_PRESYNTH_JOBS.labels("cached").inc()
+        return
+    try:
+        audio, ext = _synthesize(text, language, provider)
+        outcome = "synthesized"
+    except HTTPException as exc:
+        _logger.info("Pré-síntese falhou (%s): %s", provider, exc.detail)
+        if provider == "piper":
+            # Piper indisponível: o GET segue em 404 e o front cai no POST /tts
+            TTS_PRESYNTH_JOBS.labels("failed").inc()
+            return
+        try:
+            # a URL já foi anunciada com esta chave: grava o áudio do Piper sob ela
+            audio, ext = _synthesize(text, language, "piper")
+            outcome = "fallback"
+        except HTTPException as piper_exc:
+            TTS_PRESYNTH_JOBS.labels("failed").inc()
+            _logger.info("Pré-síntese falhou (piper): %s", piper_exc.detail)
+            return
+    tts_cache.store(key, ext, audio)
+    TTS_PRESYNTH_JOBS.labels(outcome).inc()
+
+
+def _wait_idle(stop_event: threading.Event) -> bool:
+    while not stop_event.is_set():
+        remaining = _last_interactive + TTS_PRESYNTH_IDLE_SECONDS - time.monotonic()
+        if remaining <= 0:
+            return True
+        stop_event.wait(remaining)
+    return False
+
+
+def run_presynthesis(stop_event: threading.Event) -> None:
+    while not stop_event.is_set():
+        try:
+            job = _queue.get(timeout=1)
+        except queue.Empty:
+            continue
+        try:
+            if not _wait_idle(stop_event):
+                return
+            _run_job(job)
+        except Exception:
+            TTS_PRESYNTH_JOBS.labels("failed").inc()
+            _logger.exception("Pré-síntese: erro inesperado")
+        finally:
+            with _pending_lock:
+                _pending.discard(job[2])
+
+
+def start_presynthesis() -> None:
+    global _stop
+    if _stop is not None:
+        return
+    _stop = threading.Event()
+    threading.Thread(target=run_presynthesis, args=(_stop,), name="tts-presynthesis", daemon=True).start()
+
+
+def stop_presynthesis() -> None:
+    global _stop
+    if _stop is not None:
+        _stop.set()
+        _stop = None
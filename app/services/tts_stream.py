@@ -0,0 +1,200 @@
+"""
+TTS em streaming: o texto é quebrado em frases, sintetizadas em paralelo
+(pool Piper ou chamadas concorrentes à ElevenLabs) e entregues em ordem.
+
+A primeira frase é submetida primeiro, então o tempo até o primeiro áudio
+depende só dela, não do tamanho do texto. Enquadramento:
+- WAV (Piper): um cabeçalho com tamanho "desconhecido" (0xFFFFFFFF, convenção
+  de streaming) e depois só o PCM de cada frase;
+- MP3 (ElevenLabs): frames MP3 são autodelimitados, basta concatenar.
+Cada frase passa pelo cache de TTS, então replays não sintetizam de novo.
+Depois que o áudio começou, uma falha aborta a resposta (o erro sobe para o
+servidor, que corta a transferência) em vez de terminar o clipe como se estivesse
+completo. Por isso as frases seguintes da ElevenLabs esperam por uma vaga do
+cliente (TTS_STREAM_QUEUE_TIMEOUT) em vez do limite curto usado na primeira.
+"""
+from __future__ import annotations
+
+import io
+import logging
+import os
+import re
+import struct
+import wave
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Deque, Iterator, List, Optional, Tuple
+
+from app.core.metrics import TTS_SYNTHESIS_DURATION
+from app.services import tts_cache
+from app.services.elevenlabs_client import ELEVENLABS_MAX_CONCURRENCY
+from app.services.tts import (
+    pcm_to_wav,
+    synthesis_cache_key,
+    synthesize_piper_pcm,
+    synthesize_with_elevenlabs,
+)
+
+_logger = logging.getLogger(__name__)
+
+TTS_STREAM_WORKERS = int(os.getenv("TTS_STREAM_WORKERS", "8"))
+# frases sintetizadas à frente da que está sendo enviada, por requisição
+TTS_STREAM_PARALLEL = int(os.getenv("TTS_STREAM_PARALLEL", "3"))
+# espera por uma vaga do cliente ElevenLabs para as frases após a primeira
+TTS_STREAM_QUEUE_TIMEOUT = float(os.getenv("TTS_STREAM_QUEUE_TIMEOUT", "30"))
+
+_SENTENCE_END = re.compile(r"(?<=[.!?…;:])\s+|\n+")
+_MIN_CHARS = 40
+_MAX_CHARS = 400
+
+_executor = ThreadPoolExecutor(max_workers=TTS_STREAM_WORKERS, thread_name_prefix="tts-stream")
+
+
+def split_sentences(text: str, min_chars: int = _MIN_CHARS, max_chars: int = _MAX_CHARS) -> List[str]:
+    """
+    Frases do texto. A partir da segunda, frases curtas são agrupadas até min_chars;
+    frases maiores que max_chars são cortadas em vírgulas/espaços.
+    """
+    chunks: List[str] = []
+    current = ""
+    for sentence in (s.strip() for s in _SENTENCE_END.split(text)):
+        if not sentence:
+            continue
+        while len(sentence) > max_chars:
+            cut = max(sentence.rfind(", ", 0, max_chars), sentence.rfind(" ", 0, max_chars))
+            # sem vírgula/espaço: corte seco em max_chars
+            end = cut + 1 if cut > 0 else max_chars
+            if current:  # o texto pendente vem antes dos pedaços desta frase
+                chunks.append(current)
+                current = ""
+            chunks.append(sentence[:end].strip())
+            sentence = sentence[end:].strip()
+        current = f"{current} {sentence}".strip()
+        # a primeira frase sai sozinha: é ela que define o tempo até o primeiro áudio
+        if len(current) >= min_chars or not chunks:
+            chunks.append(current)
+            current = ""
+    if current:
+        # nunca junta ao primeiro pedaço, que precisa sair sozinho
+        if len(chunks) > 1 and len(chunks[-1]) + len(current) < max_chars:
+            chunks[-1] = f"{chunks[-1]} {current}"
+        else:
+            chunks.append(current)
+    return chunks
+
+
+def streaming_wav_header(sample_rate: int) -> bytes:
+    """Cabeçalho WAV PCM16 mono com tamanhos 0xFFFFFFFF (comprimento desconhecido)."""
+    unknown = 0xFFFFFFFF
+    return (
+        b"RIFF" + struct.pack("<I", unknown) + b"WAVE"
+        + b"fmt " + struct.pack("<IHHIIHH", 16, 1, 1, sample_rate, sample_rate * 2, 2, 16)
+        + b"data" + struct.pack("<I", unknown)
+    )
+
+
+def _wav_to_pcm(data: bytes) -> Tuple[bytes, int]:
+    with wave.open(io.BytesIO(data), "rb") as wav:
+        return wav.readframes(wav.getnframes()), wav.getframerate()
+
+
+def _piper_chunk(text: str, language: Optional[str]) -> Tuple[bytes, int]:
+    key = synthesis_cache_key(text, language, "piper")
+    cached = tts_cache.load(key)
+    if cached is not None:
+        return _wav_to_pcm(cached[0])
+    with TTS_SYNTHESIS_DURATION.labels("piper").time():
+        pcm, sample_rate = synthesize_piper_pcm(text, language)
+    tts_cache.store(key, "wav", pcm_to_wav(pcm, sample_rate))
+    return pcm, sample_rate
+
+
+def _elevenlabs_chunk(text: str, language: Optional[str], queue_timeout: Optional[float] = None) -> bytes:
+    key = synthesis_cache_key(text, language, "elevenlabs")
+    cached = tts_cache.load(key)
+    if cached is not None:
+        return cached[0]
+    with TTS_SYNTHESIS_DURATION.labels("elevenlabs").time():
+        audio = synthesize_with_elevenlabs(text, language, queue_timeout)
+    tts_cache.store(key, "mp3", audio)
+    return audio
+
+
+def _ordered(
+    chunks: List[str],
+    fn: Callable[[str], object],
+    first: Optional[Future] = None,
+    parallel: int = TTS_STREAM_PARALLEL,
+) -> Iterator[object]:
+    """Resultados de fn(chunk) em ordem, com até parallel sínteses em andamento."""
+    pending: Deque[Future] = deque()
+    if first is not None:
+        pending.append(first)
+    remaining = iter(chunks[len(pending):])
+    try:
+        for chunk in remaining:
+            pending.append(_executor.submit(fn, chunk))
+            if len(pending) >= parallel:
+                break
+        while pending:
+            result = pending.popleft().result()
+            next_chunk = next(remaining, None)
+            if next_chunk is not None:
+                pending.append(_executor.submit(fn, next_chunk))
+            yield result
+    finally:
+        # cliente desconectou ou houve erro: não sintetiza o resto à toa
+        for future in pending:
+            future.cancel()
+
+
+def start_stream(text: str, language: Optional[str], providers: List[str]) -> Tuple[str, str, Iterator[bytes]]:
+    """
+    Escolhe o provedor sintetizando a primeira frase (com fallback, como no /tts)
+    e devolve (provedor, extensão, gerador de bytes). Erros na primeira frase
+    sobem como HTTPException antes de a resposta começar.
+    """
+    chunks = split_sentences(text) or [text]
+    last_error: Optional[Exception] = None
+    for provider in providers:
+        if provider == "elevenlabs":
+            # a primeira frase falha rápido (cai no Piper); as demais esperam vaga no cliente
+            first = _executor.submit(_elevenlabs_chunk, chunks[0], language)
+            fn: Callable[[str], object] = lambda chunk: _elevenlabs_chunk(chunk, language, TTS_STREAM_QUEUE_TIMEOUT)
+        else:
+            fn = lambda chunk: _piper_chunk(chunk, language)
+            first = _executor.submit(fn, chunks[0])
+        try:
+            first.result()
+        except Exception as exc:
+            last_error = exc
+            continue
+        if provider == "elevenlabs":
+            return provider, "mp3", _mp3_stream(chunks, fn, first)
+        return provider, "wav", _wav_stream(chunks, fn, first)
+    assert last_error is not None
+    raise last_error
+
+
+def _mp3_stream(chunks: List[str], fn, first: Future) -> Iterator[bytes]:
+    # nunca mais frases em paralelo do que vagas no cliente compartilhado
+    parallel = max(1, min(TTS_STREAM_PARALLEL, ELEVENLABS_MAX_CONCURRENCY))
+    try:
+        for audio in _ordered(chunks, fn, first, parallel):
+            yield audio
+    except Exception:
+        _logger.exception("TTS stream: falha no meio do áudio (ElevenLabs)")
+        raise
+
+
+def _wav_stream(chunks: List[str], fn, first: Future) -> Iterator[bytes]:
+    try:
+        header_sent = False
+        for pcm, sample_rate in _ordered(chunks, fn, first):
+            if not header_sent:
+                yield streaming_wav_header(sample_rate)
+                header_sent = True
+            yield pcm
+    except Exception:
+        _logger.exception("TTS stream: falha no meio do áudio (Piper)")
+        raise
@@ -0,0 +1,86 @@
+"""
+Benchmark de checkouts do pool por rota: get_db com Session criada na entrada
+(comportamento antigo) vs. LazySession (atual).
+
+Usa a própria aplicação (TestClient) e lê o histograma http_request_db_checkouts
+do registry do Prometheus, o mesmo exposto em /metrics.
+Requer o Postgres configurado (DATABASE_URL). Cria um usuário temporário e remove ao final.
+Uso (na raiz do projeto):
+    python -m benchmarks.bench_db_checkouts --requests 50
+"""
+import argparse
+import uuid
+from typing import Dict, List, Tuple
+
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from app.db import SessionLocal
+from app.deps import get_db
+from app.models.user import User
+from server import app
+
+
+def _eager_db():
+    # get_db anterior ao LazySession: a Session nasce em toda requisição que declara a dependência
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def _checkouts(method: str, route: str) -> Tuple[float, float]:
+    labels = {"method": method, "route": route}
+    total = REGISTRY.get_sample_value("http_request_db_checkouts_sum", labels) or 0.0
+    count = REGISTRY.get_sample_value("http_request_db_checkouts_count", labels) or 0.0
+    return total, count
+
+
+def _run(client: TestClient, calls: List[Tuple[str, str, str, Dict]], requests: int) -> Dict[str, float]:
+    result: Dict[str, float] = {}
+    for method, route, url, kwargs in calls:
+        before = _checkouts(method, route)
+        for _ in range(requests):
+            client.request(method, url, **kwargs)
+        after = _checkouts(method, route)
+        count = after[1] - before[1]
+        result[f"{method} {route}"] = (after[0] - before[0]) / count if count else 0.0
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=50, help="requisições por rota e modo")
+    args = parser.parse_args()
+
+    email = f"bench-{uuid.uuid4().hex[:8]}@example.com"
+    password = "senha-bench-123"
+    with TestClient(app) as client:
+        token = client.post("/api/v1/auth/register", json={"email": email, "password": password}).json()["access_token"]
+        auth = {"headers": {"Authorization": f"Bearer {token}"}}
+        calls = [
+            ("GET", "/api/v1/health", "/api/v1/health", {}),
+            ("GET", "/api/v1/auth/me", "/api/v1/auth/me", auth),
+            ("GET", "/api/v1/plans", "/api/v1/plans", auth),
+            ("GET", "/api/v1/auth/validate-reset-token", "/api/v1/auth/validate-reset-token?token=x", {}),
+        ]
+        try:
+            results = {}
+            app.dependency_overrides[get_db] = _eager_db
+            results["eager"] = _run(client, calls, args.requests)
+            app.dependency_overrides.pop(get_db)
+            results["lazy"] = _run(client, calls, args.requests)
+        finally:
+            app.dependency_overrides.clear()
+            with SessionLocal() as db:
+                db.query(User).filter(User.email == email).delete()
+                db.commit()
+
+    print(f"{'rota':<45} {'eager':>8} {'lazy':>8}  (checkouts/requisição)")
+    for name in results["lazy"]:
+        print(f"{name:<45} {results['eager'][name]:8.2f} {results['lazy'][name]:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
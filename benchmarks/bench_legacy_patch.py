@@ -0,0 +1,126 @@
+"""
+Benchmark das atualizações de status em planos legados (plan.data):
+regravar o documento inteiro (caminho antigo) vs. jsonb_set no servidor.
+
+Requer o Postgres configurado (DATABASE_URL). Cria um usuário/plano temporários e remove ao final.
+Uso (na raiz do projeto):
+    python -m benchmarks.bench_legacy_patch --weeks 52 --tasks 8
+"""
+import argparse
+import json
+import statistics
+import time
+import uuid
+
+from sqlalchemy import text
+
+import app.models.card  # noqa: F401
+from app.db import SessionLocal, engine
+from app.models.base import Base
+from app.models.plan import Plan
+from app.models.user import User
+from app.services.legacy_plans import patch_legacy_task
+
+
+def _fake_plan(weeks: int, tasks: int) -> dict:
+    return {
+        "tema": "Benchmark",
+        "plano": [
+            {
+                "semana": w + 1,
+                "objetivo_semana": "Objetivo " * 10,
+                "tarefas": [
+                    {
+                        "id": f"task-{w + 1}-{t + 1}",
+                        "title": f"Tarefa {t + 1}",
+                        "type": "teoria",
+                        "hours": "1h",
+                        "description": "Descricao: " + "conteudo " * 40,
+                        "status": "novo",
+                    }
+                    for t in range(tasks)
+                ],
+            }
+            for w in range(weeks)
+        ],
+    }
+
+
+def _wal_lsn(db) -> str:
+    return db.execute(text("SELECT pg_current_wal_lsn()")).scalar()
+
+
+def _wal_bytes(db, start: str) -> int:
+    return int(db.execute(text("SELECT pg_wal_lsn_diff(pg_current_wal_lsn(), :s)"), {"s": start}).scalar())
+
+
+def _old_update(db, user_id: int, plan_id: int, semana: int, card_id: str, status: str) -> int:
+    plan = db.query(Plan).filter(Plan.user_id == user_id, Plan.id == plan_id).first()
+    data = dict(plan.data or {})
+    for week in data.get("plano", []):
+        if int(week.get("semana", -1)) != semana:
+            continue
+        for t in week.get("tarefas", []):
+            if t.get("id") == card_id:
+                t["status"] = status
+    plan.data = json.loads(json.dumps(data))  # força nova atribuição, como o caminho antigo
+    db.add(plan)
+    db.commit()
+    return len(json.dumps(data, ensure_ascii=False).encode("utf-8"))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--weeks", type=int, default=52)
+    parser.add_argument("--tasks", type=int, default=8)
+    parser.add_argument("--updates", type=int, default=50)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    user = User(email=f"bench-{uuid.uuid4().hex}@example.com", hashed_password="x")
+    db.add(user)
+    db.flush()
+    plan = Plan(user_id=user.id, data=_fake_plan(args.weeks, args.tasks), version=1)
+    db.add(plan)
+    db.commit()
+    user_id, plan_id = user.id, plan.id
+    doc_size = len(json.dumps(plan.data, ensure_ascii=False).encode("utf-8"))
+
+    try:
+        results = {}
+        for label in ("antigo", "jsonb_set"):
+            times, wal, sent = [], [], []
+            for i in range(args.updates):
+                semana = i % args.weeks + 1
+                card_id = f"task-{semana}-{i % args.tasks + 1}"
+                status = "feito" if i % 2 else "em_andamento"
+                start_lsn = _wal_lsn(db)
+                db.commit()
+                t0 = time.perf_counter()
+                if label == "antigo":
+                    sent.append(_old_update(db, user_id, plan_id, semana, card_id, status))
+                else:
+                    patch_legacy_task(
+                        db, user_id=user_id, plan_id=plan_id, semana=semana,
+                        card_id=card_id, field="status", value=status,
+                    )
+                    sent.append(len(status))
+                times.append((time.perf_counter() - t0) * 1000)
+                wal.append(_wal_bytes(db, start_lsn))
+                db.commit()
+            results[label] = (statistics.median(times), statistics.median(wal), statistics.median(sent))
+
+        print(f"plano: {args.weeks} semanas x {args.tasks} tarefas, documento = {doc_size / 1024:.1f} KiB")
+        print(f"{'caminho':<10} {'mediana (ms)':>13} {'WAL/update (B)':>15} {'enviado (B)':>12}")
+        for label, (ms, wal_b, sent_b) in results.items():
+            print(f"{label:<10} {ms:>13.2f} {wal_b:>15.0f} {sent_b:>12.0f}")
+    finally:
+        db.rollback()
+        db.query(User).filter(User.id == user_id).delete()
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
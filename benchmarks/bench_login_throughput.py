@@ -0,0 +1,84 @@
+"""
+Benchmark de throughput de login: verificação inline no threadpool vs. pool de processos.
+
+Reproduz o modelo do servidor: um event loop cujas rotas sync rodam num threadpool
+de 40 threads (o limite padrão do anyio/Starlette). Uma rajada de logins chega junto
+com requisições leves de outras rotas (sync, no mesmo threadpool); a latência dessas
+é medida desde a chegada, então inclui a espera por uma thread livre.
+
+- inline: login sync, PBKDF2 direto numa thread do threadpool (comportamento antigo);
+- pool:   login async aguardando o pool de processos (rota atual), sem ocupar threads.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.bench_login_throughput --logins 200
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core import password_hasher
+from app.security import pwd_context
+
+THREADPOOL_SIZE = 40
+
+
+def _light_request() -> None:
+    sum(range(2_000))
+
+
+async def _probe(loop: asyncio.AbstractEventLoop, pool: ThreadPoolExecutor) -> float:
+    start = time.perf_counter()
+    await loop.run_in_executor(pool, _light_request)
+    return (time.perf_counter() - start) * 1000
+
+
+async def _run(label: str, login, hashed: str, logins: int) -> None:
+    loop = asyncio.get_running_loop()
+    pool = ThreadPoolExecutor(max_workers=THREADPOOL_SIZE)
+    try:
+        start = time.perf_counter()
+        login_tasks = [asyncio.ensure_future(login(loop, pool, hashed)) for _ in range(logins)]
+        probe_tasks = []
+        while not all(t.done() for t in login_tasks):
+            probe_tasks.append(asyncio.ensure_future(_probe(loop, pool)))
+            await asyncio.sleep(0.005)
+        elapsed = time.perf_counter() - start
+        probes = sorted(await asyncio.gather(*probe_tasks))
+    finally:
+        pool.shutdown(wait=True)
+
+    p95 = probes[int(len(probes) * 0.95) - 1] if probes else 0.0
+    print(
+        f"{label:<8} logins/s={logins / elapsed:8.1f}  "
+        f"outras rotas: mediana={statistics.median(probes) if probes else 0:.2f}ms p95={p95:.2f}ms"
+    )
+
+
+async def _login_inline(loop, pool, hashed: str) -> bool:
+    return await loop.run_in_executor(pool, pwd_context.verify, "senha-correta", hashed)
+
+
+async def _login_pool(_loop, _pool, hashed: str) -> bool:
+    return (await password_hasher.verify_and_update_async("senha-correta", hashed))[0]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=200)
+    args = parser.parse_args()
+
+    hashed = pwd_context.hash("senha-correta")
+    asyncio.run(_run("inline", _login_inline, hashed, args.logins))
+
+    password_hasher.start_password_hasher()
+    try:
+        password_hasher.verify_and_update("senha-correta", hashed)  # sobe os processos
+        asyncio.run(_run("pool", _login_pool, hashed, args.logins))
+    finally:
+        password_hasher.shutdown_password_hasher()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark de latência por frase: Piper CLI (um processo por pedido) vs. pool de workers.
+
+Precisa de PIPER_MODEL_PATH (e do binário em PIPER_BIN para o CLI; do pacote
+piper-tts para o pool).
+
+Uso (na raiz do projeto):
+    python -m benchmarks.bench_piper_latency --repeat 20
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import time
+
+from app.services.piper_pool import PiperPool
+from app.services.tts import _resolve_binary
+
+UTTERANCES = (
+    "Revise os conceitos da semana.",
+    "Leia o capítulo dois e faça um resumo com as ideias principais.",
+    "Resolva dez exercícios de frações e confira as respostas no gabarito ao final do livro.",
+)
+
+
+def _report(label: str, samples: list) -> None:
+    samples = sorted(samples)
+    p95 = samples[max(0, int(len(samples) * 0.95) - 1)]
+    print(f"{label:<6} mediana={statistics.median(samples):8.1f}ms  p95={p95:8.1f}ms  n={len(samples)}")
+
+
+def _bench_cli(model: str, repeat: int) -> None:
+    binary = _resolve_binary(os.getenv("PIPER_BIN", "piper"))
+    if not binary:
+        print("cli    (PIPER_BIN não encontrado; pulando)")
+        return
+    samples = []
+    for _ in range(repeat):
+        for text in UTTERANCES:
+            start = time.perf_counter()
+            subprocess.run([binary, "--model", model, "--output_raw"], input=text.encode(), capture_output=True, check=True)
+            samples.append((time.perf_counter() - start) * 1000)
+    _report("cli", samples)
+
+
+def _bench_pool(model: str, repeat: int) -> None:
+    pool = PiperPool(model, size=1, queue_size=0)
+    try:
+        samples = []
+        for _ in range(repeat):
+            for text in UTTERANCES:
+                start = time.perf_counter()
+                pool.synthesize(text)
+                samples.append((time.perf_counter() - start) * 1000)
+        _report("pool", samples)
+    finally:
+        pool.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    model = os.getenv("PIPER_MODEL_PATH")
+    if not model:
+        raise SystemExit("Defina PIPER_MODEL_PATH")
+    _bench_cli(model, args.repeat)
+    _bench_pool(model, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Benchmark da persistência de planos gerados: um Card por vez + refresh por card
+(caminho antigo) vs. create_plan_with_cards com INSERT multi-linha RETURNING.
+
+Requer o Postgres configurado (DATABASE_URL). Cria um usuário temporário e remove ao final.
+Uso (na raiz do projeto):
+    python -m benchmarks.bench_plan_persistence
+"""
+import statistics
+import time
+import uuid
+
+from app.crud.plan import create_plan_with_cards
+from app.db import SessionLocal, engine
+from app.models.base import Base
+from app.models.card import Card
+from app.models.plan import Plan
+from app.models.user import User
+
+CARD_COUNTS = (10, 40, 120, 300)
+REPEAT = 5
+
+
+def _cards_payload(n: int) -> list[dict]:
+    return [
+        {
+            "id": f"task-{i}",
+            "title": f"Tarefa {i}",
+            "description": "conteudo " * 30,
+            "instructions": "ler, resumir, revisar",
+            "order": i + 1,
+            "type": "fundamento",
+            "needs_review": False,
+            "review_after_days": None,
+            "effort_minutes": 60,
+            "stage_suggestion": "Explorar",
+            "column_key": "novo",
+            "week": i // 8 + 1,
+            "depends_on": [],
+            "raw": {"id": f"task-{i}", "hours": "1h"},
+            "notes": None,
+        }
+        for i in range(n)
+    ]
+
+
+def _old_persist(db, user_id: int, cards_payload: list[dict]) -> None:
+    plan = Plan(user_id=user_id, plan_title="bench", tema="bench", semanas=4, version=2, raw_response={}, data={})
+    db.add(plan)
+    db.flush()
+    models = []
+    for card in cards_payload:
+        model = Card(
+            plan_id=plan.id,
+            source_id=card["id"],
+            title=card["title"],
+            description=card["description"],
+            instructions=card["instructions"],
+            stage_suggestion=card["stage_suggestion"],
+            column_key=card["column_key"],
+            order=card["order"],
+            type=card["type"],
+            needs_review=card["needs_review"],
+            review_after_days=card["review_after_days"],
+            effort_minutes=card["effort_minutes"],
+            week=card["week"],
+            depends_on=card["depends_on"],
+            notes=card["notes"],
+            raw=card["raw"],
+        )
+        db.add(model)
+        models.append(model)
+    db.commit()
+    db.refresh(plan)
+    for model in models:
+        db.refresh(model)
+
+
+def _new_persist(db, user_id: int, cards_payload: list[dict]) -> None:
+    create_plan_with_cards(
+        db,
+        user_id=user_id,
+        plan_title="bench",
+        learning_type="default",
+        tema="bench",
+        perfil_label=None,
+        semanas=4,
+        version=2,
+        raw_response={},
+        cards_payload=cards_payload,
+    )
+
+
+def main() -> None:
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    user = User(email=f"bench-{uuid.uuid4().hex}@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    user_id = user.id
+    try:
+        print(f"{'cards':>6} {'antigo (ms)':>12} {'bulk (ms)':>10} {'ganho':>7}")
+        for n in CARD_COUNTS:
+            payload = _cards_payload(n)
+            timings = {}
+            for label, fn in (("old", _old_persist), ("new", _new_persist)):
+                samples = []
+                for _ in range(REPEAT):
+                    t0 = time.perf_counter()
+                    fn(db, user_id, payload)
+                    samples.append((time.perf_counter() - t0) * 1000)
+                timings[label] = statistics.median(samples)
+            print(f"{n:>6} {timings['old']:>12.1f} {timings['new']:>10.1f} {timings['old'] / timings['new']:>6.1f}x")
+    finally:
+        db.rollback()
+        db.query(User).filter(User.id == user_id).delete()
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
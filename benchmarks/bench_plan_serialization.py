@@ -0,0 +1,122 @@
+"""
+Benchmark da serialização de cards (caminho antigo vs. serializer direto).
+
+Uso (na raiz do projeto):
+    python -m benchmarks.bench_plan_serialization
+"""
+import json
+import timeit
+from dataclasses import asdict
+from uuid import uuid4
+
+import app.models.user  # noqa: F401
+import app.models.plan  # noqa: F401
+from app.core.responses import dumps
+from app.models.card import Card
+from app.schemas.plan import StudyCard
+from app.services.plan_serializer import card_model_to_dict, transformed_card_to_dict
+from app.services.plan_transformer import TransformedCard
+
+CARD_COUNTS = (20, 120, 500)
+REPEAT = 50
+
+
+def _fake_transformed(n: int) -> list[TransformedCard]:
+    cards = []
+    for i in range(n):
+        raw = {
+            "id": f"task-{i}",
+            "title": f"Tarefa {i}",
+            "type": "teoria",
+            "hours": "1.5h",
+            "description": "Descricao: " + "conteudo " * 30 + "\n\nComo fazer: ler, resumir, revisar",
+            "status": "novo",
+        }
+        cards.append(
+            TransformedCard(
+                id=raw["id"],
+                title=raw["title"],
+                description="conteudo " * 30,
+                instructions="ler, resumir, revisar",
+                order=i + 1,
+                type="fundamento",
+                needs_review=i % 2 == 0,
+                review_after_days=2,
+                effort_minutes=90,
+                stage_suggestion="Explorar",
+                column_key="novo",
+                week=i // 10 + 1,
+                depends_on=[],
+                raw=raw,
+            )
+        )
+    return cards
+
+
+def _fake_rows(cards: list[TransformedCard]) -> list[Card]:
+    rows = []
+    for c in cards:
+        payload = asdict(c)
+        payload["source_id"] = payload.pop("id")
+        rows.append(Card(id=uuid4(), plan_id=1, **payload))
+    return rows
+
+
+def _old_transformed(cards):
+    payload = [asdict(c) for c in cards]
+    schemas = [StudyCard(**{**d, "id": d["id"] or ""}) for d in payload]
+    return json.dumps([s.model_dump() for s in schemas], ensure_ascii=False).encode("utf-8")
+
+
+def _new_transformed(cards):
+    return dumps([transformed_card_to_dict(c) for c in cards])
+
+
+def _old_rows(rows):
+    schemas = [
+        StudyCard(
+            id=r.source_id or str(r.id),
+            title=r.title,
+            description=r.description,
+            instructions=r.instructions,
+            order=r.order,
+            type=r.type,
+            needs_review=r.needs_review,
+            review_after_days=r.review_after_days,
+            effort_minutes=r.effort_minutes,
+            stage_suggestion=r.stage_suggestion,
+            column_key=r.column_key,
+            week=r.week,
+            depends_on=r.depends_on or [],
+            raw=r.raw or {},
+            notes=r.notes,
+        )
+        for r in rows
+    ]
+    return json.dumps([s.model_dump() for s in schemas], ensure_ascii=False).encode("utf-8")
+
+
+def _new_rows(rows):
+    return dumps([card_model_to_dict(r) for r in rows])
+
+
+def _bench(fn, arg) -> float:
+    return min(timeit.repeat(lambda: fn(arg), number=REPEAT, repeat=3)) / REPEAT * 1000
+
+
+def main() -> None:
+    print(f"{'cards':>6} {'caminho':<12} {'antigo (ms)':>12} {'novo (ms)':>10} {'ganho':>7}")
+    for n in CARD_COUNTS:
+        transformed = _fake_transformed(n)
+        rows = _fake_rows(transformed)
+        for label, old, new, arg in (
+            ("transformed", _old_transformed, _new_transformed, transformed),
+            ("orm", _old_rows, _new_rows, rows),
+        ):
+            t_old = _bench(old, arg)
+            t_new = _bench(new, arg)
+            print(f"{n:>6} {label:<12} {t_old:>12.3f} {t_new:>10.3f} {t_old / t_new:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
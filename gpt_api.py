@@ -1,10 +1,11 @@
 # gpt_api.py
 import os
 import json
+import time
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, List, Tuple
 from pathlib import Path
 
 ARTIFACTS_DIR = Path("artifacts")
@@ -46,7 +47,8 @@ def get_plan_from_gpt(
     max_tokens: int = 2000,         # valor inicial; pode aumentar automaticamente nos retries
     timeout_connect_sec: int = 10,
     timeout_read_sec: int = 180,
-    max_auto_retries: int = 3       # quantas vezes aumentaremos o teto de tokens
+    max_auto_retries: int = 3,      # quantas vezes aumentaremos o teto de tokens
+    attempts: List[Dict[str, Any]] | None = None,  # opcional: recebe um registro por chamada HTTP
 ) -> Dict[str, Any]:
     """
     Gera o plano via /v1/chat/completions com response_format=json_object.
@@ -130,13 +132,26 @@ def get_plan_from_gpt(
     def _post_with_cap(cap_key: str, cap_value: int) -> Tuple[Dict[str, Any], Dict[str, Any]]:
         payload = dict(base_payload)
         payload[cap_key] = cap_value
-        r = session.post(url, headers=headers, json=payload, timeout=(timeout_connect_sec, timeout_read_sec))
+        attempt: Dict[str, Any] = {"param": cap_key, "cap": cap_value, "status": None}
+        if attempts is not None:
+            attempts.append(attempt)
+        started = time.perf_counter()
+        try:
+            r = session.post(url, headers=headers, json=payload, timeout=(timeout_connect_sec, timeout_read_sec))
+        finally:
+            attempt["duration_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        # retries feitos pelo urllib3 (429/5xx) ficam escondidos dentro de session.post
+        retry_state = getattr(r.raw, "retries", None)
+        attempt["transport_retries"] = len(getattr(retry_state, "history", None) or ())
+        attempt["status"] = r.status_code
         if r.status_code != 200:
             status, msg_err, _ = _parse_api_error(r)
             raise RuntimeError(f"Erro na API ({status}) id={r.headers.get('x-request-id','sem-id')}: {msg_err}")
         data = r.json()
         msg = data["choices"][0]["message"]
         finish_reason = data["choices"][0].get("finish_reason")
+        attempt["finish_reason"] = finish_reason
+        attempt["usage"] = data.get("usage") or {}
         content = (msg.get("content") or "").strip()
         return {"content": content, "finish_reason": finish_reason}, data
 
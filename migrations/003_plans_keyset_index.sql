@@ -0,0 +1,2 @@
+-- Índice composto para a listagem paginada por keyset (user_id + id decrescente)
+CREATE INDEX IF NOT EXISTS idx_plans_user_id_id ON plans(user_id, id DESC);
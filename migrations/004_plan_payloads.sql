@@ -0,0 +1,18 @@
+-- Armazenamento deduplicado do JSON da IA (um registro por conteúdo, comprimido pela aplicação)
+CREATE TABLE IF NOT EXISTS plan_payloads (
+    hash VARCHAR(64) PRIMARY KEY,
+    codec VARCHAR(16) NOT NULL DEFAULT 'zlib',
+    body BYTEA NOT NULL,
+    raw_size INT NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- body já vem comprimido: evita nova tentativa de compressão no TOAST
+ALTER TABLE plan_payloads ALTER COLUMN body SET STORAGE EXTERNAL;
+
+ALTER TABLE plans
+    ADD COLUMN IF NOT EXISTS payload_hash VARCHAR(64) REFERENCES plan_payloads(hash);
+
+-- Caminho [semana, tarefa] do card dentro de plan_payloads (raw fica '{}' nesses casos)
+ALTER TABLE cards
+    ADD COLUMN IF NOT EXISTS raw_path INT[];
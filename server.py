@@ -1,14 +1,17 @@
 import os
 from pathlib import Path
-from typing import Any, Dict, Optional, List
+from time import perf_counter
+from typing import Any, Dict, Iterator, Optional, List, Tuple
 import asyncio
 from contextlib import asynccontextmanager
-from dataclasses import asdict
 
 import jwt
-from fastapi import FastAPI, HTTPException, Depends, status, Response
+from fastapi import FastAPI, HTTPException, Depends, Header, Query, Request, status, Response
+from fastapi import Path as FastAPIPath
+from fastapi.concurrency import run_in_threadpool
+from starlette.background import BackgroundTask
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
@@ -29,13 +32,16 @@ from gpt_api import get_plan_from_gpt
 from io_json import save_plan_to_json
 
 # DB & Auth
-from app.db import engine
+from app.db import engine, SessionLocal, warm_up_pool
 from app.models.base import Base
 import app.models.user  # noqa: F401
 import app.models.plan  # noqa: F401
 import app.models.card  # noqa: F401
+import app.models.job_progress  # noqa: F401
+import app.models.payload  # noqa: F401
+import app.models.email_outbox  # noqa: F401
 from app.db_migrations import run_sql_migrations
-from app.deps import get_db, get_current_user, get_current_user_optional
+from app.deps import get_db, get_current_user, get_current_user_optional, get_current_user_readonly
 from app.schemas.user import (
     UserCreate,
     UserLogin,
@@ -49,13 +55,13 @@ from app.schemas.plan import (
     PlanCreate,
     PlanOut,
     PlanDetail,
+    PlanSummaryOut,
     StudyPlanMeta,
-    StudyCard,
     StudyPlanResponse,
 )
 from app.crud.user import (
-    create_user as crud_create_user,
-    authenticate_user,
+    create_user_async,
+    verify_user_password_async,
     get_user_by_email,
     update_user_password,
     get_user,
@@ -64,9 +70,13 @@ from app.crud.plan import (
     create_plan as crud_create_plan,
     create_plan_with_cards,
     list_user_plans,
+    get_plans_card_stats,
     get_user_plan,
+    get_user_plan_version,
     list_cards,
-    get_plan_card_by_identifier,
+    AmbiguousCardChange,
+    bulk_update_cards,
+    user_owns_plan,
 )
 from app.security import (
     create_access_token,
@@ -74,8 +84,50 @@ from app.security import (
     decode_reset_password_token,
 )
 from app.services.plan_transformer import transform_ai_plan
-from app.services.tts import synthesize_with_piper, synthesize_with_elevenlabs, is_elevenlabs_configured
-from SMTP.email_service import send_password_reset_email
+from app.services.legacy_backfill import start_backfill_thread
+from app.services.legacy_plans import patch_legacy_task
+from app.services.payload_store import get_payload, get_payloads
+from app.services.plan_serializer import (
+    card_model_to_dict,
+    transformed_card_to_dict,
+    legacy_card_to_dict,
+    plan_detail_to_dict,
+    plan_summary_to_dict,
+)
+from app.core.responses import FastJSONResponse, RangeFileResponse
+from app.core.compression import CompressionMiddleware
+from app.core.http_cache import make_etag, match_etag
+from app.core.timing import ServerTimingMiddleware, annotate_request, configure_timing_log, record_span, timing_span
+from app.core.password_hasher import PasswordHasherBusy, shutdown_password_hasher, start_password_hasher
+from app.core.rate_limit import RateLimitExceeded, enforce as enforce_rate_limit
+from app.core.metrics import (
+    PrometheusMiddleware,
+    MODEL_INFERENCE_DURATION,
+    TTS_SYNTHESIS_DURATION,
+    instrument_pool,
+    observe_openai_attempts,
+    render_metrics,
+    mark_process_dead,
+)
+from app.services import tts_cache
+from app.services.piper_pool import shutdown_piper_pool, warm_piper_pool
+from app.services.elevenlabs_client import SpeechStream
+from app.services.tts_stream import start_stream as start_tts_stream
+from app.services.tts_presynthesis import (
+    TTS_PRESYNTH_ENABLED,
+    audio_url,
+    enqueue_cards as enqueue_card_audio,
+    note_interactive_tts,
+    start_presynthesis,
+    stop_presynthesis,
+)
+from app.services.tts import (
+    synthesize_with_piper,
+    stream_elevenlabs,
+    is_elevenlabs_configured,
+    synthesis_cache_key,
+)
+from app.services.email_outbox import enqueue_password_reset_email, start_sender_thread, stop_sender, wake_sender
 
 
 MODEL_PATH = "models/studyplan_pipeline.joblib"
@@ -84,6 +136,10 @@ FRONTEND_BASE_URL = os.getenv("FRONTEND_BASE_URL", "http://localhost:5173")
 # Pode apontar para a rota base de reset (ex.: https://meusite.com/reset-password) ou incluir {token} para interpolar.
 RESET_PASSWORD_URL = os.getenv("FRONTEND_RESET_URL", f"{FRONTEND_BASE_URL.rstrip('/')}/reset-password")
 FORGOT_PASSWORD_GENERIC_MSG = "Se este e-mail estiver cadastrado, enviaremos um link de recuperação."
+# Migra em segundo plano os planos legados (só plan.data) para a tabela cards.
+LEGACY_BACKFILL_ON_STARTUP = os.getenv("LEGACY_BACKFILL_ON_STARTUP", "0").lower() in {"1", "true", "yes"}
+# Cada worker roda um sender da outbox de e-mail (SKIP LOCKED evita envios duplicados).
+EMAIL_OUTBOX_SENDER = os.getenv("EMAIL_OUTBOX_SENDER", "1").lower() in {"1", "true", "yes"}
 
 
 class BehavioralProfileIn(BaseModel):
@@ -107,6 +163,8 @@ class PredictPlanRequest(BaseModel):
     use_gpt: bool = True
     model: Optional[str] = None  # e.g. "gpt-4o-mini"
     max_tokens: Optional[int] = None
+    # idioma do áudio pré-sintetizado dos cards (padrão: Accept-Language)
+    language: Optional[str] = None
 
 
 def _normalize_foco(value: str) -> str:
@@ -154,43 +212,17 @@ def _ensure_task_status(plan_json: Dict[str, Any]) -> Dict[str, Any]:
     return plan_json
 
 
-def _to_study_card_schema(card_dict: Dict[str, Any]) -> StudyCard:
-    return StudyCard(
-        id=card_dict.get("id", ""),
-        title=card_dict.get("title", "Tarefa"),
-        description=card_dict.get("description"),
-        instructions=card_dict.get("instructions"),
-        order=card_dict.get("order"),
-        type=card_dict.get("type"),
-        needs_review=bool(card_dict.get("needs_review", False)),
-        review_after_days=card_dict.get("review_after_days"),
-        effort_minutes=card_dict.get("effort_minutes"),
-        stage_suggestion=card_dict.get("stage_suggestion"),
-        column_key=card_dict.get("column_key", "novo"),
-        week=card_dict.get("week"),
-        depends_on=card_dict.get("depends_on") or [],
-        raw=card_dict.get("raw") or {},
-        notes=card_dict.get("notes"),
-    )
-
-
-def _card_model_to_schema(card) -> StudyCard:
-    return StudyCard(
-        id=card.source_id or str(card.id),
-        title=card.title,
-        description=card.description,
-        instructions=card.instructions,
-        order=card.order,
-        type=card.type,
-        needs_review=card.needs_review,
-        review_after_days=card.review_after_days,
-        effort_minutes=card.effort_minutes,
-        stage_suggestion=card.stage_suggestion,
-        column_key=card.column_key,
-        week=card.week,
-        depends_on=card.depends_on or [],
-        raw=card.raw or {},
-        notes=card.notes,
+def _record_openai_attempts(attempts: List[Dict[str, Any]]) -> None:
+    """Publica cada chamada HTTP à OpenAI (inclusive retries) como span da requisição."""
+    for idx, attempt in enumerate(attempts, start=1):
+        desc = f"attempt {idx} {attempt['param']}={attempt['cap']}"
+        if attempt.get("finish_reason"):
+            desc += f" finish={attempt['finish_reason']}"
+        extra = {key: value for key, value in attempt.items() if key != "duration_ms"}
+        record_span("openai", attempt.get("duration_ms") or 0.0, desc, **extra)
+    annotate_request(
+        openai_attempts=len(attempts),
+        openai_token_caps=[attempt["cap"] for attempt in attempts],
     )
 
 
@@ -216,16 +248,52 @@ async def lifespan(app: FastAPI):
     Garante setup de banco/modelo e evita estouro de stack ao encerrar com CTRL+C,
     absorvendo o CancelledError emitido pelo Uvicorn durante o shutdown.
     """
+    backfill_stop = None
+    outbox_stop = None
     try:
+        configure_timing_log()
         Base.metadata.create_all(bind=engine)
         run_sql_migrations(engine)
+        warm_up_pool(engine)
+        start_password_hasher()
+        warm_piper_pool()
         app.state.model_objs = _ensure_model()
+        if LEGACY_BACKFILL_ON_STARTUP:
+            backfill_stop = start_backfill_thread(SessionLocal)
+        if EMAIL_OUTBOX_SENDER:
+            outbox_stop = start_sender_thread(SessionLocal)
+        if TTS_PRESYNTH_ENABLED:
+            start_presynthesis()
         yield
     except asyncio.CancelledError:
         return  # shutdown solicitado (ctrl+c / reload)
+    finally:
+        if backfill_stop is not None:
+            backfill_stop.set()
+        if outbox_stop is not None:
+            stop_sender(outbox_stop)
+        stop_presynthesis()
+        shutdown_password_hasher()
+        shutdown_piper_pool()
+        mark_process_dead()
+
+
+app = FastAPI(
+    title="Projeto_IA API",
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
+)
 
+# Server-Timing + log estruturado por requisição (spans de predict-plan)
+app.add_middleware(ServerTimingMiddleware)
 
-app = FastAPI(title="Projeto_IA API", version="1.0.0", lifespan=lifespan)
+# gzip/brotli para respostas JSON grandes (ex.: GET /plans/{id})
+app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+# Métricas Prometheus (latência por rota, requisições em andamento)
+app.add_middleware(PrometheusMiddleware)
+instrument_pool(engine)
 
 # CORS - libera para frontends típicos em dev
 app.add_middleware(
@@ -242,14 +310,43 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Before-Id"],
 )
 
 
+@app.exception_handler(PasswordHasherBusy)
+def password_hasher_busy(_request: Request, _exc: PasswordHasherBusy) -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Muitas tentativas de login no momento; tente novamente."},
+        headers={"Retry-After": "2"},
+    )
+
+
+@app.exception_handler(RateLimitExceeded)
+def rate_limit_exceeded(_request: Request, exc: RateLimitExceeded) -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        content={"detail": "Muitas tentativas. Aguarde e tente novamente."},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+def _client_ip(request: Request) -> Optional[str]:
+    return request.client.host if request.client else None
+
+
 @app.get("/api/v1/health")
 def health() -> Dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics() -> Response:
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
 @app.get("/api/v1/enums")
 def enums() -> Dict[str, Any]:
     return {
@@ -264,6 +361,7 @@ def enums() -> Dict[str, Any]:
 @app.post("/api/v1/predict-plan")
 def predict_plan(
     payload: PredictPlanRequest,
+    accept_language: Optional[str] = Header(default=None),
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user_optional),
 ) -> JSONResponse:
@@ -290,17 +388,24 @@ def predict_plan(
         "texto_livre": plano.tema_estudo,
     }
 
+    # Devolve ao pool a conexão usada na autenticação: o GPT pode levar dezenas de
+    # segundos e um pico de requisições não pode esgotar o pool do CRUD. A sessão
+    # volta a pegar uma conexão só no INSERT final (current_user segue carregado).
+    db.release()
+
     model_objs = getattr(app.state, "model_objs", None)
     if model_objs is None:
         model_objs = _ensure_model()
         app.state.model_objs = model_objs
 
-    pred = predict_with_explanation(model_objs, input_dict, top_k=3)
+    with timing_span("model"), MODEL_INFERENCE_DURATION.time():
+        pred = predict_with_explanation(model_objs, input_dict, top_k=3)
     principal_label, principal_proba = pred["principal"]
 
-    skeleton = generate_plan_skeleton(
-        principal_label, input_dict["objetivo_estudo"], input_dict["texto_livre"]
-    )
+    with timing_span("skeleton"):
+        skeleton = generate_plan_skeleton(
+            principal_label, input_dict["objetivo_estudo"], input_dict["texto_livre"]
+        )
 
     response: Dict[str, Any] = {
         "classification": {
@@ -316,15 +421,24 @@ def predict_plan(
 
     if payload.use_gpt:
         try:
-            plan_json = get_plan_from_gpt(
-                skeleton=skeleton,
-                semanas=payload.semanas or 0,
-                weekly_hours=plano.tempo_semanal,
-                model=payload.model or "gpt-4o-mini",
-                max_tokens=payload.max_tokens or 1200,
-            )
-            plan_json = _ensure_task_status(plan_json)
-            transformed = transform_ai_plan(plan_json)
+            openai_model = payload.model or "gpt-4o-mini"
+            openai_attempts: List[Dict[str, Any]] = []
+            try:
+                with timing_span("gpt"):
+                    plan_json = get_plan_from_gpt(
+                        skeleton=skeleton,
+                        semanas=payload.semanas or 0,
+                        weekly_hours=plano.tempo_semanal,
+                        model=openai_model,
+                        max_tokens=payload.max_tokens or 1200,
+                        attempts=openai_attempts,
+                    )
+            finally:
+                _record_openai_attempts(openai_attempts)
+                observe_openai_attempts(openai_model, openai_attempts)
+            with timing_span("transform"):
+                plan_json = _ensure_task_status(plan_json)
+                transformed = transform_ai_plan(plan_json)
 
             stored = False
             plan_meta = StudyPlanMeta(
@@ -336,58 +450,48 @@ def predict_plan(
                 semanas=transformed.semanas,
                 version=2,
             )
-            cards_payload = [asdict(c) for c in transformed.cards]
-            cards_schema: List[StudyCard]
+            cards_payload = [transformed_card_to_dict(c) for c in transformed.cards]
 
             if current_user is not None:
-                plan_db, card_models = create_plan_with_cards(
-                    db,
-                    user_id=current_user.id,
-                    plan_title=transformed.plan_title,
-                    learning_type=transformed.learning_type,
-                    tema=transformed.tema,
-                    perfil_label=transformed.perfil_label,
-                    semanas=transformed.semanas,
-                    version=2,
-                    raw_response=transformed.raw,
-                    cards_payload=cards_payload,
-                )
+                with timing_span("db", cards=len(cards_payload)):
+                    plan_db, card_models = create_plan_with_cards(
+                        db,
+                        user_id=current_user.id,
+                        plan_title=transformed.plan_title,
+                        learning_type=transformed.learning_type,
+                        tema=transformed.tema,
+                        perfil_label=transformed.perfil_label,
+                        semanas=transformed.semanas,
+                        version=2,
+                        raw_response=transformed.raw,
+                        cards_payload=cards_payload,
+                    )
                 plan_meta.id = plan_db.id
                 stored = True
-                cards_schema = [
-                    StudyCard(
-                        id=card.source_id or str(card.id),
-                        title=card.title,
-                        description=card.description,
-                        instructions=card.instructions,
-                        order=card.order,
-                        type=card.type,
-                        needs_review=card.needs_review,
-                        review_after_days=card.review_after_days,
-                        effort_minutes=card.effort_minutes,
-                        stage_suggestion=card.stage_suggestion,
-                        column_key=card.column_key,
-                        week=card.week,
-                        depends_on=card.depends_on or [],
-                        raw=card.raw or {},
-                        notes=card.notes,
-                    )
-                    for card in card_models
-                ]
-            else:
-                cards_schema = [
-                    _to_study_card_schema(card_dict) for card_dict in cards_payload
+                audio_language = payload.language or _primary_language(accept_language)
+                cards_payload = [
+                    card_model_to_dict(card, transformed.raw, audio_language) for card in card_models
                 ]
+                if TTS_PRESYNTH_ENABLED:
+                    enqueue_card_audio(cards_payload, audio_language)
 
             response["plan"] = plan_meta.model_dump()
-            response["cards"] = [card.model_dump() for card in cards_schema]
+            response["cards"] = cards_payload
             response["stored"] = stored
             if stored:
                 response["plan_id"] = plan_meta.id
         except Exception as e:
             response["plan_generation"] = {"error": str(e)}
 
-    return JSONResponse(response)
+    return FastJSONResponse(response)
+
+
+def _primary_language(accept_language: Optional[str]) -> Optional[str]:
+    """Primeiro idioma do header Accept-Language (ex.: "en-US,en;q=0.9" -> "en-US")."""
+    if not accept_language:
+        return None
+    first = accept_language.split(",", 1)[0].split(";", 1)[0].strip()
+    return first if first and first != "*" else None
 
 
 def _plan_to_cards(plan_json: Dict[str, Any]) -> Dict[str, Any]:
@@ -450,17 +554,18 @@ def plan_cards(body: PlanJSONIn) -> Dict[str, Any]:
 # ---------- Auth ----------
 # Fluxo de reset de senha: geração, validação e troca de senha via token curto de e-mail.
 @app.post("/api/v1/auth/forgot-password")
-def forgot_password(body: ForgotPasswordRequest, db: Session = Depends(get_db)):
+def forgot_password(body: ForgotPasswordRequest, request: Request, db: Session = Depends(get_db)):
+    enforce_rate_limit("forgot-password", ip=_client_ip(request), email=body.email)
     user = get_user_by_email(db, body.email)
     if not user:
         return {"message": FORGOT_PASSWORD_GENERIC_MSG}
 
     token = create_reset_password_token(user_id=user.id, email=user.email)
     reset_link = _build_reset_link(token)
-    try:
-        send_password_reset_email(user.email, reset_link)
-    except Exception as exc:
-        raise HTTPException(status_code=500, detail="Não foi possível enviar o e-mail de recuperação") from exc
+    # entregue pelo sender da outbox; a requisição não espera o SMTP
+    enqueue_password_reset_email(db, to_email=user.email, reset_link=reset_link)
+    db.commit()
+    wake_sender()
 
     return {"message": FORGOT_PASSWORD_GENERIC_MSG}
 
@@ -496,23 +601,36 @@ def reset_password(body: ResetPasswordRequest, db: Session = Depends(get_db)):
     return {"message": "Senha alterada com sucesso"}
 
 
+def _email_taken(db: Session, email: str) -> bool:
+    taken = get_user_by_email(db, email) is not None
+    db.release()  # o hash da senha não segura conexão do pool
+    return taken
+
+
 @app.post("/api/v1/auth/register", response_model=Token)
-def register(user_in: UserCreate, db: Session = Depends(get_db)):
-    existing = authenticate_user(db, email=user_in.email, password=user_in.password)
-    # acima retorna None se não existe ou senha errada; mas precisamos checar existência direta
-    if get_user_by_email(db, user_in.email):
+async def register(user_in: UserCreate, request: Request, db: Session = Depends(get_db)):
+    # async: a espera pelo hash (pool de processos) não ocupa thread do threadpool
+    enforce_rate_limit("register", ip=_client_ip(request))
+    if await run_in_threadpool(_email_taken, db, user_in.email):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="E-mail já registrado")
-    user = crud_create_user(db, email=user_in.email, password=user_in.password, name=user_in.name)
-    token = create_access_token(user_id=user.id)
+    user = await create_user_async(db, email=user_in.email, password=user_in.password, name=user_in.name)
+    token = create_access_token(user_id=user.id, email=user.email, name=user.username)
     return Token(access_token=token)
 
 
+def _user_for_login(db: Session, email: str):
+    user = get_user_by_email(db, email)
+    db.release()  # a verificação da senha não segura conexão do pool (user segue carregado)
+    return user
+
+
 @app.post("/api/v1/auth/login", response_model=Token)
-def login(user_in: UserLogin, db: Session = Depends(get_db)):
-    user = authenticate_user(db, email=user_in.email, password=user_in.password)
-    if not user:
+async def login(user_in: UserLogin, request: Request, db: Session = Depends(get_db)):
+    enforce_rate_limit("login", ip=_client_ip(request), email=user_in.email)
+    user = await run_in_threadpool(_user_for_login, db, user_in.email)
+    if not user or not await verify_user_password_async(db, user, user_in.password):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Credenciais inválidas")
-    token = create_access_token(user_id=user.id)
+    token = create_access_token(user_id=user.id, email=user.email, name=user.username)
     return Token(access_token=token)
 
 
@@ -537,57 +655,83 @@ def auth_me(current_user=Depends(get_current_user)):
 
 
 # ---------- Plans CRUD ----------
-@app.get("/api/v1/plans", response_model=List[PlanOut])
-def list_plans(db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    plans = list_user_plans(db, user_id=current_user.id) or []
+@app.get("/api/v1/plans", response_model=List[PlanOut] | List[PlanSummaryOut])
+def list_plans(
+    limit: Optional[int] = Query(default=None, ge=1, le=200),
+    before_id: Optional[int] = Query(default=None, ge=1),
+    fields: str = Query(default="full", pattern="^(full|summary)$"),
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user_readonly),
+):
+    """
+    Lista os planos do usuário. Com `limit`, pagina por keyset (`before_id`) e
+    devolve o próximo cursor no header X-Next-Before-Id.
+    `fields=summary` não carrega os JSONB e inclui contagens de cards agregadas no banco.
+    """
+    summary = fields == "summary"
+    plans = list_user_plans(
+        db,
+        user_id=current_user.id,
+        limit=limit,
+        before_id=before_id,
+        include_payload=not summary,
+    ) or []
+
+    headers: Dict[str, str] = {}
+    if limit is not None and len(plans) == limit:
+        headers["X-Next-Before-Id"] = str(plans[-1].id)
+
+    if summary:
+        stats = get_plans_card_stats(db, plan_ids=[plan.id for plan in plans])
+        return FastJSONResponse([plan_summary_to_dict(plan, stats[plan.id]) for plan in plans], headers=headers)
+
+    payloads = get_payloads(db, (plan.payload_hash for plan in plans))
+    content = []
     for plan in plans:
-        if plan.data is None and plan.raw_response:
-            plan.data = plan.raw_response
-    return plans
+        item = PlanOut.model_validate(plan).model_dump()
+        if item["data"] is None:
+            item["data"] = plan.raw_response or payloads.get(plan.payload_hash)
+        content.append(item)
+    return FastJSONResponse(content, headers=headers)
+
+
+# Incrementar quando o formato de PlanDetail mudar, invalidando ETags antigos.
+_PLAN_ETAG_VERSION = 1
 
 
 @app.get("/api/v1/plans/{plan_id}", response_model=PlanDetail)
-def get_plan(plan_id: int, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+def get_plan(
+    plan_id: int,
+    if_none_match: Optional[str] = Header(default=None),
+    accept_language: Optional[str] = Header(default=None),
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user_readonly),
+):
+    version = get_user_plan_version(db, user_id=current_user.id, plan_id=plan_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Plano não encontrado")
+    # as URLs de card["audio"] dependem do idioma
+    audio_language = _primary_language(accept_language) if TTS_PRESYNTH_ENABLED else None
+    etag = make_etag(_PLAN_ETAG_VERSION, plan_id, *version, audio_language)
+    cache_headers = {"Cache-Control": "private, no-cache", "Vary": "Accept-Language"}
+    matched = match_etag(if_none_match, etag)
+    if matched:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={**cache_headers, "ETag": matched})
+
     plan = get_user_plan(db, user_id=current_user.id, plan_id=plan_id, include_cards=True)
     if not plan:
         raise HTTPException(status_code=404, detail="Plano não encontrado")
-    cards_schema = [_card_model_to_schema(card) for card in plan.cards]
-    if not cards_schema and plan.data:
-        legacy_cards: List[StudyCard] = []
+    payload = get_payload(db, plan.payload_hash)
+    cards_payload = [card_model_to_dict(card, payload, audio_language) for card in plan.cards]
+    if not cards_payload and plan.data:
         legacy = _plan_to_cards(plan.data)
         for semana in legacy.get("semanas", []):
             for card in semana.get("cards", []):
-                legacy_cards.append(
-                    StudyCard(
-                        id=card.get("id", ""),
-                        title=card.get("title", "Tarefa"),
-                        description=card.get("description"),
-                        instructions=card.get("description"),
-                        order=None,
-                        type=card.get("type"),
-                        needs_review=False,
-                        column_key=card.get("status", "novo"),
-                        week=semana.get("semana"),
-                        depends_on=[],
-                        raw=card,
-                        notes=card.get("notes"),
-                    )
-                )
-        cards_schema = legacy_cards
-    detail = PlanDetail(
-        id=plan.id,
-        plan_title=plan.plan_title,
-        learning_type=plan.learning_type,
-        tema=plan.tema,
-        perfil_label=plan.perfil_label,
-        semanas=plan.semanas,
-        version=plan.version,
-        created_at=plan.created_at,
-        data=plan.data,
-        raw_response=plan.raw_response,
-        cards=cards_schema,
+                cards_payload.append(legacy_card_to_dict(card, semana.get("semana")))
+    return FastJSONResponse(
+        plan_detail_to_dict(plan, cards_payload, payload),
+        headers={**cache_headers, "ETag": etag},
     )
-    return detail
 
 
 @app.post("/api/v1/plans", response_model=PlanOut)
@@ -618,6 +762,47 @@ class CardNotesIn(BaseModel):
     notes: str
 
 
+def _update_single_card(
+    db: Session, *, user_id: int, plan_id: int, change: Dict[str, Any]
+) -> Optional[Dict[str, Any]]:
+    """
+    Caminho rápido: dono do plano, lookup (source_id ou UUID) e UPDATE num único comando.
+    Retorna None quando nenhum card foi alterado (plano legado, card ou plano inexistente).
+    """
+    try:
+        updated = bulk_update_cards(db, user_id=user_id, plan_id=plan_id, changes=[change])
+    except AmbiguousCardChange:
+        raise HTTPException(status_code=422, detail="card_id repetido nesta semana do plano.")
+    return updated[0] if updated else None
+
+
+def _update_legacy_task(
+    db: Session,
+    *,
+    user_id: int,
+    plan_id: int,
+    semana: int,
+    card_id: str,
+    field: str,
+    value: Any,
+) -> Dict[str, Any]:
+    """Fallback para planos anteriores à tabela cards: altera só a tarefa dentro de plan.data."""
+    result = patch_legacy_task(
+        db,
+        user_id=user_id,
+        plan_id=plan_id,
+        semana=semana,
+        card_id=card_id,
+        field=field,
+        value=value,
+    )
+    if result is None:
+        raise HTTPException(status_code=404, detail="Plano não encontrado")
+    if not result:
+        raise HTTPException(status_code=404, detail="Card não encontrado para esta semana")
+    return {"ok": True, "plan_id": plan_id}
+
+
 @app.patch("/api/v1/plans/{plan_id}/card-notes")
 def update_card_notes(
     plan_id: int,
@@ -625,42 +810,25 @@ def update_card_notes(
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user),
 ):
-    plan = get_user_plan(db, user_id=current_user.id, plan_id=plan_id, include_cards=True)
-    if not plan:
-        raise HTTPException(status_code=404, detail="Plano não encontrado")
-
-    card = get_plan_card_by_identifier(db, plan_id=plan.id, card_identifier=body.card_id)
+    card = _update_single_card(
+        db,
+        user_id=current_user.id,
+        plan_id=plan_id,
+        change={"card_id": body.card_id, "week": body.semana, "notes": body.notes},
+    )
     if card:
-        card.notes = body.notes
-        db.add(card)
-        db.commit()
-        db.refresh(card)
-        return {"ok": True, "plan_id": plan.id, "card_id": card.source_id or str(card.id)}
+        return {"ok": True, "plan_id": plan_id, "card_id": card["source_id"] or str(card["id"])}
 
     # Fallback legado
-    data = _ensure_task_status(dict(plan.data or {}))
-    plano = data.get("plano", [])
-    found = False
-    for semana in plano:
-        if int(semana.get("semana", -1)) != int(body.semana):
-            continue
-        tarefas = semana.get("tarefas", [])
-        for t in tarefas:
-            if isinstance(t, dict) and t.get("id") == body.card_id:
-                t["notes"] = body.notes
-                found = True
-                break
-        if found:
-            break
-
-    if not found:
-        raise HTTPException(status_code=404, detail="Card não encontrado para esta semana")
-
-    plan.data = data
-    db.add(plan)
-    db.commit()
-    db.refresh(plan)
-    return {"ok": True, "plan_id": plan.id}
+    return _update_legacy_task(
+        db,
+        user_id=current_user.id,
+        plan_id=plan_id,
+        semana=body.semana,
+        card_id=body.card_id,
+        field="notes",
+        value=body.notes,
+    )
 
 
 class CardStatusIn(BaseModel):
@@ -680,48 +848,94 @@ def update_card_status(
     if not status_value:
         raise HTTPException(status_code=422, detail="status inválido.")
 
-    plan = get_user_plan(db, user_id=current_user.id, plan_id=plan_id, include_cards=True)
-    if not plan:
+    card = _update_single_card(
+        db,
+        user_id=current_user.id,
+        plan_id=plan_id,
+        change={"card_id": body.card_id, "week": body.semana, "column_key": status_value},
+    )
+    if card:
+        return {"ok": True, "plan_id": plan_id, "card_id": card["source_id"] or str(card["id"])}
+
+    return _update_legacy_task(
+        db,
+        user_id=current_user.id,
+        plan_id=plan_id,
+        semana=body.semana,
+        card_id=body.card_id,
+        field="status",
+        value=status_value,
+    )
+
+
+# ---------- Card bulk update ----------
+class CardChangeIn(BaseModel):
+    card_id: str
+    # ids da IA (ex.: "task-1") se repetem entre semanas; informe a semana para alterar só um card
+    semana: Optional[int] = None
+    status: Optional[str] = None
+    notes: Optional[str] = None
+    order: Optional[int] = None
+
+
+class CardsBulkUpdateIn(BaseModel):
+    changes: List[CardChangeIn] = Field(min_length=1, max_length=500)
+
+
+@app.patch("/api/v1/plans/{plan_id}/cards")
+def bulk_update_plan_cards(
+    plan_id: int,
+    body: CardsBulkUpdateIn,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    """
+    Aplica de uma vez as mudanças do Kanban (status, anotações, ordem) numa única transação.
+    Mudanças para o mesmo card são mescladas pelo card resolvido (a última vence).
+    Um card_id da IA sem semana que exista em mais de uma semana rejeita o lote (422).
+    """
+    changes: List[Dict[str, Any]] = []
+    for change in body.changes:
+        entry: Dict[str, Any] = {"card_id": change.card_id, "week": change.semana}
+        if change.status is not None:
+            status_value = change.status.strip().lower()
+            if not status_value:
+                raise HTTPException(status_code=422, detail=f"status inválido para o card {change.card_id}.")
+            entry["column_key"] = status_value
+        if change.notes is not None:
+            entry["notes"] = change.notes
+        if change.order is not None:
+            entry["order"] = change.order
+        changes.append(entry)
+
+    try:
+        updated = bulk_update_cards(db, user_id=current_user.id, plan_id=plan_id, changes=changes)
+    except AmbiguousCardChange as exc:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Informe a semana: card_id presente em mais de uma semana ({', '.join(exc.card_ids)}).",
+        )
+    if not updated and not user_owns_plan(db, user_id=current_user.id, plan_id=plan_id):
         raise HTTPException(status_code=404, detail="Plano não encontrado")
 
-    card = get_plan_card_by_identifier(db, plan_id=plan.id, card_identifier=body.card_id)
-    if card:
-        card.column_key = status_value
-        db.add(card)
-        db.commit()
-        db.refresh(card)
-        return {"ok": True, "plan_id": plan.id, "card_id": card.source_id or str(card.id)}
-
-    data = _ensure_task_status(dict(plan.data or {}))
-    plano = data.get("plano", [])
-    found = False
-    for semana in plano:
-        if int(semana.get("semana", -1)) != int(body.semana):
-            continue
-        tarefas = semana.get("tarefas", [])
-        for t in tarefas:
-            if isinstance(t, dict) and t.get("id") == body.card_id:
-                t["status"] = status_value
-                found = True
-                break
-        if found:
-            break
-
-    if not found:
-        raise HTTPException(status_code=404, detail="Card não encontrado para esta semana")
+    updated_keys = {(row["card_id"], row["week"]) for row in updated}
+    not_found: List[str] = []
+    for entry in changes:
+        if (entry["card_id"], entry["week"]) not in updated_keys and entry["card_id"] not in not_found:
+            not_found.append(entry["card_id"])
+    return {
+        "ok": True,
+        "plan_id": plan_id,
+        "updated": list(
+            {
+                (row["card_id"], row["week"]): {"card_id": row["card_id"], "updated_at": row["updated_at"]}
+                for row in updated
+            }.values()
+        ),
+        "not_found": not_found,
+    }
 
-    plan.data = data
-    db.add(plan)
-    db.commit()
-    db.refresh(plan)
-    return {"ok": True, "plan_id": plan.id}
-_FRONTEND_DIST = Path("adapte-estuda-planejador-main/dist").resolve()
-if _FRONTEND_DIST.exists():
-    app.mount("/", StaticFiles(directory=str(_FRONTEND_DIST), html=True), name="static")
 
-    @app.get("/")
-    def _index() -> FileResponse:
-        return FileResponse(str(_FRONTEND_DIST / "index.html"))
 class TTSRequest(BaseModel):
     text: str
     language: Optional[str] = None
@@ -731,31 +945,134 @@ class TTSRequest(BaseModel):
         pattern="^(piper|elevenlabs)$",
     )
 
+
+_TTS_FILENAMES = {"mp3": "tts.mp3", "wav": "tts.wav"}
+_TTS_PROVIDER_FORMATS = {"elevenlabs": "mp3", "piper": "wav"}
+
+
+def _tts_headers(ext: str, provider: str, key: str, cache_status: str) -> Dict[str, str]:
+    # conteúdo endereçado pela chave de síntese: pode ficar em cache indefinidamente
+    return {
+        "Cache-Control": "private, max-age=31536000, immutable",
+        "ETag": f'"{key}"',
+        "Content-Disposition": f"inline; filename={_TTS_FILENAMES[ext]}",
+        "X-TTS-Provider": provider,
+        "X-TTS-Cache": cache_status,
+        # mesmo áudio como recurso GET (cacheável pelo navegador, com Range)
+        "Content-Location": audio_url(key),
+    }
+
+
+def _tts_response(audio_bytes: bytes, ext: str, provider: str, key: str, cache_status: str) -> Response:
+    headers = _tts_headers(ext, provider, key, cache_status)
+    return Response(content=audio_bytes, media_type=tts_cache.MEDIA_TYPES[ext], headers=headers)
+
+
+def _tee_to_cache(chunks: SpeechStream, provider: str, key: str, ext: str) -> Iterator[bytes]:
+    """Repassa o áudio conforme chega e grava no cache só se o stream terminar inteiro."""
+    parts: List[bytes] = []
+    start = perf_counter()
+    try:
+        for chunk in chunks:
+            parts.append(chunk)
+            yield chunk
+    finally:
+        chunks.close()
+    TTS_SYNTHESIS_DURATION.labels(provider).observe(perf_counter() - start)
+    tts_cache.store(key, ext, b"".join(parts))
+
+
+def _tts_providers(body: TTSRequest) -> List[str]:
+    preferred = (body.provider or "").lower()
+    providers = ["piper"]
+    # First try ElevenLabs if configured or explicitly requested, otherwise fall back to Piper
+    if preferred != "piper" and is_elevenlabs_configured():
+        providers.insert(0, "elevenlabs")
+    return providers
+
+
 @app.post("/api/v1/tts")
 def generate_tts(body: TTSRequest) -> Response:
     """
     Endpoint simples que expõe o mecanismo TTS.
-    Tenta ElevenLabs (se configurado via env) antes de recorrer ao Piper local.
+    Tenta ElevenLabs (se configurado via env, com o MP3 repassado em streaming)
+    antes de recorrer ao Piper local; o áudio de cada provedor fica no cache em disco (tts_cache).
     """
-    preferred = (body.provider or "").lower()
-    # First try ElevenLabs if configured or explicitly requested, otherwise fall back to Piper
-    if preferred != "piper" and is_elevenlabs_configured():
+    note_interactive_tts()
+    providers = _tts_providers(body)
+    for provider in providers:
+        key = synthesis_cache_key(body.text, body.language, provider)
+        cached = tts_cache.load(key)
+        if cached is not None:
+            # a pré-síntese pode ter gravado o Piper sob a chave da ElevenLabs (ver tts_presynthesis)
+            hit_provider = "piper" if cached[1] == _TTS_PROVIDER_FORMATS["piper"] else provider
+            return _tts_response(cached[0], cached[1], hit_provider, key, "hit")
         try:
-            audio_bytes = synthesize_with_elevenlabs(body.text, body.language)
-            headers = {
-                "Cache-Control": "no-store",
-                "Content-Disposition": "inline; filename=tts.mp3",
-                "X-TTS-Provider": "elevenlabs",
-            }
-            return Response(content=audio_bytes, media_type="audio/mpeg", headers=headers)
+            if provider == "elevenlabs":
+                # stream da ElevenLabs repassado direto; falhas antes do 1º byte ainda caem no Piper
+                chunks = stream_elevenlabs(body.text, body.language)
+                return StreamingResponse(
+                    _tee_to_cache(chunks, provider, key, "mp3"),
+                    media_type=tts_cache.MEDIA_TYPES["mp3"],
+                    headers=_tts_headers("mp3", provider, key, "miss"),
+                    # o gerador pode nunca ser iniciado (cliente desconectou antes): fecha o stream mesmo assim
+                    background=BackgroundTask(chunks.close),
+                )
+            with TTS_SYNTHESIS_DURATION.labels(provider).time():
+                audio_bytes = synthesize_with_piper(body.text, body.language)
         except HTTPException:
-            # Fall back to Piper if ElevenLabs fails
-            pass
+            if provider == providers[-1]:
+                raise
+            continue  # Fall back to Piper if ElevenLabs fails
+        ext = _TTS_PROVIDER_FORMATS[provider]
+        tts_cache.store(key, ext, audio_bytes)
+        return _tts_response(audio_bytes, ext, provider, key, "miss")
+
 
-    audio_bytes = synthesize_with_piper(body.text, body.language)
+@app.post("/api/v1/tts/stream")
+def stream_tts(body: TTSRequest) -> StreamingResponse:
+    """
+    Versão em streaming do /tts para textos longos: frases sintetizadas em paralelo
+    e enviadas em ordem (WAV com cabeçalho de streaming, ou MP3 concatenado).
+    """
+    note_interactive_tts()
+    provider, ext, audio_iter = start_tts_stream(body.text, body.language, _tts_providers(body))
     headers = {
         "Cache-Control": "no-store",
-        "Content-Disposition": "inline; filename=tts.wav",
-        "X-TTS-Provider": "piper",
+        "Content-Disposition": f"inline; filename={_TTS_FILENAMES[ext]}",
+        "X-TTS-Provider": provider,
     }
-    return Response(content=audio_bytes, media_type="audio/wav", headers=headers)
+    return StreamingResponse(audio_iter, media_type=tts_cache.MEDIA_TYPES[ext], headers=headers)
+
+
+@app.api_route("/api/v1/tts/audio/{key}", methods=["GET", "HEAD"])
+def get_tts_audio(key: str = FastAPIPath(pattern="^[0-9a-f]{64}$")) -> RangeFileResponse:
+    """
+    Áudio já sintetizado, endereçado pela chave de síntese (URLs de card["audio"] e
+    Content-Location do POST /tts). Suporta Range para seek/retomada e If-None-Match.
+    """
+    found = tts_cache.lookup(key)
+    audio_file = None
+    if found is not None:
+        try:
+            audio_file = open(found[0], "rb")
+        except FileNotFoundError:  # evicção entre a consulta e a abertura
+            pass
+    if audio_file is None:
+        raise HTTPException(status_code=404, detail="Áudio ainda não sintetizado.")
+    return RangeFileResponse(
+        audio_file,
+        media_type=tts_cache.MEDIA_TYPES[found[1]],
+        etag=f'"{key}"',
+        headers={"Cache-Control": "private, max-age=31536000, immutable"},
+    )
+
+
+# Estáticos do front por último: o mount em "/" casa qualquer caminho e esconderia as rotas abaixo dele.
+_FRONTEND_DIST = Path("adapte-estuda-planejador-main/dist").resolve()
+if _FRONTEND_DIST.exists():
+    app.mount("/", StaticFiles(directory=str(_FRONTEND_DIST), html=True), name="static")
+
+    @app.get("/")
+    def _index() -> FileResponse:
+        return FileResponse(str(_FRONTEND_DIST / "index.html"))
@@ -0,0 +1,45 @@
+"""Histograma http_request_db_checkouts do PrometheusMiddleware (engine SQLite em memória)."""
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from app.core.metrics import PrometheusMiddleware, instrument_pool
+
+
+def _observed(route: str):
+    labels = {"method": "GET", "route": route}
+    return (
+        REGISTRY.get_sample_value("http_request_db_checkouts_sum", labels) or 0.0,
+        REGISTRY.get_sample_value("http_request_db_checkouts_count", labels) or 0.0,
+    )
+
+
+def test_checkouts_are_observed_per_route():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    instrument_pool(engine)
+    app = FastAPI()
+    app.add_middleware(PrometheusMiddleware)
+
+    @app.get("/bench/db/{item_id}")
+    def touches_db(item_id: int):
+        # rota sync: roda no threadpool, o contador precisa chegar até lá
+        for _ in range(2):
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+        return {"ok": item_id}
+
+    @app.get("/bench/nodb")
+    def no_db():
+        return {"ok": True}
+
+    before_db, before_nodb = _observed("/bench/db/{item_id}"), _observed("/bench/nodb")
+    client = TestClient(app)
+    client.get("/bench/db/1")
+    client.get("/bench/db/2")
+    client.get("/bench/nodb")
+
+    after_db, after_nodb = _observed("/bench/db/{item_id}"), _observed("/bench/nodb")
+    assert (after_db[0] - before_db[0], after_db[1] - before_db[1]) == (4, 2)
+    assert (after_nodb[0] - before_nodb[0], after_nodb[1] - before_nodb[1]) == (0, 1)
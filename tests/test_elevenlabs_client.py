@@ -0,0 +1,126 @@
+"""Cliente ElevenLabs contra um servidor HTTP local (ELEVENLABS_BASE_URL)."""
+import importlib
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+AUDIO_CHUNKS = [b"ID3" + bytes(100), bytes(range(256)) * 4, b"fim"]
+
+
+class _StandIn(BaseHTTPRequestHandler):
+    status = 200
+    hits = 0
+
+    def do_POST(self):
+        type(self).hits += 1
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if not self.path.endswith("/stream"):
+            self.send_error(404)
+            return
+        if self.status != 200:
+            self.send_response(self.status)
+            self.send_header("Content-Length", "4")
+            self.end_headers()
+            self.wfile.write(b"erro")
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "audio/mpeg")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for chunk in AUDIO_CHUNKS:
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stand_in():
+    handler = type("Handler", (_StandIn,), {"status": 200, "hits": 0})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield handler, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client_module(stand_in, monkeypatch):
+    _, base_url = stand_in
+    monkeypatch.setenv("ELEVENLABS_BASE_URL", base_url)
+    monkeypatch.setenv("ELEVENLABS_MAX_CONCURRENCY", "1")
+    monkeypatch.setenv("ELEVENLABS_QUEUE_TIMEOUT", "0.1")
+    monkeypatch.setenv("ELEVENLABS_BREAKER_FAILURES", "2")
+    monkeypatch.setenv("ELEVENLABS_BREAKER_RESET_SECONDS", "0.2")
+    from app.services import elevenlabs_client
+
+    module = importlib.reload(elevenlabs_client)
+    yield module
+    importlib.reload(elevenlabs_client)
+
+
+def _open(client):
+    return client.stream("chave", "voz", {"text": "olá"})
+
+
+def test_stream_passes_audio_through(client_module):
+    client = client_module.get_client()
+    stream = _open(client)
+    assert b"".join(stream) == b"".join(AUDIO_CHUNKS)
+    assert not client.breaker.is_open
+
+
+def test_breaker_opens_fails_fast_and_recovers(stand_in, client_module):
+    handler, _ = stand_in
+    client = client_module.get_client()
+    handler.status = 503
+    for _ in range(2):
+        with pytest.raises(client_module.ElevenLabsError):
+            _open(client)
+    assert client.breaker.is_open
+
+    hits = handler.hits
+    started = time.monotonic()
+    with pytest.raises(client_module.ElevenLabsUnavailable):
+        _open(client)
+    assert handler.hits == hits  # nem chegou a contatar o servidor
+    assert time.monotonic() - started < 0.05
+
+    handler.status = 200
+    time.sleep(0.25)
+    stream = _open(client)  # pedido de teste do meio-aberto
+    assert b"".join(stream) == b"".join(AUDIO_CHUNKS)
+    assert not client.breaker.is_open
+
+
+def test_slot_released_when_stream_is_never_iterated(client_module):
+    client = client_module.get_client()
+    for _ in range(3):
+        # MAX_CONCURRENCY=1: sem devolver a vaga, a segunda chamada seria "busy"
+        _open(client).close()
+    assert b"".join(_open(client)) == b"".join(AUDIO_CHUNKS)
+
+
+def test_busy_half_open_probe_does_not_wedge_breaker(stand_in, client_module):
+    handler, _ = stand_in
+    client = client_module.get_client()
+    handler.status = 500
+    for _ in range(2):
+        with pytest.raises(client_module.ElevenLabsError):
+            _open(client)
+    handler.status = 200
+    time.sleep(0.25)
+
+    # ocupa a única vaga por fora e deixa o pedido de teste esbarrar no limite
+    assert client._slots.acquire(timeout=1)
+    with pytest.raises(client_module.ElevenLabsUnavailable):
+        _open(client)
+    client._slots.release()
+
+    assert b"".join(_open(client)) == b"".join(AUDIO_CHUNKS)
+    assert not client.breaker.is_open
@@ -0,0 +1,114 @@
+"""Entrega da outbox contra um servidor SMTP local (aiosmtpd)."""
+import socket
+
+import pytest
+
+aiosmtpd_controller = pytest.importorskip("aiosmtpd.controller")
+
+from app.services import email_outbox  # noqa: E402
+from SMTP import email_service  # noqa: E402
+from SMTP.email_service import SMTPConnection  # noqa: E402
+
+
+class _Handler:
+    def __init__(self):
+        self.messages = []
+        self.sessions = 0
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        self.sessions += 1
+        session.host_name = hostname
+        return responses
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address.startswith("recusado@"):
+            return "550 caixa inexistente"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append((envelope.rcpt_tos[:], envelope.content))
+        return "250 Message accepted for delivery"
+
+
+@pytest.fixture(autouse=True)
+def _sender_address(monkeypatch):
+    monkeypatch.setattr(email_service, "SMTP_FROM_EMAIL", "suporte@exemplo.com")
+
+
+@pytest.fixture
+def smtp_server():
+    handler = _Handler()
+    controller = aiosmtpd_controller.Controller(handler, hostname="127.0.0.1", port=_free_port())
+    controller.start()
+    yield handler, controller
+    controller.stop()
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _rows(*emails):
+    return [
+        {"id": idx, "to_email": email, "subject": f"Assunto {idx}", "html_body": "<p>oi</p>", "text_body": "oi", "attempts": 1}
+        for idx, email in enumerate(emails, start=1)
+    ]
+
+
+def _conn(port: int) -> SMTPConnection:
+    return SMTPConnection(host="127.0.0.1", port=port, user="", password="", starttls=False, timeout=5)
+
+
+def test_batch_is_delivered_over_a_single_connection(smtp_server):
+    handler, controller = smtp_server
+    conn = _conn(controller.port)
+    try:
+        sent, failed, unsent = email_outbox.send_rows(conn, _rows("a@x.com", "b@x.com", "c@x.com"))
+    finally:
+        conn.close()
+    assert sent == [1, 2, 3]
+    assert failed == [] and unsent == []
+    assert [rcpt for rcpt, _ in handler.messages] == [["a@x.com"], ["b@x.com"], ["c@x.com"]]
+    assert handler.sessions == 1
+
+
+def test_refused_recipient_fails_only_that_message(smtp_server):
+    handler, controller = smtp_server
+    conn = _conn(controller.port)
+    try:
+        sent, failed, unsent = email_outbox.send_rows(conn, _rows("a@x.com", "recusado@x.com", "c@x.com"))
+    finally:
+        conn.close()
+    assert sent == [1, 3]
+    assert [row["id"] for row, _ in failed] == [2]
+    assert unsent == []
+    assert handler.sessions == 1  # a conexão continuou em uso
+
+
+def test_connection_failure_stops_the_batch():
+    conn = _conn(_free_port())  # ninguém escutando
+    sent, failed, unsent = email_outbox.send_rows(conn, _rows("a@x.com", "b@x.com", "c@x.com"))
+    assert sent == []
+    assert [row["id"] for row, _ in failed] == [1]
+    assert unsent == [2, 3]
+
+
+def test_reconnects_after_server_drops_idle_session(smtp_server):
+    handler, controller = smtp_server
+    conn = _conn(controller.port)
+    try:
+        email_outbox.send_rows(conn, _rows("a@x.com"))
+        conn._server.sock.shutdown(socket.SHUT_RDWR)  # sessão derrubada entre lotes
+        sent, failed, _ = email_outbox.send_rows(conn, _rows("b@x.com"))
+    finally:
+        conn.close()
+    assert sent == [1] and failed == []
+    assert len(handler.messages) == 2
+    assert handler.sessions == 2
+
+
+def test_lease_covers_worst_case_batch():
+    assert email_outbox.lease_seconds(20, 30) >= 20 * 30
@@ -0,0 +1,37 @@
+from concurrent.futures import Future
+
+import pytest
+
+from app.services.tts_stream import _wav_stream, split_sentences
+
+
+def test_first_sentence_stands_alone():
+    chunks = split_sentences("Oi. Tudo bem?")
+    assert chunks == ["Oi.", "Tudo bem?"]
+
+
+def test_long_sentence_without_spaces_is_cut_at_max_chars():
+    chunks = split_sentences("a" * 25, min_chars=5, max_chars=10)
+    assert chunks == ["a" * 10, "a" * 10, "a" * 5]
+    assert all(len(chunk) <= 10 for chunk in chunks)
+
+
+def test_long_sentence_is_cut_at_spaces_and_keeps_order():
+    text = "Primeira frase. curta. " + " ".join(["palavra"] * 20) + "."
+    chunks = split_sentences(text, min_chars=40, max_chars=50)
+    assert all(len(chunk) <= 50 for chunk in chunks)
+    assert " ".join(chunks).split() == text.split()
+
+
+def test_mid_stream_failure_aborts_instead_of_truncating():
+    first: Future = Future()
+    first.set_result((b"\x00\x00", 16000))
+
+    def synthesize(chunk):
+        raise RuntimeError("piper caiu")
+
+    stream = _wav_stream(["um", "dois"], synthesize, first)
+    assert next(stream).startswith(b"RIFF")
+    assert next(stream) == b"\x00\x00"
+    with pytest.raises(RuntimeError):
+        next(stream)